@@ -1,7 +1,9 @@
 from datetime import date
 from decimal import Decimal
 from dataclasses import dataclass
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Sequence, Union
+
+import numpy as np
 
 
 @dataclass
@@ -35,6 +37,7 @@ def recommend_rate(
     comp_prices: List[Decimal],
     current_rate: Optional[Decimal],
     cfg: PricingConfig,
+    today: Optional[date] = None,
 ) -> Decimal:
     if comp_prices:
         base = min(comp_prices) + cfg.undercut
@@ -44,7 +47,7 @@ def recommend_rate(
     if day.weekday() in (4, 5):
         base += cfg.weekend_uplift
 
-    days_out = (day - date.today()).days
+    days_out = (day - (today or date.today())).days
     base += _lead_adjustment(days_out, cfg.lead_buckets)
 
     bounded = _clamp(base, cfg.min_rate, cfg.max_rate)
@@ -54,3 +57,183 @@ def recommend_rate(
         bounded = _clamp(bounded, current_rate - cap, current_rate + cap)
 
     return bounded.quantize(Decimal("0.01"))
+
+
+# Largest decimal scale the integer engine works at, and the magnitude bound that keeps the
+# scaled ints (and the cap product) far inside int64. Inputs beyond either fall back to
+# recommend_rate so results stay exact.
+_MAX_SCALE = 9
+_EXACT_LIMIT = 2 ** 50
+_CENT = Decimal("0.01")
+# date.toordinal() of 1970-01-01, to turn datetime64[D] into ordinals.
+_EPOCH_ORDINAL = 719163
+
+
+def _places(d: Decimal) -> int:
+    exp = d.normalize().as_tuple().exponent
+    return -exp if isinstance(exp, int) and exp < 0 else 0
+
+
+def _as_decimal(v) -> Decimal:
+    return v if isinstance(v, Decimal) else Decimal(v) if isinstance(v, int) else Decimal(str(v))
+
+
+def _scaled(values: List, f: int) -> Optional[List[int]]:
+    """Each value times `f` as an int (None -> 0), or None if one is not whole at that scale."""
+    out = []
+    append = out.append
+    for v in values:
+        if v is None:
+            append(0)
+            continue
+        n, d = (v if isinstance(v, (Decimal, int)) else _as_decimal(v)).as_integer_ratio()
+        q, r = divmod(f, d)
+        if r:
+            return None
+        append(n * q)
+    return out
+
+
+class CompiledPricingPolicy:
+    """`recommend_rate` for a whole horizon (or a grid of rooms x days) in one NumPy call.
+
+    Built once per PricingConfig: weekday uplifts become a 7-entry table and lead buckets a
+    sorted cutoff array for `searchsorted`. Prices are exact: every value is scaled to a
+    common power of ten (cents unless the inputs need more) and handled as int64, then
+    rounded half-even to cents, so results equal `recommend_rate` to the cent. Inputs with
+    too many decimals (e.g. Decimal(float)) fall back to `recommend_rate` element by element.
+    """
+
+    def __init__(self, cfg: PricingConfig):
+        self.cfg = cfg
+        cutoffs = sorted(cfg.lead_buckets)
+        self._cutoffs = np.array(cutoffs, dtype=np.int64)
+        self._lead = [Decimal(cfg.lead_buckets[c]) for c in cutoffs]
+        self._weekday = [cfg.weekend_uplift if wd in (4, 5) else Decimal("0") for wd in range(7)]
+        self._fixed = [cfg.min_rate, cfg.max_rate, cfg.weekend_uplift, cfg.undercut, *self._lead]
+        self._fixed_places = max([2] + [_places(d) for d in self._fixed])
+        self._pct_places = _places(cfg.max_change_pct)
+        self._pct_i = int(cfg.max_change_pct.scaleb(self._pct_places))
+        self._tables: Dict[int, tuple] = {}
+
+    def _scaled_tables(self, scale: int) -> tuple:
+        if scale not in self._tables:
+            f = 10 ** scale
+            lead = [int(v * f) for v in self._lead] or [0]
+            self._tables[scale] = (
+                int(self.cfg.min_rate * f),
+                int(self.cfg.max_rate * f),
+                int(self.cfg.undercut * f),
+                np.array([int(v * f) for v in self._weekday], dtype=np.int64),
+                np.array(lead + lead[-1:], dtype=np.int64),
+            )
+        return self._tables[scale]
+
+    def price_cents(
+        self,
+        days: Union[Sequence[date], np.ndarray],
+        lowest_comp: Sequence,
+        current_rate: Optional[Sequence] = None,
+        today: Optional[date] = None,
+    ) -> np.ndarray:
+        """Recommended rates in integer cents.
+
+        `days` is 1-D (dates or datetime64[D]). `lowest_comp` (the min competitor price per
+        day, None when there are none) and optional `current_rate` broadcast against it,
+        e.g. shape (rooms, days) to price several room types / occupancies at once.
+        """
+        if isinstance(days, np.ndarray):
+            ordinals = days.astype("datetime64[D]").astype(np.int64) + _EPOCH_ORDINAL
+        else:
+            ordinals = np.fromiter((d.toordinal() for d in days), dtype=np.int64, count=len(days))
+        today = today or date.today()
+        comp_shape, comp = _flat(lowest_comp)
+        cur_shape, cur = _flat(current_rate) if current_rate is not None else ((1,), [None])
+        shape = np.broadcast_shapes(comp_shape, cur_shape, ordinals.shape)
+
+        # Cents (or the config's finer scale) unless an input needs more decimals; a current
+        # rate also needs room for its product with max_change_pct.
+        scale = self._fixed_places
+        if current_rate is not None:
+            scale = max(scale, 2 + self._pct_places)
+        while True:
+            f = 10 ** scale
+            comp_i = _scaled(comp, f)
+            cur_i = _scaled(cur, 10 ** max(0, scale - self._pct_places))
+            if comp_i is not None and cur_i is not None:
+                break
+            need = max(_places(_as_decimal(v)) for v in comp if v is not None) if comp_i is None else scale
+            if cur_i is None:
+                need = max(need, self._pct_places + max(
+                    (_places(_as_decimal(v)) for v in cur if v is not None), default=0
+                ))
+            if need <= scale or need > _MAX_SCALE:
+                return self._price_cents_exact(ordinals, comp, comp_shape, cur, cur_shape, shape, today)
+            scale = need
+        pct_f = 10 ** self._pct_places
+        comp_a = np.array(comp_i, dtype=np.int64).reshape(comp_shape)
+        cur_a = np.array(cur_i, dtype=np.int64).reshape(cur_shape) * pct_f
+        limit = _EXACT_LIMIT // pct_f
+        if comp_a.size and np.abs(comp_a).max() >= limit or cur_a.size and np.abs(cur_a).max() >= limit:
+            return self._price_cents_exact(ordinals, comp, comp_shape, cur, cur_shape, shape, today)
+        has_comp = np.array([v is not None for v in comp]).reshape(comp_shape)
+        has_cur = np.array([v is not None for v in cur]).reshape(cur_shape)
+
+        lo, hi, undercut, weekday_tbl, lead_tbl = self._scaled_tables(scale)
+        base = np.where(has_comp, comp_a + undercut, np.where(has_cur, cur_a, lo))
+        weekday = (ordinals + 6) % 7  # ordinal 1 (0001-01-01) was a Monday
+        days_out = ordinals - today.toordinal()
+        base = base + weekday_tbl[weekday] + lead_tbl[np.searchsorted(self._cutoffs, days_out, side="left")]
+        bounded = np.maximum(lo, np.minimum(base, hi))
+
+        cap = np.abs(cur_a * self._pct_i) // pct_f
+        capped = np.maximum(cur_a - cap, np.minimum(bounded, cur_a + cap))
+        bounded = np.broadcast_to(np.where(has_cur, capped, bounded), shape)
+        return _round_half_even(bounded, 10 ** (scale - 2))
+
+    def _price_cents_exact(self, ordinals, comp, comp_shape, cur, cur_shape, shape, today) -> np.ndarray:
+        days = np.broadcast_to(np.array([date.fromordinal(int(o)) for o in ordinals], dtype=object), shape)
+        comp = np.broadcast_to(np.array(comp + [None], dtype=object)[:-1].reshape(comp_shape), shape)
+        cur = np.broadcast_to(np.array(cur + [None], dtype=object)[:-1].reshape(cur_shape), shape)
+        out = np.empty(shape, dtype=np.int64)
+        for idx in np.ndindex(shape):
+            c, r = comp[idx], cur[idx]
+            rate = recommend_rate(
+                days[idx],
+                [_as_decimal(c)] if c is not None else [],
+                _as_decimal(r) if r is not None else None,
+                self.cfg,
+                today=today,
+            )
+            out[idx] = int(rate.scaleb(2))
+        return out
+
+    def recommend_horizon(
+        self,
+        days: Sequence[date],
+        lowest_comp: Sequence[Optional[Decimal]],
+        current_rate: Optional[Sequence[Optional[Decimal]]] = None,
+        today: Optional[date] = None,
+    ) -> List[Decimal]:
+        """Same as calling `recommend_rate` for each day, as Decimals quantized to cents."""
+        cents = self.price_cents(days, lowest_comp, current_rate, today)
+        return [Decimal(c) * _CENT for c in cents.ravel().tolist()]
+
+
+def _flat(values: Sequence) -> tuple:
+    """(shape, flat list) of a 1-D or nested sequence of prices / None."""
+    if isinstance(values, np.ndarray):
+        return values.shape, values.ravel().tolist()
+    if values and isinstance(values[0], (list, tuple)):
+        return (len(values), len(values[0])), [v for row in values for v in row]
+    return (len(values),), list(values)
+
+
+def _round_half_even(values: np.ndarray, unit: int) -> np.ndarray:
+    """Integer division by `unit` with banker's rounding (Decimal.quantize's default)."""
+    if unit == 1:
+        return values.astype(np.int64)
+    q, r = np.divmod(values, unit)
+    twice = 2 * r
+    up = (twice > unit) | ((twice == unit) & (q % 2 == 1))
+    return q + up
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.core.config import AppConfig
+from app.core.config import get_config as load_config
 
 router = APIRouter(prefix="/config", tags=["config"])
 
@@ -8,7 +8,7 @@ router = APIRouter(prefix="/config", tags=["config"])
 @router.get("")
 def get_config():
     """Expose non-secret configuration used by the UI."""
-    cfg = AppConfig()
+    cfg = load_config()
     return {
         "hotel": {
             "currency": cfg.currency,
@@ -0,0 +1,40 @@
+import time
+
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+
+# The services record into backend.app.core.metrics; import the same module (not
+# app.core.metrics, which would be a second, empty registry).
+from backend.app.core import metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """This process's counters and histograms in the Prometheus text format."""
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/metrics/summary")
+def metrics_summary():
+    """The same numbers as JSON (counts, totals and p50 / p95 / max in ms)."""
+    return metrics.summary()
+
+
+async def record_request_time(request: Request, call_next):
+    """HTTP middleware: time every request by method, route template and status."""
+    t0 = time.perf_counter()
+    status = "500"
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+        return response
+    finally:
+        route = request.scope.get("route")
+        metrics.HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - t0,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status,
+        )
@@ -2,7 +2,7 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
 from app.clients.simple_booking_client import SimpleBookingClient
-from app.core.config import AppConfig
+from app.core.config import get_config
 from app.services.pricing_service import get_recommendations
 
 router = APIRouter(prefix="/runs", tags=["runs"])
@@ -14,7 +14,7 @@ class PushRequest(BaseModel):
 
 @router.post("/{run_id}/push")
 def push_run_rates(run_id: int, payload: PushRequest):
-    cfg = AppConfig()
+    cfg = get_config()
     recs = get_recommendations(run_id)
     if not recs:
         raise HTTPException(status_code=404, detail="No recommendations found for run")
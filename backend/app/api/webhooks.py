@@ -0,0 +1,35 @@
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, BackgroundTasks, Header, HTTPException
+
+from app.services import rate_shopping_service as rss
+
+router = APIRouter(prefix="/webhooks", tags=["webhooks"])
+
+
+@router.post("/apify")
+def apify_run_finished(
+    payload: Dict[str, Any],
+    background_tasks: BackgroundTasks,
+    x_apify_webhook_secret: Optional[str] = Header(default=None),
+):
+    """Receive Apify's run-finished webhook and sync that run straight away."""
+    if not rss.WEBHOOK_SECRET:
+        raise HTTPException(status_code=503, detail="APIFY_WEBHOOK_SECRET is not configured")
+    if not rss.webhook_secret_matches(x_apify_webhook_secret):
+        raise HTTPException(status_code=401, detail="Invalid webhook secret")
+
+    resource = payload.get("resource") or {}
+    apify_run_id = resource.get("id") or (payload.get("eventData") or {}).get("actorRunId")
+    if not apify_run_id:
+        raise HTTPException(status_code=400, detail="Payload has no Apify run id")
+
+    db_run_id = rss.find_run_by_apify_id(apify_run_id)
+    if db_run_id is None:
+        # Not one of ours (or already pruned). 2xx so Apify doesn't keep retrying.
+        return {"ok": True, "ignored": True}
+
+    # The default payload carries the finished run object; reuse it instead of re-fetching.
+    run = resource if resource.get("status") and resource.get("defaultDatasetId") else None
+    background_tasks.add_task(rss.sync_scrape_run, db_run_id, run)
+    return {"ok": True, "db_run_id": db_run_id}
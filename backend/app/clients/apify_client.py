@@ -4,34 +4,182 @@ Uses plain `requests` (already a dependency) to avoid pulling in the Apify SDK.
 The APIFY_TOKEN is read from the environment and only ever used here, server-side.
 It is never returned to callers and never sent to the browser.
 
+`AsyncApifyClient` is the asyncio flavour (httpx, one keep-alive connection pool per
+client) for fanning out hundreds of start / poll / dataset calls at once under a
+concurrency limit. `ApifyClient` keeps its blocking API; its batch helpers are thin
+wrappers that drive the async client to completion.
+
 Apify REST docs: https://docs.apify.com/api/v2
 """
 from __future__ import annotations
 
+import asyncio
+import base64
+import json as jsonlib
 import os
-from typing import Any, Dict, List, Optional
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Dict, Iterable, Iterator, List, Optional, TypeVar, Union
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from backend.app.core.metrics import APIFY_REQUEST_SECONDS
 
-API_BASE = "https://api.apify.com/v2"
+# Overridable so the pipeline can be pointed at a local stand-in (scripts/fake_apify_server.py).
+API_BASE = os.getenv("APIFY_API_BASE", "https://api.apify.com/v2").strip().rstrip("/")
 
 # Apify run statuses we treat as terminal.
 TERMINAL_OK = {"SUCCEEDED"}
 TERMINAL_FAIL = {"FAILED", "ABORTED", "TIMED-OUT"}
 
 
+def _int_env(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+# Max in-flight Apify requests per client (start + poll + dataset calls combined).
+MAX_CONCURRENCY = _int_env("APIFY_MAX_CONCURRENCY", 16)
+# Items per dataset page when streaming a dataset.
+DATASET_PAGE_SIZE = _int_env("APIFY_DATASET_PAGE_SIZE", 1000)
+# Attempts for requests Apify rejects with 429 / 5xx (rate limits hit easily when fanning out).
+MAX_ATTEMPTS = 4
+# Methods safe to repeat after a 5xx: the server may have acted on it before failing.
+_IDEMPOTENT_METHODS = {"GET"}
+
+T = TypeVar("T")
+
+
 class ApifyError(RuntimeError):
     """Any problem talking to the Apify API."""
 
 
+def _resolve_token(token: Optional[str]) -> str:
+    token = (token or os.getenv("APIFY_TOKEN", "")).strip()
+    if not token:
+        raise ApifyError(
+            "APIFY_TOKEN is not set. Add it to your .env / Streamlit secrets."
+        )
+    return token
+
+
+def _resolve_actor(actor_id: Optional[str]) -> str:
+    return (actor_id or os.getenv("APIFY_ACTOR_ID", "voyager/booking-scraper")).strip()
+
+
+def _timed_http(method: str, url: str, what: str, **kwargs: Any) -> requests.Response:
+    """One blocking request through the shared session, timed into APIFY_REQUEST_SECONDS."""
+    t0 = time.perf_counter()
+    status = "error"
+    try:
+        resp = _http().request(method, url, **kwargs)
+        status = str(resp.status_code)
+        return resp
+    except requests.RequestException as exc:
+        raise ApifyError(f"Failed to reach Apify: {exc}") from exc
+    finally:
+        APIFY_REQUEST_SECONDS.observe(time.perf_counter() - t0, call=what, status=status)
+
+
+def _check(status_code: int, text: str, what: str) -> None:
+    if status_code >= 400:
+        raise ApifyError(f"Apify {what} HTTP {status_code}: {text[:500]}")
+
+
+def _retryable(method: str, status_code: int) -> bool:
+    """Whether a response is worth retrying.
+
+    A 429 means the request was refused, so repeating it is always safe. A 5xx is retried
+    only for GETs: a POST that starts a run may already have started (and be billing for)
+    it, and retrying would start a second one.
+    """
+    if status_code == 429:
+        return True
+    return status_code >= 500 and method.upper() in _IDEMPOTENT_METHODS
+
+
+def _retrying_http(method: str, url: str, what: str, **kwargs: Any) -> requests.Response:
+    """`_timed_http` with the async client's backoff on 429 (and, for GETs, 5xx) responses."""
+    for attempt in range(MAX_ATTEMPTS):
+        resp = _timed_http(method, url, what, **kwargs)
+        if not _retryable(method, resp.status_code) or attempt == MAX_ATTEMPTS - 1:
+            return resp
+        time.sleep(0.5 * 2 ** attempt)
+    return resp
+
+
+def _start_params(timeout_secs: int, webhooks: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    params: Dict[str, Any] = {"timeout": timeout_secs}
+    if webhooks:
+        # Ad-hoc webhooks ride along with the run as base64-encoded JSON.
+        params["webhooks"] = base64.b64encode(jsonlib.dumps(webhooks).encode("utf-8")).decode("ascii")
+    return params
+
+
+def _dataset_params(offset: int, limit: int) -> Dict[str, Any]:
+    return {"clean": "true", "format": "json", "offset": offset, "limit": limit}
+
+
+def _next_offset(offset: int, limit: int, page: List[Any], total: Optional[str]) -> Optional[int]:
+    """Offset of the next dataset page, or None when the dataset is exhausted.
+
+    Apify applies offset/limit before `clean` drops empty items, so a short page does not
+    mean the end. Advance by `limit` and stop on the reported total (or an empty page).
+    """
+    nxt = offset + limit
+    if total is not None and total.isdigit():
+        return nxt if nxt < int(total) else None
+    return nxt if page else None
+
+
+# One keep-alive session for every blocking call in the process.
+_session_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+
+
+def _http() -> requests.Session:
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(MAX_CONCURRENCY, 10))
+                s.mount("https://", adapter)
+                s.mount("http://", adapter)
+                _session = s
+    return _session
+
+
+def _run_sync(coro: Awaitable[T]) -> T:
+    """Run a coroutine to completion from sync code, even if a loop is already running."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    # Called from inside an event loop (e.g. an async FastAPI handler): use a helper thread.
+    box: Dict[str, Any] = {}
+
+    def _target() -> None:
+        try:
+            box["value"] = asyncio.run(coro)
+        except BaseException as exc:  # noqa: BLE001 - re-raised below
+            box["error"] = exc
+
+    t = threading.Thread(target=_target, daemon=True)
+    t.start()
+    t.join()
+    if "error" in box:
+        raise box["error"]
+    return box["value"]
+
+
 class ApifyClient:
     def __init__(self, token: Optional[str] = None, actor_id: Optional[str] = None):
-        self.token = (token or os.getenv("APIFY_TOKEN", "")).strip()
-        self.actor_id = (actor_id or os.getenv("APIFY_ACTOR_ID", "voyager/booking-scraper")).strip()
-        if not self.token:
-            raise ApifyError(
-                "APIFY_TOKEN is not set. Add it to your .env / Streamlit secrets."
-            )
+        self.token = _resolve_token(token)
+        self.actor_id = _resolve_actor(actor_id)
 
     # ------------------------------------------------------------------ helpers
     def _actor_path(self) -> str:
@@ -44,53 +192,92 @@ class ApifyClient:
             params.update(extra)
         return params
 
+    def _async(self, concurrency: Optional[int] = None) -> "AsyncApifyClient":
+        return AsyncApifyClient(token=self.token, actor_id=self.actor_id, concurrency=concurrency)
+
     # -------------------------------------------------------------------- calls
-    def start_run(self, actor_input: Dict[str, Any], timeout_secs: int = 600) -> Dict[str, Any]:
+    def start_run(
+        self,
+        actor_input: Dict[str, Any],
+        timeout_secs: int = 600,
+        webhooks: Optional[List[Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
         """Start an actor run asynchronously. Returns the Apify run object's `data`.
 
         timeout_secs caps the actor run server-side so a stuck run cannot bill forever.
+        webhooks are ad-hoc Apify webhook definitions registered for this run only.
         """
         url = f"{API_BASE}/acts/{self._actor_path()}/runs"
-        try:
-            resp = requests.post(
-                url,
-                params=self._params({"timeout": timeout_secs}),
-                json=actor_input,
-                timeout=60,
-            )
-        except requests.RequestException as exc:
-            raise ApifyError(f"Failed to reach Apify: {exc}") from exc
-
-        if resp.status_code >= 400:
-            raise ApifyError(f"Apify start_run HTTP {resp.status_code}: {resp.text[:500]}")
+        resp = _retrying_http(
+            "POST", url, "start_run",
+            params=self._params(_start_params(timeout_secs, webhooks)),
+            json=actor_input,
+            timeout=60,
+        )
+        _check(resp.status_code, resp.text, "start_run")
         return resp.json().get("data", {})
 
     def get_run(self, run_id: str) -> Dict[str, Any]:
         """Fetch the current state of a run."""
         url = f"{API_BASE}/actor-runs/{run_id}"
-        try:
-            resp = requests.get(url, params=self._params(), timeout=30)
-        except requests.RequestException as exc:
-            raise ApifyError(f"Failed to reach Apify: {exc}") from exc
-        if resp.status_code >= 400:
-            raise ApifyError(f"Apify get_run HTTP {resp.status_code}: {resp.text[:500]}")
+        resp = _retrying_http("GET", url, "get_run", params=self._params(), timeout=30)
+        _check(resp.status_code, resp.text, "get_run")
         return resp.json().get("data", {})
 
-    def get_dataset_items(self, dataset_id: str, limit: int = 1000) -> List[Dict[str, Any]]:
-        """Fetch cleaned dataset items as a list of dicts."""
+    def iter_dataset_pages(
+        self, dataset_id: str, page_size: int = DATASET_PAGE_SIZE
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Yield cleaned dataset items page by page (offset/limit), without a size cap."""
         url = f"{API_BASE}/datasets/{dataset_id}/items"
-        try:
-            resp = requests.get(
-                url,
-                params=self._params({"clean": "true", "format": "json", "limit": limit}),
-                timeout=120,
+        offset: Optional[int] = 0
+        while offset is not None:
+            resp = _retrying_http(
+                "GET", url, "dataset", params=self._params(_dataset_params(offset, page_size)), timeout=120
             )
-        except requests.RequestException as exc:
-            raise ApifyError(f"Failed to reach Apify: {exc}") from exc
-        if resp.status_code >= 400:
-            raise ApifyError(f"Apify dataset HTTP {resp.status_code}: {resp.text[:500]}")
-        data = resp.json()
-        return data if isinstance(data, list) else []
+            _check(resp.status_code, resp.text, "dataset")
+            data = resp.json()
+            page = data if isinstance(data, list) else []
+            if page:
+                yield page
+            offset = _next_offset(offset, page_size, page, resp.headers.get("X-Apify-Pagination-Total"))
+
+    def iter_dataset_items(
+        self, dataset_id: str, page_size: int = DATASET_PAGE_SIZE
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield cleaned dataset items one at a time, fetching a page at a time."""
+        for page in self.iter_dataset_pages(dataset_id, page_size):
+            yield from page
+
+    def get_dataset_items(self, dataset_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Fetch cleaned dataset items as a list of dicts (all of them unless `limit` is set)."""
+        items: List[Dict[str, Any]] = []
+        for item in self.iter_dataset_items(dataset_id):
+            if limit is not None and len(items) >= limit:
+                break
+            items.append(item)
+        return items
+
+    # ------------------------------------------------------- concurrent batches
+    def start_runs(
+        self,
+        actor_inputs: List[Dict[str, Any]],
+        timeout_secs: Union[int, List[int]] = 600,
+        concurrency: Optional[int] = None,
+        webhooks: Optional[List[Dict[str, Any]]] = None,
+    ) -> List[Union[Dict[str, Any], ApifyError]]:
+        """Start many runs concurrently. Results line up with `actor_inputs`.
+
+        `timeout_secs` is one cap for every run or a list lined up with `actor_inputs`.
+        A failed start yields its ApifyError in place of the run object, so one rejected
+        input doesn't lose the runs that did start (and are already billing).
+        """
+        return _run_sync(self._async(concurrency).start_runs(actor_inputs, timeout_secs, webhooks))
+
+    def get_runs(
+        self, run_ids: Iterable[str], concurrency: Optional[int] = None
+    ) -> Dict[str, Union[Dict[str, Any], ApifyError]]:
+        """Fetch the state of many runs concurrently, keyed by run id."""
+        return _run_sync(self._async(concurrency).get_runs(run_ids))
 
     @staticmethod
     def extract_cost_usd(run_data: Dict[str, Any]) -> Optional[float]:
@@ -102,3 +289,162 @@ class ApifyClient:
         usage = run_data.get("usage") or {}
         val = usage.get("USD_TOTAL") or usage.get("totalUsd")
         return float(val) if isinstance(val, (int, float)) else None
+
+
+class AsyncApifyClient:
+    """asyncio Apify client sharing one keep-alive httpx session across all calls.
+
+    Use as `async with AsyncApifyClient() as client: ...`. The batch helpers
+    (`start_runs`, `get_runs`, `get_datasets`) open the session themselves when called
+    outside a context block. At most `concurrency` requests are in flight at once.
+    """
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        actor_id: Optional[str] = None,
+        concurrency: Optional[int] = None,
+    ):
+        self.token = _resolve_token(token)
+        self.actor_id = _resolve_actor(actor_id)
+        self.concurrency = max(1, int(concurrency or MAX_CONCURRENCY))
+        self._http = None
+        self._sem: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "AsyncApifyClient":
+        import httpx
+
+        limits = httpx.Limits(
+            max_connections=self.concurrency, max_keepalive_connections=self.concurrency
+        )
+        self._http = httpx.AsyncClient(base_url=API_BASE, limits=limits, timeout=60)
+        self._sem = asyncio.Semaphore(self.concurrency)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+        self._http = None
+        self._sem = None
+
+    def _actor_path(self) -> str:
+        return self.actor_id.replace("/", "~")
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        what: str,
+        *,
+        params: Optional[Dict[str, Any]] = None,
+        json: Any = None,
+        timeout: float = 60,
+        header: Optional[str] = None,
+    ) -> Any:
+        import httpx
+
+        if self._http is None:
+            raise ApifyError("AsyncApifyClient used outside `async with`")
+        query = {"token": self.token, **(params or {})}
+        for attempt in range(MAX_ATTEMPTS):
+            async with self._sem:
+                t0 = time.perf_counter()
+                status = "error"
+                try:
+                    resp = await self._http.request(
+                        method, path, params=query, json=json, timeout=timeout
+                    )
+                    status = str(resp.status_code)
+                except httpx.HTTPError as exc:
+                    raise ApifyError(f"Failed to reach Apify: {exc}") from exc
+                finally:
+                    APIFY_REQUEST_SECONDS.observe(time.perf_counter() - t0, call=what, status=status)
+            if not _retryable(method, resp.status_code) or attempt == MAX_ATTEMPTS - 1:
+                break
+            # Back off outside the semaphore so other requests keep flowing.
+            await asyncio.sleep(0.5 * 2 ** attempt)
+        _check(resp.status_code, resp.text, what)
+        if header is not None:
+            return resp.json(), resp.headers.get(header)
+        return resp.json()
+
+    # -------------------------------------------------------------------- calls
+    async def start_run(
+        self,
+        actor_input: Dict[str, Any],
+        timeout_secs: int = 600,
+        webhooks: Optional[List[Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        body = await self._request(
+            "POST", f"/acts/{self._actor_path()}/runs", "start_run",
+            params=_start_params(timeout_secs, webhooks), json=actor_input,
+        )
+        return body.get("data", {})
+
+    async def get_run(self, run_id: str) -> Dict[str, Any]:
+        body = await self._request("GET", f"/actor-runs/{run_id}", "get_run", timeout=30)
+        return body.get("data", {})
+
+    async def iter_dataset_pages(
+        self, dataset_id: str, page_size: int = DATASET_PAGE_SIZE
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Async counterpart of ApifyClient.iter_dataset_pages."""
+        offset: Optional[int] = 0
+        while offset is not None:
+            data, total = await self._request(
+                "GET", f"/datasets/{dataset_id}/items", "dataset",
+                params=_dataset_params(offset, page_size), timeout=120,
+                header="X-Apify-Pagination-Total",
+            )
+            page = data if isinstance(data, list) else []
+            if page:
+                yield page
+            offset = _next_offset(offset, page_size, page, total)
+
+    async def get_dataset_items(self, dataset_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        items: List[Dict[str, Any]] = []
+        async for page in self.iter_dataset_pages(dataset_id):
+            items.extend(page)
+            if limit is not None and len(items) >= limit:
+                return items[:limit]
+        return items
+
+    # ------------------------------------------------------- concurrent batches
+    @staticmethod
+    async def _gather(coros: List[Awaitable[T]]) -> List[Union[T, ApifyError]]:
+        results = await asyncio.gather(*coros, return_exceptions=True)
+        for r in results:
+            if isinstance(r, BaseException) and not isinstance(r, ApifyError):
+                raise r
+        return results
+
+    async def start_runs(
+        self,
+        actor_inputs: List[Dict[str, Any]],
+        timeout_secs: Union[int, List[int]] = 600,
+        webhooks: Optional[List[Dict[str, Any]]] = None,
+    ) -> List[Union[Dict[str, Any], ApifyError]]:
+        """Start every input concurrently; an ApifyError stands in for each failed start."""
+        timeouts = timeout_secs if isinstance(timeout_secs, list) else [timeout_secs] * len(actor_inputs)
+        return await self._gather_lazy(
+            lambda: [self.start_run(i, t, webhooks) for i, t in zip(actor_inputs, timeouts)]
+        )
+
+    async def get_runs(self, run_ids: Iterable[str]) -> Dict[str, Union[Dict[str, Any], ApifyError]]:
+        ids = list(dict.fromkeys(run_ids))
+        results = await self._gather_lazy(lambda: [self.get_run(r) for r in ids])
+        return dict(zip(ids, results))
+
+    async def get_datasets(
+        self, dataset_ids: Iterable[str]
+    ) -> Dict[str, Union[List[Dict[str, Any]], ApifyError]]:
+        ids = list(dict.fromkeys(dataset_ids))
+        results = await self._gather_lazy(lambda: [self.get_dataset_items(d) for d in ids])
+        return dict(zip(ids, results))
+
+    async def _gather_lazy(self, make_coros) -> List[Any]:
+        # Coroutines are created only once the session exists, so none is left un-awaited.
+        if self._http is None:
+            async with self:
+                return await self._gather(make_coros())
+        return await self._gather(make_coros())
@@ -1,15 +1,25 @@
 import os
+import threading
 import yaml
 from decimal import Decimal
-from typing import Dict, Optional
-from backend.app.agent.pricing import PricingConfig
+from typing import Dict, Optional, Tuple
+from backend.app.agent.pricing import CompiledPricingPolicy, PricingConfig
+
+DEFAULT_SETTINGS_PATH = "config/settings.yaml"
+# Env vars AppConfig reads; a change to any of them forces a reload like a file edit does.
+CONFIG_ENV_VARS = ("CURRENCY", "SB_PROPERTY_ID", "SB_RATE_PLAN_ID")
+
+
+def _resolve_path(path: str) -> str:
+    # allow running from backend/ or root
+    if not os.path.exists(path):
+        path = os.path.join("..", path)
+    return path
 
 
 class AppConfig:
-    def __init__(self, path: str = "config/settings.yaml"):
-        # allow running from backend/ or root
-        if not os.path.exists(path):
-            path = os.path.join("..", path)
+    def __init__(self, path: str = DEFAULT_SETTINGS_PATH):
+        path = _resolve_path(path)
 
         with open(path, "r", encoding="utf-8") as f:
             y = yaml.safe_load(f)
@@ -32,3 +42,41 @@ class AppConfig:
             lead_buckets={int(k): Decimal(str(v)) for k, v in p.get("lead_buckets", {}).items()},
             max_change_pct=Decimal(str(p["max_change_pct"])),
         )
+        self._policy: Optional[CompiledPricingPolicy] = None
+
+    @property
+    def policy(self) -> CompiledPricingPolicy:
+        """The pricing config compiled for vectorised horizon pricing (built on first use)."""
+        if self._policy is None:
+            self._policy = CompiledPricingPolicy(self.cfg)
+        return self._policy
+
+
+_cache: Dict[str, Tuple[Tuple, AppConfig]] = {}
+_cache_lock = threading.Lock()
+
+
+def get_config(path: str = DEFAULT_SETTINGS_PATH) -> AppConfig:
+    """Shared AppConfig, re-read only when settings.yaml's mtime/size or CONFIG_ENV_VARS change.
+
+    Callers get the same instance until then, so treat it as read-only.
+    """
+    resolved = os.path.abspath(_resolve_path(path))
+    try:
+        st = os.stat(resolved)
+    except OSError:
+        return AppConfig(path)  # raises the usual FileNotFoundError
+    key = (st.st_mtime_ns, st.st_size, tuple(os.getenv(k) for k in CONFIG_ENV_VARS))
+    with _cache_lock:
+        hit = _cache.get(resolved)
+        if hit and hit[0] == key:
+            return hit[1]
+    cfg = AppConfig(resolved)
+    with _cache_lock:
+        _cache[resolved] = (key, cfg)
+    return cfg
+
+
+def clear_config_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
@@ -5,12 +5,20 @@ SQLite file. The rate-shopping feature, which accumulates competitor price histo
 time, uses Supabase Postgres instead so the data survives Streamlit Cloud redeploys.
 
 All access is server-side over a direct (pooled) Postgres connection. The connection
-string lives in SUPABASE_DB_URL and is never exposed to the browser.
+string lives in SUPABASE_DB_URL and is never exposed to the browser. Each process keeps a
+small pool of those connections (see `ConnectionPool`) so queries don't pay a TLS
+handshake each time.
 """
 from __future__ import annotations
 
 import os
+import threading
+import time
+from collections import deque
 from contextlib import contextmanager
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from backend.app.core import metrics
 
 # Best-effort load of a local .env when running outside Streamlit Cloud.
 try:  # pragma: no cover - convenience only
@@ -23,10 +31,28 @@ except Exception:  # pragma: no cover
 RATESHOP_SCHEMA = "rateshop"
 
 
+def _int_env(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+POOL_MAX_SIZE = _int_env("RATESHOP_DB_POOL_MAX", 8)
+POOL_MAX_IDLE_SECS = _int_env("RATESHOP_DB_POOL_MAX_IDLE_SECS", 300)
+POOL_TIMEOUT_SECS = _int_env("RATESHOP_DB_POOL_TIMEOUT_SECS", 30)
+# Connections idle for longer than this get a `SELECT 1` before being handed out again.
+POOL_HEALTHCHECK_AFTER_SECS = _int_env("RATESHOP_DB_POOL_HEALTHCHECK_SECS", 30)
+
+
 class MissingConfigError(RuntimeError):
     """Raised when the Supabase connection is requested but not configured."""
 
 
+class PoolTimeout(RuntimeError):
+    """Raised when no pooled connection became free within the checkout timeout."""
+
+
 def _connection_string() -> str:
     url = os.getenv("SUPABASE_DB_URL", "").strip()
     if not url:
@@ -39,7 +65,11 @@ def _connection_string() -> str:
 
 
 def get_conn():
-    """Open a new psycopg2 connection with search_path pinned to the rateshop schema."""
+    """Open a new psycopg2 connection with search_path pinned to the rateshop schema.
+
+    The caller owns the connection and must close it. Prefer `cursor()` / `connection()`,
+    which borrow from the process-wide pool instead of paying a fresh TLS handshake.
+    """
     try:
         import psycopg2  # noqa: WPS433 (import here so the rest of the app runs without it)
     except ImportError as exc:  # pragma: no cover
@@ -51,24 +81,300 @@ def get_conn():
         _connection_string(),
         connect_timeout=10,
         options=f"-c search_path={RATESHOP_SCHEMA},public",
+        cursor_factory=timed_cursor_class(psycopg2.extensions.cursor),
     )
     return conn
 
 
-@contextmanager
-def cursor(commit: bool = False):
-    """Context manager yielding a cursor and guaranteeing the connection is closed."""
-    conn = get_conn()
+_timed_classes: Dict[type, type] = {}
+
+
+def timed_cursor_class(base: type) -> type:
+    """`base` (a psycopg2 cursor class) with every execute timed into core.metrics."""
+    cls = _timed_classes.get(base)
+    if cls is None:
+        def execute(self, query, vars=None):
+            with metrics.db_query():
+                return base.execute(self, query, vars)
+
+        def executemany(self, query, vars_list):
+            with metrics.db_query():
+                return base.executemany(self, query, vars_list)
+
+        cls = _timed_classes.setdefault(
+            base, type(f"Timed{base.__name__}", (base,), {"execute": execute, "executemany": executemany})
+        )
+    return cls
+
+
+# ----------------------------------------------------------------------------
+# Connection pool
+# ----------------------------------------------------------------------------
+class ConnectionPool:
+    """Thread-safe, bounded pool of psycopg2 connections.
+
+    Built for the Supabase transaction pooler (pgbouncer transaction mode): a connection
+    only goes back to the pool outside a transaction, and nothing relies on session state
+    beyond the search_path sent at connect time, so any server backend may serve the next
+    transaction. Idle connections are reused LIFO, evicted after `max_idle_secs`, and
+    pinged before reuse once they have been idle for a while.
+    """
+
+    def __init__(
+        self,
+        max_size: int = POOL_MAX_SIZE,
+        max_idle_secs: float = POOL_MAX_IDLE_SECS,
+        timeout_secs: float = POOL_TIMEOUT_SECS,
+        healthcheck_after_secs: float = POOL_HEALTHCHECK_AFTER_SECS,
+        connect=get_conn,
+    ):
+        self.max_size = max(1, int(max_size))
+        self.max_idle_secs = max_idle_secs
+        self.timeout_secs = timeout_secs
+        self.healthcheck_after_secs = healthcheck_after_secs
+        self._connect = connect
+        self._cond = threading.Condition()
+        self._idle: Deque[Tuple[Any, float]] = deque()  # (conn, returned_at)
+        self._size = 0  # open connections, idle + checked out
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "created": 0,
+            "closed": 0,
+            "evicted_idle": 0,
+            "failed_healthchecks": 0,
+            "timeouts": 0,
+        }
+
+    # ------------------------------------------------------------------ checkout
+    def getconn(self):
+        """Borrow a connection, blocking up to `timeout_secs` if the pool is exhausted."""
+        t0 = time.monotonic()
+        deadline = t0 + self.timeout_secs
+        while True:
+            conn, idle_since = self._reserve(deadline, t0)
+            if conn is None:
+                # We reserved a slot for a brand new connection.
+                try:
+                    conn = self._connect()
+                except Exception:
+                    self._release_slot()
+                    raise
+                with self._cond:
+                    self._stats["created"] += 1
+                return conn
+            if self._healthy(conn, idle_since):
+                return conn
+            with self._cond:
+                self._stats["failed_healthchecks"] += 1
+            self._discard(conn)
+
+    def _reserve(self, deadline: float, t0: float) -> Tuple[Any, float]:
+        """Pop an idle connection or claim a slot for a new one. Returns (conn|None, idle_since)."""
+        waited = False
+        with self._cond:
+            while True:
+                self._evict_idle_locked()
+                if self._idle:
+                    conn, idle_since = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn, idle_since = None, 0.0
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"No database connection free after {self.timeout_secs}s "
+                        f"(pool max {self.max_size}). Raise RATESHOP_DB_POOL_MAX?"
+                    )
+                waited = True
+                self._cond.wait(remaining)
+            wait = time.monotonic() - t0
+            self._stats["checkouts"] += 1
+            if waited:
+                self._stats["waits"] += 1
+            self._stats["wait_seconds_total"] += wait
+            self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], wait)
+        return conn, idle_since
+
+    def _healthy(self, conn, idle_since: float) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < self.healthcheck_after_secs:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.close()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _evict_idle_locked(self) -> None:
+        # Oldest connections sit at the left end of the deque.
+        cutoff = time.monotonic() - self.max_idle_secs
+        while self._idle and self._idle[0][1] < cutoff:
+            conn, _ = self._idle.popleft()
+            self._size -= 1
+            self._stats["evicted_idle"] += 1
+            self._stats["closed"] += 1
+            _close_quietly(conn)
+
+    # -------------------------------------------------------------------- return
+    def putconn(self, conn, discard: bool = False) -> None:
+        """Return a connection. Anything still inside a transaction is rolled back first."""
+        if discard or conn.closed or not self._reset(conn):
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @staticmethod
+    def _reset(conn) -> bool:
+        from psycopg2 import extensions
+
+        try:
+            status = conn.get_transaction_status()
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                return False
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn) -> None:
+        _close_quietly(conn)
+        with self._cond:
+            self._stats["closed"] += 1
+        self._release_slot()
+
+    def _release_slot(self) -> None:
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def closeall(self) -> None:
+        with self._cond:
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._size -= 1
+                self._stats["closed"] += 1
+                _close_quietly(conn)
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            out: Dict[str, Any] = dict(self._stats)
+            out.update(
+                size=self._size,
+                idle=len(self._idle),
+                in_use=self._size - len(self._idle),
+                max_size=self.max_size,
+            )
+        out["wait_seconds_avg"] = (
+            out["wait_seconds_total"] / out["checkouts"] if out["checkouts"] else 0.0
+        )
+        return out
+
+
+def _close_quietly(conn) -> None:
     try:
-        cur = conn.cursor()
-        yield cur
-        if commit:
-            conn.commit()
+        conn.close()
     except Exception:
-        conn.rollback()
+        pass
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Process-wide pool, created lazily. A forked child gets its own fresh pool."""
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is not None and _pool_pid == pid:
+        return _pool
+    with _pool_lock:
+        if _pool is None or _pool_pid != pid:
+            # Never reuse sockets inherited across fork(); just drop the references.
+            _pool, _pool_pid = ConnectionPool(), pid
+        return _pool
+
+
+def close_pool() -> None:
+    """Close every idle pooled connection (e.g. at CLI exit)."""
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.closeall()
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Checkout / wait-time / size counters for the process-wide pool."""
+    return get_pool().stats()
+
+
+def _pool_gauges():
+    # Reported only once this process has a pool; reading metrics never opens one.
+    if _pool is None or _pool_pid != os.getpid():
+        return []
+    stats = _pool.stats()
+    return [("rateshop_db_pool", "Connection pool size, checkout and wait counters", "gauge",
+             [({"stat": k}, float(v)) for k, v in sorted(stats.items())])]
+
+
+metrics.REGISTRY.add_collector(_pool_gauges)
+
+
+@contextmanager
+def connection():
+    """Borrow a pooled connection; it is rolled back (if needed) and returned on exit."""
+    pool = get_pool()
+    conn = pool.getconn()
+    broken = False
+    try:
+        yield conn
+    except Exception as exc:
+        broken = _is_disconnect(exc)
+        if not broken:
+            try:
+                conn.rollback()
+            except Exception:
+                broken = True
         raise
     finally:
-        conn.close()
+        pool.putconn(conn, discard=broken)
+
+
+@contextmanager
+def cursor(commit: bool = False, cursor_factory=None):
+    """Context manager yielding a cursor on a pooled connection.
+
+    Commits on success when `commit=True`, rolls back on error, and always hands the
+    connection back to the pool.
+    """
+    with connection() as conn:
+        cur = conn.cursor(cursor_factory=timed_cursor_class(cursor_factory)) if cursor_factory else conn.cursor()
+        try:
+            yield cur
+            if commit:
+                conn.commit()
+        finally:
+            cur.close()
+
+
+def _is_disconnect(exc: BaseException) -> bool:
+    try:
+        import psycopg2
+    except ImportError:  # pragma: no cover
+        return False
+    return isinstance(exc, (psycopg2.OperationalError, psycopg2.InterfaceError))
 
 
 def is_configured() -> bool:
@@ -0,0 +1,368 @@
+"""Lightweight in-process metrics: counters, histograms and timing spans.
+
+Stdlib only (no prometheus_client). Numbers are per process: each CLI run or API worker
+keeps its own. They are exposed two ways:
+
+* `render_prometheus()` — Prometheus text format, served at `/metrics` by the FastAPI app.
+* `summary()` — a JSON-friendly dict printed at the end of each `sync_apify.py` command.
+
+What is recorded:
+
+* `rateshop_stage_seconds{stage}` / `rateshop_stage_items_total{stage}` — the scrape
+  pipeline (start, poll, dataset, normalise, match, upsert, rollup, insights) via `span()`.
+  Spans nest per thread and record *exclusive* time, so a dataset page fetched while a
+  normalise span is open counts as dataset time only and the stages add up.
+* `rateshop_db_query_seconds{caller}` — every query run through `core.db` cursors, labelled
+  with the function that issued it (e.g. `rate_shopping_service._load_run`).
+* `rateshop_apify_request_seconds{call,status}` — each HTTP call to Apify, excluding
+  time queued behind the client's concurrency limit.
+* `rateshop_http_request_seconds{method,route,status}` — FastAPI requests.
+"""
+from __future__ import annotations
+
+import bisect
+import math
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Seconds; wide enough for a 1 ms query and a multi-minute dataset download.
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+)
+
+LabelValues = Tuple[str, ...]
+# (metric name, help, type, [(labels, value)]) as produced by a collector.
+Gauge = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+
+class Counter(_Metric):
+    """Monotonic total per label set."""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def values(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram(_Metric):
+    """Bucketed observations per label set (plus count, sum and max)."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), count, sum, max]
+        self._series: Dict[LabelValues, List[Any]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = [[0] * (len(self.buckets) + 1), 0, 0.0, 0.0]
+            s[0][i] += 1
+            s[1] += 1
+            s[2] += value
+            if value > s[3]:
+                s[3] = value
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def series(self) -> Dict[LabelValues, Tuple[List[int], int, float, float]]:
+        with self._lock:
+            return {k: (list(v[0]), v[1], v[2], v[3]) for k, v in self._series.items()}
+
+    def quantile(self, q: float, bucket_counts: List[int], count: int, max_: float) -> float:
+        """Estimate the q-quantile from bucket counts (linear within the bucket)."""
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for i, n in enumerate(bucket_counts):
+            if n and seen + n >= rank:
+                lo = self.buckets[i - 1] if i > 0 else 0.0
+                hi = self.buckets[i] if i < len(self.buckets) else max_
+                return min(max_, lo + (hi - lo) * (rank - seen) / n)
+            seen += n
+        return max_
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class Registry:
+    """Named metrics plus collectors that report gauges at read time."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Gauge]]] = []
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, help: str, labelnames: Sequence[str], **kwargs: Any):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"{name} is already registered as a {metric.type}")
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get(Counter, name, help, labelnames)
+
+    def histogram(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._get(Histogram, name, help, labelnames, buckets=buckets)
+
+    def add_collector(self, fn: Callable[[], Iterable[Gauge]]) -> None:
+        self._collectors.append(fn)
+
+    def metrics(self) -> List[_Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def collect(self) -> List[Gauge]:
+        out: List[Gauge] = []
+        for fn in list(self._collectors):
+            try:
+                out.extend(fn())
+            except Exception:  # a broken collector must not break /metrics
+                continue
+        return out
+
+    def reset(self) -> None:
+        for metric in self.metrics():
+            metric.reset()
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "rateshop_stage_seconds", "Exclusive time per scrape pipeline stage call", ["stage"]
+)
+STAGE_ITEMS = REGISTRY.counter(
+    "rateshop_stage_items_total", "Items handled per scrape pipeline stage", ["stage"]
+)
+DB_QUERY_SECONDS = REGISTRY.histogram(
+    "rateshop_db_query_seconds", "Postgres query time by issuing function", ["caller"]
+)
+DB_QUERY_ERRORS = REGISTRY.counter(
+    "rateshop_db_query_errors_total", "Postgres queries that raised, by issuing function", ["caller"]
+)
+APIFY_REQUEST_SECONDS = REGISTRY.histogram(
+    "rateshop_apify_request_seconds", "Apify API request time", ["call", "status"]
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "rateshop_http_request_seconds", "FastAPI request time", ["method", "route", "status"]
+)
+
+
+# --------------------------------------------------------------------------- spans
+class Span:
+    """An open `span()`; set `items` before it closes to count what the stage handled."""
+
+    __slots__ = ("stage", "items", "_t0", "_children")
+
+    def __init__(self, stage: str, items: int):
+        self.stage = stage
+        self.items = items
+        self._t0 = time.perf_counter()
+        self._children = 0.0
+
+
+_local = threading.local()
+
+
+@contextmanager
+def span(stage: str, items: int = 0) -> Iterator[Span]:
+    """Time a pipeline stage. Time spent in nested spans is subtracted (exclusive time).
+
+    Never keep a span open across a `yield` in a generator: spans nest per thread.
+    """
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    s = Span(stage, items)
+    stack.append(s)
+    try:
+        yield s
+    finally:
+        stack.pop()
+        elapsed = time.perf_counter() - s._t0
+        if stack:
+            stack[-1]._children += elapsed
+        STAGE_SECONDS.observe(max(0.0, elapsed - s._children), stage=stage)
+        if s.items:
+            STAGE_ITEMS.inc(s.items, stage=stage)
+
+
+def timed_iter(stage: str, iterable: Iterable[T], count: Optional[Callable[[T], int]] = None) -> Iterator[T]:
+    """Yield from `iterable`, timing each `next()` as one `stage` span."""
+    it = iter(iterable)
+    while True:
+        with span(stage) as s:
+            try:
+                value = next(it)
+            except StopIteration:
+                return
+            if count is not None:
+                s.items = count(value)
+        yield value
+
+
+# ------------------------------------------------------------------------ db queries
+_SKIP_MODULES = ("backend.app.core.db", __name__, "contextlib")
+
+
+def _caller() -> str:
+    """`module.function` of the nearest frame outside the db / psycopg2 plumbing."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        mod = frame.f_globals.get("__name__", "")
+        if mod not in _SKIP_MODULES and not mod.startswith("psycopg2"):
+            return f"{mod.rsplit('.', 1)[-1]}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+@contextmanager
+def db_query() -> Iterator[None]:
+    """Time one query (used by the core.db cursor classes)."""
+    caller = _caller()
+    t0 = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        DB_QUERY_ERRORS.inc(caller=caller)
+        raise
+    finally:
+        DB_QUERY_SECONDS.observe(time.perf_counter() - t0, caller=caller)
+
+
+# -------------------------------------------------------------------------- output
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values)) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in pairs) + "}"
+
+
+def _num(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def render_prometheus(registry: Registry = REGISTRY) -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    lines: List[str] = []
+    for metric in registry.metrics():
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        if isinstance(metric, Counter):
+            for key, value in sorted(metric.values().items()):
+                lines.append(f"{metric.name}{_labels(metric.labelnames, key)} {_num(value)}")
+        elif isinstance(metric, Histogram):
+            for key, (counts, count, total, _) in sorted(metric.series().items()):
+                cumulative = 0
+                for bound, n in zip(list(metric.buckets) + [math.inf], counts):
+                    cumulative += n
+                    le = ("le", _num(bound))
+                    lines.append(f"{metric.name}_bucket{_labels(metric.labelnames, key, le)} {cumulative}")
+                lines.append(f"{metric.name}_sum{_labels(metric.labelnames, key)} {_num(total)}")
+                lines.append(f"{metric.name}_count{_labels(metric.labelnames, key)} {count}")
+    for name, help, type_, samples in registry.collect():
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {type_}")
+        for labels, value in samples:
+            lines.append(f"{name}{_labels(list(labels), list(labels.values()))} {_num(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def _series_name(labelnames: Sequence[str], key: LabelValues) -> str:
+    return ",".join(key) if len(labelnames) > 1 else (key[0] if key else "")
+
+
+def summary(registry: Registry = REGISTRY) -> Dict[str, Any]:
+    """{metric name: {label values: stats}} with ms timings; empty metrics are left out."""
+    out: Dict[str, Any] = {}
+    for metric in registry.metrics():
+        if isinstance(metric, Histogram):
+            stats = {}
+            for key, (counts, count, total, max_) in sorted(metric.series().items()):
+                stats[_series_name(metric.labelnames, key)] = {
+                    "count": count,
+                    "total_s": round(total, 4),
+                    "mean_ms": round(1000 * total / count, 3) if count else 0.0,
+                    "p50_ms": round(1000 * metric.quantile(0.50, counts, count, max_), 3),
+                    "p95_ms": round(1000 * metric.quantile(0.95, counts, count, max_), 3),
+                    "max_ms": round(1000 * max_, 3),
+                }
+        elif isinstance(metric, Counter):
+            stats = {_series_name(metric.labelnames, k): v for k, v in sorted(metric.values().items())}
+        else:  # pragma: no cover
+            continue
+        if stats:
+            out[metric.name] = stats
+    for name, _, _, samples in registry.collect():
+        out[name] = {",".join(labels.values()): value for labels, value in samples}
+    return out
+
+
+def reset() -> None:
+    """Zero every metric (e.g. between benchmark iterations)."""
+    REGISTRY.reset()
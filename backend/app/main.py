@@ -4,9 +4,12 @@ from app.api.runs import router as runs_router
 from app.api.recommendations import router as recommendations_router
 from app.api.config import router as config_router
 from app.api.push import router as push_router
+from app.api.webhooks import router as webhooks_router
+from app.api.metrics import router as metrics_router, record_request_time
 from app.services.competitor_service import init_db
 
 app = FastAPI(title="Hotel Pricing Agent API")
+app.middleware("http")(record_request_time)
 
 init_db()
 
@@ -15,6 +18,8 @@ app.include_router(runs_router)
 app.include_router(recommendations_router)
 app.include_router(config_router)
 app.include_router(push_router)
+app.include_router(webhooks_router)
+app.include_router(metrics_router)
 
 
 @app.get("/health")
@@ -0,0 +1,101 @@
+"""Local on-disk cache of downloaded Apify datasets.
+
+A finished run's dataset never changes, so its Apify dataset id is a stable content key:
+each dataset is written once, as it streams in during sync, to
+`<RATESHOP_DATASET_CACHE_DIR>/<dataset id>.jsonl.gz` (one cleaned item per line). The file
+is written under a temporary name and only renamed into place once the whole dataset has
+been read, so a cached file is always complete.
+
+Re-syncing a run, or re-normalising history after `normalise_item` changes
+(`sync_apify.py renormalise`), then reads the file instead of paying Apify again.
+Set RATESHOP_DATASET_CACHE_DIR to an empty string to turn the cache off.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from backend.app.clients.apify_client import DATASET_PAGE_SIZE
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+_cache_dir_env = os.getenv("RATESHOP_DATASET_CACHE_DIR", ".cache/apify-datasets").strip()
+DATASET_CACHE_DIR: Optional[Path] = (REPO_ROOT / _cache_dir_env) if _cache_dir_env else None
+
+_SUFFIX = ".jsonl.gz"
+_ID_RE = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+def cache_path(dataset_id: Optional[str]) -> Optional[Path]:
+    """Where `dataset_id` is (or would be) cached; None when caching is off."""
+    if DATASET_CACHE_DIR is None or not dataset_id or not _ID_RE.match(dataset_id):
+        return None
+    return DATASET_CACHE_DIR / f"{dataset_id}{_SUFFIX}"
+
+
+def has_dataset(dataset_id: Optional[str]) -> bool:
+    path = cache_path(dataset_id)
+    return path is not None and path.exists()
+
+
+def cached_dataset_ids() -> List[str]:
+    if DATASET_CACHE_DIR is None or not DATASET_CACHE_DIR.is_dir():
+        return []
+    return sorted(p.name[: -len(_SUFFIX)] for p in DATASET_CACHE_DIR.glob(f"*{_SUFFIX}"))
+
+
+def iter_cached_pages(
+    dataset_id: str, page_size: int = DATASET_PAGE_SIZE
+) -> Iterator[List[Dict[str, Any]]]:
+    """Yield a cached dataset's items in pages, like ApifyClient.iter_dataset_pages."""
+    path = cache_path(dataset_id)
+    if path is None or not path.exists():
+        raise FileNotFoundError(f"Dataset {dataset_id} is not cached")
+    page: List[Dict[str, Any]] = []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                page.append(json.loads(line))
+                if len(page) >= page_size:
+                    yield page
+                    page = []
+    if page:
+        yield page
+
+
+def cached_pages(
+    dataset_id: Optional[str], fetch: Callable[[], Iterable[List[Dict[str, Any]]]]
+) -> Iterator[List[Dict[str, Any]]]:
+    """Pages of `dataset_id`: from the cache if present, else from `fetch()` (recording them).
+
+    If the fetch fails or the consumer stops early, nothing is cached.
+    """
+    path = cache_path(dataset_id)
+    if path is None:
+        yield from fetch()
+        return
+    if path.exists():
+        yield from iter_cached_pages(dataset_id)
+        return
+
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        out = gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6)
+    except OSError:  # read-only / full disk: sync still works, just uncached
+        yield from fetch()
+        return
+    complete = False
+    try:
+        with out:
+            for page in fetch():
+                out.writelines(json.dumps(item, ensure_ascii=False) + "\n" for item in page)
+                yield page
+        complete = True
+        os.replace(tmp, path)
+    finally:
+        if not complete:
+            tmp.unlink(missing_ok=True)
@@ -0,0 +1,168 @@
+"""Content-addressed storage for raw Apify items.
+
+Observations keep only `raw_payload_hash`, the SHA-256 of the item's canonical JSON
+(sorted keys, no whitespace). The item itself is stored once in `raw_payloads`, compressed
+with zstd when the optional `zstandard` package is installed and zlib otherwise (left as-is
+when that would not shrink it), so the same hotel / room array scraped day after day costs
+one row rather than one copy per observation. `last_seen_on` is bumped (at most once a
+day) whenever a payload is seen again; retention deletes payloads nobody has referenced
+since its cutoff.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import zlib
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from psycopg2.extras import execute_values
+
+from backend.app.core.db import cursor
+
+try:
+    import zstandard  # optional: smaller and faster than zlib
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+_ZSTD_LEVEL = 6
+_ZLIB_LEVEL = 6
+
+
+def canonical_json(item: Any) -> bytes:
+    """Byte-stable JSON for `item`: equal content always gives equal bytes (and hash)."""
+    return json.dumps(
+        item, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+    ).encode("utf-8")
+
+
+def payload_hash(item: Any) -> bytes:
+    return hashlib.sha256(canonical_json(item)).digest()
+
+
+def _compress(data: bytes) -> Tuple[str, bytes]:
+    if zstandard is not None:
+        encoding, body = "zstd", zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compress(data)
+    else:
+        encoding, body = "zlib", zlib.compress(data, _ZLIB_LEVEL)
+    # Tiny items can come out larger than they went in.
+    return (encoding, body) if len(body) < len(data) else ("none", data)
+
+
+def decompress(encoding: str, body: bytes) -> bytes:
+    """Raw JSON bytes of a stored payload body, given its `encoding` column."""
+    if encoding == "none":
+        return body
+    if encoding == "zlib":
+        return zlib.decompress(body)
+    if encoding == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Payload is zstd-compressed; pip install zstandard to read it")
+        return zstandard.ZstdDecompressor().decompress(body)
+    raise ValueError(f"Unknown payload encoding: {encoding}")
+
+
+def store_payloads(cur, items: Iterable[Any]) -> List[bytes]:
+    """Store each item (if new) on the caller's cursor; returns their hashes, in order.
+
+    Runs in the caller's transaction so observations and their payloads commit together.
+    Only payloads not already stored are compressed and sent.
+    """
+    hashes: List[bytes] = []
+    blobs: List[Tuple[bytes, bytes]] = []
+    for item in items:
+        data = canonical_json(item)
+        h = hashlib.sha256(data).digest()
+        hashes.append(h)
+        blobs.append((h, data))
+    store_payload_blobs(cur, blobs)
+    return hashes
+
+
+def store_payload_blobs(cur, blobs: Iterable[Tuple[bytes, bytes]]) -> None:
+    """`store_payloads` for items already serialised: (hash, canonical JSON) pairs."""
+    by_hash: Dict[bytes, bytes] = dict(blobs)
+    if not by_hash:
+        return
+
+    today = date.today()
+    cur.execute(
+        """
+        UPDATE rateshop.raw_payloads SET last_seen_on = %s
+        WHERE hash = ANY(%s) AND last_seen_on < %s
+        """,
+        (today, list(by_hash), today),
+    )
+    cur.execute("SELECT hash FROM rateshop.raw_payloads WHERE hash = ANY(%s)", (list(by_hash),))
+    known = {bytes(r[0]) for r in cur.fetchall()}
+    rows = []
+    for h, data in by_hash.items():
+        if h not in known:
+            encoding, body = _compress(data)
+            rows.append((h, encoding, body, len(data)))
+    if rows:
+        execute_values(
+            cur,
+            """
+            INSERT INTO rateshop.raw_payloads (hash, encoding, body, raw_bytes)
+            VALUES %s ON CONFLICT (hash) DO NOTHING
+            """,
+            rows,
+        )
+
+
+def load_payloads(hashes: Iterable[bytes]) -> Dict[bytes, Any]:
+    """{hash: item} for the given hashes; hashes whose payload was purged are missing."""
+    wanted = list({bytes(h) for h in hashes if h})
+    if not wanted:
+        return {}
+    with cursor() as cur:
+        cur.execute(
+            "SELECT hash, encoding, body FROM rateshop.raw_payloads WHERE hash = ANY(%s)",
+            (wanted,),
+        )
+        return {
+            bytes(h): json.loads(decompress(enc, bytes(body)))
+            for h, enc, body in cur.fetchall()
+        }
+
+
+def load_payload(payload_hash_: bytes) -> Optional[Any]:
+    return load_payloads([payload_hash_]).get(bytes(payload_hash_))
+
+
+def migrate_inline_payloads(batch_size: int = 1000) -> int:
+    """Move legacy inline `raw_payload` values into raw_payloads. Returns rows moved.
+
+    Walks observations by id, one committed batch at a time, so it can be interrupted and
+    rerun.
+    """
+    moved = 0
+    last_id = 0
+    while True:
+        with cursor(commit=True) as cur:
+            cur.execute(
+                """
+                SELECT id, observed_on, raw_payload FROM rateshop.hotel_price_observations
+                WHERE id > %s AND raw_payload IS NOT NULL
+                ORDER BY id LIMIT %s
+                """,
+                (last_id, batch_size),
+            )
+            batch = cur.fetchall()
+            if not batch:
+                return moved
+            hashes = store_payloads(cur, (r[2] for r in batch))
+            execute_values(
+                cur,
+                """
+                UPDATE rateshop.hotel_price_observations o
+                SET raw_payload_hash = v.hash, raw_payload = NULL
+                FROM (VALUES %s) AS v (id, observed_on, hash)
+                WHERE o.id = v.id AND o.observed_on = v.observed_on
+                """,
+                [(r[0], r[1], h) for r, h in zip(batch, hashes)],
+                template="(%s, %s::date, %s::bytea)",
+            )
+        moved += len(batch)
+        last_id = batch[-1][0]
@@ -0,0 +1,208 @@
+"""Adaptive polling of running Apify runs.
+
+Instead of asking Apify about every pending run on a fixed interval, `PollScheduler`
+keeps one priority queue keyed by each run's *predicted* finish time:
+
+* The first poll of a run is scheduled at `started_at + typical duration`, learned from
+  recent `pricing_scrape_runs` (per stay length, falling back to all runs) as seconds per
+  stay and scaled by the stays a multi-stay run covers.
+* A run still going when polled is pushed back with exponential backoff
+  (`min_interval`, x2 per miss, capped at `max_interval`).
+* Every due run is fetched in one concurrent batch; only finished runs are synced. Stay
+  rows sharing one multi-stay Apify run are fetched once and synced together.
+* A global `request_budget` caps the Apify status calls one scheduler run may spend.
+
+Runs that finish early are therefore picked up close to when they end, while long-running
+ones stop being polled every few seconds.
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from backend.app.clients.apify_client import ApifyClient, ApifyError, TERMINAL_FAIL, TERMINAL_OK
+from backend.app.core import metrics
+from backend.app.core.db import cursor
+from backend.app.services.rate_shopping_service import sync_scrape_run
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+# Apify status requests one scheduler run may make before giving up on the rest.
+POLL_REQUEST_BUDGET = _int_env("RATESHOP_POLL_REQUEST_BUDGET", 2000)
+# Runs polled per batch (one concurrent get_runs call).
+POLL_MAX_BATCH = _int_env("RATESHOP_POLL_MAX_BATCH", 64)
+# Assumed run duration when there is no history yet.
+DEFAULT_RUN_SECS = 60.0
+# History window and quantile used to predict the first poll. A low quantile so the first
+# poll lands a little early for most runs; backoff takes care of the slower ones.
+HISTORY_DAYS = 30
+PREDICT_QUANTILE = 0.25
+
+
+def learn_run_durations(days: int = HISTORY_DAYS, quantile: float = PREDICT_QUANTILE) -> Dict[Any, float]:
+    """Typical seconds per stay of succeeded runs, keyed by nights (+ None = all runs).
+
+    A multi-stay run's duration is divided by its batch_size, so batched runs don't inflate
+    the prediction for single-stay ones; see `predict_run_secs`.
+    """
+    with cursor() as cur:
+        cur.execute(
+            """
+            SELECT GROUPING(nights) = 1 AS is_total, nights,
+                   percentile_cont(%s) WITHIN GROUP (
+                       ORDER BY extract(epoch FROM finished_at - started_at)
+                                / GREATEST(COALESCE((search_params->>'batch_size')::int, 1), 1)
+                   ) AS secs
+            FROM rateshop.pricing_scrape_runs
+            WHERE status = 'succeeded' AND finished_at IS NOT NULL
+              AND started_at > now() - (%s || ' days')::interval
+            GROUP BY ROLLUP (nights)
+            HAVING GROUPING(nights) = 1 OR nights IS NOT NULL
+            """,
+            (quantile, days),
+        )
+        return {
+            None if is_total else n: float(secs)
+            for is_total, n, secs in cur.fetchall() if secs is not None
+        }
+
+
+def predict_run_secs(durations: Dict[Any, float], nights: Optional[int], stays: int = 1) -> float:
+    """Predicted seconds for a run of `stays` stays of `nights` nights (see `learn_run_durations`)."""
+    per_stay = durations.get(nights, durations.get(None, DEFAULT_RUN_SECS))
+    return per_stay * max(1, stays)
+
+
+class PollScheduler:
+    """Priority queue of running runs, polled around their predicted finish times."""
+
+    def __init__(
+        self,
+        client: Optional[ApifyClient] = None,
+        durations: Optional[Dict[Any, float]] = None,
+        min_interval: float = 5.0,
+        max_interval: float = 120.0,
+        request_budget: int = POLL_REQUEST_BUDGET,
+        max_batch: int = POLL_MAX_BATCH,
+    ):
+        self.client = client or ApifyClient()
+        self.durations = learn_run_durations() if durations is None else durations
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.request_budget = request_budget
+        self.max_batch = max(1, max_batch)
+        self.requests_made = 0
+        self._heap: List[Tuple[float, int, int]] = []  # (due_at monotonic, seq, db_run_id)
+        self._seq = itertools.count()
+        self._rows: Dict[int, Dict[str, Any]] = {}
+        self._misses: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    # ------------------------------------------------------------------ queueing
+    def predicted_secs(self, row: Dict[str, Any]) -> float:
+        sp = row.get("search_params") or {}
+        nights = row.get("nights")
+        if nights is None:
+            nights = sp.get("nights")
+        return predict_run_secs(self.durations, nights, int(sp.get("batch_size") or 1))
+
+    def add(self, row: Dict[str, Any]) -> None:
+        """Queue a pricing_scrape_runs row (needs id, run_id, started_at, search_params)."""
+        started = row.get("started_at")
+        elapsed = 0.0
+        if isinstance(started, datetime):
+            if started.tzinfo is None:
+                started = started.replace(tzinfo=timezone.utc)
+            elapsed = (datetime.now(timezone.utc) - started).total_seconds()
+        wait = max(0.0, self.predicted_secs(row) - elapsed)
+        self._rows[row["id"]] = row
+        self._misses[row["id"]] = 0
+        self._push(row["id"], time.monotonic() + wait)
+
+    def add_many(self, rows: Iterable[Dict[str, Any]]) -> None:
+        for row in rows:
+            self.add(row)
+
+    def _push(self, db_run_id: int, due_at: float) -> None:
+        heapq.heappush(self._heap, (due_at, next(self._seq), db_run_id))
+
+    def _backoff(self, db_run_id: int) -> float:
+        misses = self._misses[db_run_id]
+        self._misses[db_run_id] = misses + 1
+        return min(self.max_interval, self.min_interval * (2 ** misses))
+
+    def _drop_stale(self) -> None:
+        """Pop heap entries of runs already synced alongside a sibling."""
+        while self._heap and self._heap[0][2] not in self._rows:
+            heapq.heappop(self._heap)
+
+    def _pop_due(self, now: float) -> List[int]:
+        due: List[int] = []
+        limit = min(self.max_batch, self.request_budget - self.requests_made)
+        while self._heap and self._heap[0][0] <= now and len(due) < limit:
+            rid = heapq.heappop(self._heap)[2]
+            if rid in self._rows:  # skip entries already synced alongside a sibling
+                due.append(rid)
+        return due
+
+    # ------------------------------------------------------------------- polling
+    def run(self, timeout_secs: float) -> Dict[int, Dict[str, Any]]:
+        """Poll until every queued run is synced, the deadline passes or the budget is spent.
+
+        Returns {db_run_id: sync result} for runs that finished. Unfinished runs stay queued.
+        """
+        done: Dict[int, Dict[str, Any]] = {}
+        deadline = time.monotonic() + timeout_secs
+        while self._rows and self.requests_made < self.request_budget:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            self._drop_stale()
+            due = self._pop_due(now)
+            if not due:
+                if not self._heap:
+                    break
+                time.sleep(max(0.0, min(self._heap[0][0], deadline) - now))
+                continue
+
+            with metrics.span("poll", items=len(due)):
+                runs = self.client.get_runs(self._rows[rid]["run_id"] for rid in due)
+            self.requests_made += len(runs)
+            for rid in due:
+                row = self._rows.get(rid)
+                if row is None:
+                    continue
+                run = runs.get(row["run_id"])
+                if isinstance(run, ApifyError):
+                    run = None  # sync_scrape_run retries the lookup and records the failure
+                    self.requests_made += 1
+                elif (run.get("status") or "").upper() not in TERMINAL_OK | TERMINAL_FAIL:
+                    self._push(rid, time.monotonic() + self._backoff(rid))
+                    continue
+                try:
+                    out = sync_scrape_run(rid, run=run, run_row=row)
+                except Exception as exc:
+                    out = {"status": "failed", "error": str(exc)}
+                if out["status"] == "running":
+                    self._push(rid, time.monotonic() + self._backoff(rid))
+                    continue
+                # Stay rows sharing a multi-stay run are synced together.
+                for sid, sib in out.pop("siblings", {}).items():
+                    if sid in self._rows:
+                        done[sid] = sib
+                        del self._rows[sid], self._misses[sid]
+                done[rid] = out
+                del self._rows[rid], self._misses[rid]
+        return done
@@ -2,9 +2,8 @@ from datetime import date, timedelta, datetime
 from decimal import Decimal
 from typing import Dict, List
 
-from backend.app.core.config import AppConfig
+from backend.app.core.config import get_config
 from backend.app.clients.lighthouse_client import LighthouseClient
-from backend.app.agent.pricing import recommend_rate
 from backend.app.services.competitor_service import get_conn
 
 
@@ -49,7 +48,7 @@ def get_recommendations(run_id: int) -> List[Dict]:
 
 
 def run_pricing(start_date: str, end_date: str, occupancy: int) -> List[Dict]:
-    cfg = AppConfig()
+    cfg = get_config()
     lh = LighthouseClient()
 
     start = _parse(start_date)
@@ -57,21 +56,20 @@ def run_pricing(start_date: str, end_date: str, occupancy: int) -> List[Dict]:
 
     comp_matrix = lh.get_competitor_rates("", start, end, occupancy=occupancy)
 
-    recs = []
-    d = start
-    while d <= end:
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    lowest = []
+    for d in days:
         comp_prices = list(map(Decimal, comp_matrix.get(d, {}).values()))
-        lowest_comp = float(min(comp_prices)) if comp_prices else 0.0
-        rec = recommend_rate(d, comp_prices, None, cfg.cfg)
-
-        recs.append(
-            {
-                "date": d.isoformat(),
-                "recommended_rate": float(rec),
-                "lowest_competitor": lowest_comp,
-            }
-        )
-
-        d += timedelta(days=1)
-
-    return recs
+        lowest.append(min(comp_prices) if comp_prices else None)
+
+    # Whole horizon in one vectorised call; same cents as recommend_rate day by day.
+    rates = cfg.policy.recommend_horizon(days, lowest)
+
+    return [
+        {
+            "date": d.isoformat(),
+            "recommended_rate": float(rec),
+            "lowest_competitor": float(low) if low is not None else 0.0,
+        }
+        for d, low, rec in zip(days, lowest, rates)
+    ]
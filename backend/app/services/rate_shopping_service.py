@@ -15,15 +15,28 @@ adapt `normalise_item` if the new actor's output shape differs.
 """
 from __future__ import annotations
 
+import hashlib
+import hmac
+import json
 import math
 import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from datetime import date, datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple
+from functools import lru_cache
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from urllib.parse import urlencode, urlparse, urlunparse, parse_qs
 
-from psycopg2.extras import Json, RealDictCursor
+from psycopg2.extras import Json, RealDictCursor, execute_values
 
-from backend.app.core.db import get_conn
+from backend.app.core import metrics
+from backend.app.core.db import cursor
+from backend.app.services import dataset_cache
+from backend.app.services.payload_store import canonical_json, store_payload_blobs
 from backend.app.clients.apify_client import ApifyClient, TERMINAL_OK, TERMINAL_FAIL, ApifyError
 
 
@@ -42,6 +55,33 @@ MAX_COMPETITORS = _int_env("RATESHOP_MAX_COMPETITORS", 15)
 MAX_DATES_PER_MANUAL_RUN = _int_env("RATESHOP_MAX_DATES_PER_MANUAL_RUN", 14)
 DEDUP_WINDOW_HOURS = _int_env("RATESHOP_DEDUP_WINDOW_HOURS", 12)
 DEFAULT_CURRENCY = os.getenv("PRICING_DEFAULT_CURRENCY", os.getenv("CURRENCY", "EUR"))
+UPSERT_BATCH_SIZE = _int_env("RATESHOP_UPSERT_BATCH_SIZE", 1000)
+# In-process cache of the competitor list; 0 disables it.
+HOTELS_CACHE_TTL_SECS = _int_env("RATESHOP_HOTELS_CACHE_TTL_SECS", 60)
+# Stays packed into one actor run (as dated startUrls). 1 = one run per stay.
+STAYS_PER_RUN = _int_env("RATESHOP_STAYS_PER_RUN", 1)
+# Server-side Apify timeout per stay in a run: a multi-stay run gets this many seconds per
+# stay it covers, up to MAX_RUN_TIMEOUT_SECS, so a long batch is not cut off at one stay's cap.
+RUN_TIMEOUT_SECS = _int_env("RATESHOP_RUN_TIMEOUT_SECS", 600)
+MAX_RUN_TIMEOUT_SECS = _int_env("RATESHOP_MAX_RUN_TIMEOUT_SECS", 14400)
+# How far before a check-in date an observation can be; bounds observed_on so the
+# price matrix only reads the monthly partitions that can hold matching rows.
+OBS_LOOKBACK_DAYS = _int_env("RATESHOP_OBS_LOOKBACK_DAYS", 400)
+# Processes normalising dataset pages during sync; 1 = in-process (see iter_normalised_pages).
+NORMALISE_WORKERS = _int_env("RATESHOP_NORMALISE_WORKERS", 1)
+# Threads syncing pending runs side by side (see sync_pending_runs); 1 = one after another.
+SYNC_WORKERS = _int_env("RATESHOP_SYNC_WORKERS", 4)
+# Pending runs one sync_pending_runs pass looks at.
+PENDING_SYNC_LIMIT = _int_env("RATESHOP_PENDING_SYNC_LIMIT", 200)
+
+# Run-finished webhooks: Apify calls WEBHOOK_URL (our FastAPI /webhooks/apify endpoint) with
+# the shared secret in WEBHOOK_SECRET_HEADER. Both env vars must be set to register them.
+WEBHOOK_URL = os.getenv("APIFY_WEBHOOK_URL", "").strip()
+WEBHOOK_SECRET = os.getenv("APIFY_WEBHOOK_SECRET", "").strip()
+WEBHOOK_SECRET_HEADER = "X-Apify-Webhook-Secret"
+WEBHOOK_EVENT_TYPES = [
+    "ACTOR.RUN.SUCCEEDED", "ACTOR.RUN.FAILED", "ACTOR.RUN.ABORTED", "ACTOR.RUN.TIMED_OUT",
+]
 
 # Recommendation thresholds.
 ABOVE_MARKET_PCT = 0.15          # >15% over median = "expensive"
@@ -53,18 +93,50 @@ FALLING_PRICE_PCT = 0.05         # median dropped >5% vs prior scrape = softenin
 # ----------------------------------------------------------------------------
 # Competitor hotels CRUD
 # ----------------------------------------------------------------------------
+# The competitor set barely changes during a scrape, so the full list is cached for
+# HOTELS_CACHE_TTL_SECS and dropped by every write below. `_hotels_generation` stops a
+# read that raced a write from storing the pre-write list.
+_hotels_lock = threading.Lock()
+_hotels_cache: Optional[Tuple[float, List[Dict[str, Any]]]] = None
+_hotels_generation = 0
+_hotels_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def invalidate_competitor_hotels_cache() -> None:
+    global _hotels_cache, _hotels_generation
+    with _hotels_lock:
+        _hotels_cache = None
+        _hotels_generation += 1
+        _hotels_stats["invalidations"] += 1
+
+
+def competitor_hotels_cache_stats() -> Dict[str, int]:
+    with _hotels_lock:
+        return dict(_hotels_stats)
+
+
+def _all_competitor_hotels() -> List[Dict[str, Any]]:
+    global _hotels_cache
+    with _hotels_lock:
+        cached = _hotels_cache
+        if cached and cached[0] > time.monotonic():
+            _hotels_stats["hits"] += 1
+            return cached[1]
+        _hotels_stats["misses"] += 1
+        generation = _hotels_generation
+    with cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("SELECT * FROM rateshop.competitor_hotels ORDER BY is_self DESC, name ASC")
+        rows = [dict(r) for r in cur.fetchall()]
+    if HOTELS_CACHE_TTL_SECS > 0:
+        with _hotels_lock:
+            if generation == _hotels_generation:
+                _hotels_cache = (time.monotonic() + HOTELS_CACHE_TTL_SECS, rows)
+    return rows
+
+
 def list_competitor_hotels(active_only: bool = False) -> List[Dict[str, Any]]:
-    sql = "SELECT * FROM rateshop.competitor_hotels"
-    if active_only:
-        sql += " WHERE active = true"
-    sql += " ORDER BY is_self DESC, name ASC"
-    conn = get_conn()
-    try:
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute(sql)
-        return [dict(r) for r in cur.fetchall()]
-    finally:
-        conn.close()
+    # Copies, so callers can't mutate the cached rows.
+    return [dict(h) for h in _all_competitor_hotels() if h["active"] or not active_only]
 
 
 def add_competitor_hotel(
@@ -76,9 +148,7 @@ def add_competitor_hotel(
     is_self: bool = False,
     notes: Optional[str] = None,
 ) -> int:
-    conn = get_conn()
-    try:
-        cur = conn.cursor()
+    with cursor(commit=True) as cur:
         cur.execute(
             """
             INSERT INTO rateshop.competitor_hotels
@@ -89,10 +159,8 @@ def add_competitor_hotel(
             (name, booking_url, location, source, active, is_self, notes),
         )
         new_id = cur.fetchone()[0]
-        conn.commit()
-        return int(new_id)
-    finally:
-        conn.close()
+    invalidate_competitor_hotels_cache()
+    return int(new_id)
 
 
 def update_competitor_hotel(hotel_id: int, fields: Dict[str, Any]) -> None:
@@ -101,26 +169,18 @@ def update_competitor_hotel(hotel_id: int, fields: Dict[str, Any]) -> None:
     if not fields:
         return
     sets = ", ".join(f"{k} = %s" for k in fields)
-    conn = get_conn()
-    try:
-        cur = conn.cursor()
+    with cursor(commit=True) as cur:
         cur.execute(
             f"UPDATE rateshop.competitor_hotels SET {sets} WHERE id = %s",
             (*fields.values(), hotel_id),
         )
-        conn.commit()
-    finally:
-        conn.close()
+    invalidate_competitor_hotels_cache()
 
 
 def delete_competitor_hotel(hotel_id: int) -> None:
-    conn = get_conn()
-    try:
-        cur = conn.cursor()
+    with cursor(commit=True) as cur:
         cur.execute("DELETE FROM rateshop.competitor_hotels WHERE id = %s", (hotel_id,))
-        conn.commit()
-    finally:
-        conn.close()
+    invalidate_competitor_hotels_cache()
 
 
 def seed_competitor_hotels(rows: List[Dict[str, Any]]) -> int:
@@ -231,6 +291,31 @@ def build_booking_input(
     return actor_input
 
 
+def build_booking_batch_input(
+    hotels: List[Dict[str, Any]],
+    stays: List[Dict[str, Any]],
+    currency: str,
+) -> Dict[str, Any]:
+    """Build actor input for MANY stays (same guests) across hotels that have a booking_url.
+
+    Each (hotel, stay) becomes its own dated startUrl, so one run scrapes the whole batch;
+    sync splits the items back into stays by the checkin/checkout in their URLs. Hotels
+    without a usable URL are ignored here — a name search only takes one set of dates.
+    """
+    first = stays[0]
+    actor_input = build_booking_input(
+        [], first["check_in"], first["check_out"], first["adults"], first["children"], currency
+    )
+    urls = [u for u in (_normalize_url(h.get("booking_url")) for h in hotels) if u]
+    actor_input["startUrls"] = [
+        {"url": _booking_url_with_dates(u, sp["check_in"], sp["check_out"], sp["adults"], sp["children"], currency)}
+        for sp in stays
+        for u in urls
+    ]
+    actor_input["maxItems"] = max(len(actor_input["startUrls"]) * 3, 10)
+    return actor_input
+
+
 # ----------------------------------------------------------------------------
 # Normalisation adapter  >>> ADAPT THESE MAPPINGS to your actor's output <<<
 # ----------------------------------------------------------------------------
@@ -246,12 +331,30 @@ def _first(item: Dict[str, Any], keys: List[str]) -> Any:
     return None
 
 
+def _item_stay_dates(item: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """(checkin, checkout) ISO dates an item was scraped for, for splitting a multi-stay run.
+
+    Read from the checkin/checkout query params of the item's URL (the dated startUrl we
+    sent), falling back to the actor's own checkIn/checkOut fields.
+    """
+    for k in ("url", "link", "hotelUrl", "startUrl", "inputUrl"):
+        raw = item.get(k)
+        if not isinstance(raw, str) or "checkin" not in raw:
+            continue
+        q = parse_qs(urlparse(raw).query)
+        if q.get("checkin") and q.get("checkout"):
+            return q["checkin"][0][:10], q["checkout"][0][:10]
+    ci, co = item.get("checkIn"), item.get("checkOut")
+    if isinstance(ci, str) and isinstance(co, str):
+        return ci[:10], co[:10]
+    return None
+
+
 _CURRENCY_SYMBOLS = {"€": "EUR", "£": "GBP", "$": "USD", "CHF": "CHF"}
 
 
-def _normalize_currency(raw: Any, default: str) -> str:
-    """Map a currency symbol/code to an ISO code, falling back to the default."""
-    s = str(raw or "").strip()
+@lru_cache(maxsize=256)
+def _currency_code(s: str, default: str) -> str:
     if not s:
         return default
     if s in _CURRENCY_SYMBOLS:
@@ -259,14 +362,33 @@ def _normalize_currency(raw: Any, default: str) -> str:
     return s[:8] if s.isalpha() else default
 
 
+def _normalize_currency(raw: Any, default: str) -> str:
+    """Map a currency symbol/code to an ISO code, falling back to the default."""
+    return _currency_code(str(raw or "").strip(), default)
+
+
+# Everything but ASCII digits and separators; prices are overwhelmingly ASCII apart from
+# the currency symbol. Strings with any non-ASCII letter/digit (e.g. Arabic-Indic digits)
+# take the slower per-character path, which keeps every Unicode digit as before.
+_NON_PRICE_CHARS = re.compile(r"[^0-9.,]+")
+_NON_ASCII_WORD = re.compile(r"[^\W\x00-\x7f]")
+
+
 def _to_float_price(raw: Any) -> Optional[float]:
     """Parse a price that may be a number, '€1.234,50', '1,234.50', or 'EUR 120'."""
     if raw is None:
         return None
     if isinstance(raw, (int, float)):
         return float(raw) if raw > 0 else None
-    s = str(raw)
-    digits = "".join(c for c in s if c.isdigit() or c in ".,")
+    return _parse_price_text(str(raw))
+
+
+@lru_cache(maxsize=4096)  # the same few hundred price strings recur across rooms and dates
+def _parse_price_text(s: str) -> Optional[float]:
+    if _NON_ASCII_WORD.search(s):
+        digits = "".join(c for c in s if c.isdigit() or c in ".,")
+    else:
+        digits = _NON_PRICE_CHARS.sub("", s)
     if not digits:
         return None
     # Heuristic: if both separators present, the last one is the decimal separator.
@@ -277,7 +399,7 @@ def _to_float_price(raw: Any) -> Optional[float]:
             digits = digits.replace(",", "")
     elif "," in digits:
         # treat comma as decimal if it looks like cents (",dd" at the end)
-        digits = digits.replace(",", ".") if len(digits.split(",")[-1]) == 2 else digits.replace(",", "")
+        digits = digits.replace(",", ".") if len(digits) - digits.rfind(",") == 3 else digits.replace(",", "")
     try:
         val = float(digits)
         return val if val > 0 else None
@@ -285,13 +407,39 @@ def _to_float_price(raw: Any) -> Optional[float]:
         return None
 
 
+@dataclass(slots=True)
+class Observation:
+    """One normalised dataset item, ready to upsert into hotel_price_observations.
+
+    The raw item is kept only as its canonical JSON (`payload`) and SHA-256
+    (`payload_hash`) for the raw_payloads store, not as the parsed dict.
+    """
+
+    hotel_name: str
+    source: str
+    check_in: date
+    check_out: date
+    nights: int
+    guests_adults: int
+    guests_children: int
+    room_type: Optional[str]
+    price_amount: Optional[float]
+    currency: str
+    available: bool
+    cancellation_policy: Any
+    breakfast_included: Optional[bool]
+    source_url: Optional[str]
+    payload: bytes
+    payload_hash: bytes
+
+
 def normalise_item(
     item: Dict[str, Any],
     *,
     search_params: Dict[str, Any],
     default_currency: str,
-) -> Optional[Dict[str, Any]]:
-    """Convert one raw dataset item into an observation dict (or None to skip)."""
+) -> Optional[Observation]:
+    """Convert one raw dataset item into an Observation (or None to skip)."""
     name = _first(item, ["name", "hotelName", "title"])
     if not name:
         return None
@@ -327,25 +475,130 @@ def normalise_item(
     if isinstance(breakfast, str):
         breakfast = "breakfast" in breakfast.lower()
 
+    payload = canonical_json(item)
+    return Observation(
+        hotel_name=str(name).strip(),
+        source=str(search_params.get("source", "booking")),
+        check_in=check_in,
+        check_out=check_out,
+        nights=nights,
+        guests_adults=search_params["adults"],
+        guests_children=search_params["children"],
+        room_type=room_type,
+        price_amount=price,
+        currency=currency,
+        available=available,
+        cancellation_policy=_first(item, ["cancellationPolicy", "freeCancellation"]),
+        breakfast_included=breakfast if isinstance(breakfast, bool) else None,
+        source_url=_first(item, ["url", "link", "hotelUrl"]),
+        payload=payload,
+        payload_hash=hashlib.sha256(payload).digest(),
+    )
+
+
+def normalise_items(
+    items: Iterable[Dict[str, Any]],
+    search_params: Dict[str, Any],
+    default_currency: str = DEFAULT_CURRENCY,
+) -> Iterator[Observation]:
+    """Stream Observations for `items`; malformed items are skipped."""
+    for item in items:
+        try:
+            obs = normalise_item(item, search_params=search_params, default_currency=default_currency)
+        except Exception:  # malformed item -> skip, keep going
+            obs = None
+        if obs is not None:
+            yield obs
+
+
+StayDates = Tuple[str, str]  # (check_in, check_out) ISO dates
+
+
+def normalise_page(
+    page: List[Dict[str, Any]],
+    stays: Dict[StayDates, Dict[str, Any]],
+    single: Optional[StayDates] = None,
+    default_currency: str = DEFAULT_CURRENCY,
+) -> Dict[StayDates, Tuple[int, List[Observation]]]:
+    """Route a dataset page's items to their stays and normalise them.
+
+    `stays` maps stay dates to search params. A single-stay run passes `single`, and every
+    item goes to that stay; otherwise items are routed by their own dates and items for
+    other stays are dropped. Returns {stay dates: (items seen, observations)}.
+    """
+    routed: Dict[StayDates, List[Dict[str, Any]]] = {}
+    for item in page:
+        key = single or _item_stay_dates(item)
+        if key in stays:
+            routed.setdefault(key, []).append(item)
     return {
-        "hotel_name": str(name).strip(),
-        "source": str(search_params.get("source", "booking")),
-        "check_in": check_in,
-        "check_out": check_out,
-        "nights": nights,
-        "guests_adults": search_params["adults"],
-        "guests_children": search_params["children"],
-        "room_type": room_type,
-        "price_amount": price,
-        "currency": currency,
-        "available": available,
-        "cancellation_policy": _first(item, ["cancellationPolicy", "freeCancellation"]),
-        "breakfast_included": breakfast if isinstance(breakfast, bool) else None,
-        "source_url": _first(item, ["url", "link", "hotelUrl"]),
-        "raw_payload": item,
+        key: (len(items), list(normalise_items(items, stays[key], default_currency)))
+        for key, items in routed.items()
     }
 
 
+def ordered_map(pool: Optional[Executor], fn: Callable, tasks: Iterable, window: int) -> Iterator:
+    """(task, fn(task)) in task order, with at most `window` tasks in flight on `pool`."""
+    if pool is None:
+        for task in tasks:
+            yield task, fn(task)
+        return
+    pending: Deque = deque()
+    for task in tasks:
+        pending.append((task, pool.submit(fn, task)))
+        if len(pending) >= window:
+            task, fut = pending.popleft()
+            yield task, fut.result()
+    while pending:
+        task, fut = pending.popleft()
+        yield task, fut.result()
+
+
+def _normalise_page_task(task) -> Dict[StayDates, Tuple[int, List[Observation]]]:
+    return normalise_page(*task)
+
+
+def iter_normalised_pages(
+    pages: Iterable[List[Dict[str, Any]]],
+    stays: Dict[StayDates, Dict[str, Any]],
+    single: Optional[StayDates] = None,
+    default_currency: str = DEFAULT_CURRENCY,
+    workers: Optional[int] = None,
+) -> Iterator[Dict[StayDates, Tuple[int, List[Observation]]]]:
+    """`normalise_page` over a stream of pages, in order.
+
+    With `workers` > 1 (default RATESHOP_NORMALISE_WORKERS) pages after the first are
+    normalised in a process pool, a few pages ahead of the consumer; small datasets that
+    fit in one page never start it.
+    """
+    workers = NORMALISE_WORKERS if workers is None else workers
+    pages = iter(pages)
+    first = next(pages, None)
+    if first is None:
+        return
+    with metrics.span("normalise", items=len(first)):
+        routed = normalise_page(first, stays, single, default_currency)
+    yield routed
+    if workers <= 1:
+        for page in pages:
+            with metrics.span("normalise", items=len(page)):
+                routed = normalise_page(page, stays, single, default_currency)
+            yield routed
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        tasks = ((page, stays, single, default_currency) for page in pages)
+        results = ordered_map(pool, _normalise_page_task, tasks, workers * 2)
+        while True:
+            # Waiting on the pool; page fetches made meanwhile are their own spans.
+            with metrics.span("normalise") as sp:
+                nxt = next(results, None)
+                if nxt is not None:
+                    sp.items = sum(seen for seen, _ in nxt[1].values())
+            if nxt is None:
+                return
+            yield nxt[1]
+
+
 # ----------------------------------------------------------------------------
 # Matching observations back to known competitor hotels
 # ----------------------------------------------------------------------------
@@ -353,74 +606,180 @@ def _norm(s: Optional[str]) -> str:
     return "".join(ch for ch in (s or "").lower() if ch.isalnum())
 
 
-def _match_hotel(obs: Dict[str, Any], hotels: List[Dict[str, Any]]) -> Tuple[Optional[int], bool]:
-    """Return (competitor_hotel_id, is_self) for an observation, matching by url then name."""
-    obs_url = _norm(urlparse(obs.get("source_url") or "").path)
-    obs_name = _norm(obs.get("hotel_name"))
-    for h in hotels:
-        h_url = _norm(urlparse(h.get("booking_url") or "").path)
-        if obs_url and h_url and obs_url == h_url:
-            return h["id"], h["is_self"]
-    for h in hotels:
-        h_name = _norm(h["name"])
-        if obs_name and h_name and (obs_name in h_name or h_name in obs_name):
-            return h["id"], h["is_self"]
-    return None, False
+class HotelMatcher:
+    """Matches observations to competitor hotels: by Booking URL path, then by name.
+
+    Built once per sync. Same answers as the original scan (first hotel in list order
+    whose URL path equals the observation's, else first whose normalised name contains or
+    is contained in the observation's), but indexed so matching cost doesn't grow with the
+    competitor list:
+
+    * URL paths -> one dict lookup.
+    * "hotel name in observation name" -> one Aho-Corasick pass over the observation name.
+    * "observation name in hotel name" -> trigram postings narrow the hotels to verify.
+    * Results are memoised per (url path, name), since a dataset repeats hotels a lot.
+    """
+
+    def __init__(self, hotels: List[Dict[str, Any]]):
+        self._hotels = [(h["id"], h["is_self"]) for h in hotels]
+        self._by_url: Dict[str, int] = {}
+        self._names: List[str] = []
+        for i, h in enumerate(hotels):
+            h_url = _norm(urlparse(h.get("booking_url") or "").path)
+            if h_url:
+                self._by_url.setdefault(h_url, i)
+            self._names.append(_norm(h["name"]))
+        self._build_automaton()
+        self._trigrams: Dict[str, set] = {}
+        for i, name in enumerate(self._names):
+            for k in range(len(name) - 2):
+                self._trigrams.setdefault(name[k:k + 3], set()).add(i)
+        self._memo: Dict[Tuple[str, str], Tuple[Optional[int], bool]] = {}
+
+    def _build_automaton(self) -> None:
+        # Aho-Corasick over the hotel names: goto table, failure links and, per state, the
+        # lowest hotel index whose name ends there (directly or via failure links).
+        goto: List[Dict[str, int]] = [{}]
+        best: List[Optional[int]] = [None]
+        for i, name in enumerate(self._names):
+            if not name:
+                continue
+            state = 0
+            for ch in name:
+                if ch not in goto[state]:
+                    goto.append({})
+                    best.append(None)
+                    goto[state][ch] = len(goto) - 1
+                state = goto[state][ch]
+            if best[state] is None or i < best[state]:
+                best[state] = i
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:  # BFS; queue grows while iterating
+            for ch, nxt in goto[state].items():
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f][ch] if ch in goto[f] and goto[f][ch] != nxt else 0
+                inherited = best[fail[nxt]]
+                if inherited is not None and (best[nxt] is None or inherited < best[nxt]):
+                    best[nxt] = inherited
+                queue.append(nxt)
+        self._goto, self._fail, self._best = goto, fail, best
+
+    def _contained_in(self, obs_name: str) -> Optional[int]:
+        """Lowest index of a hotel whose name occurs inside obs_name."""
+        goto, fail, best = self._goto, self._fail, self._best
+        found: Optional[int] = None
+        state = 0
+        for ch in obs_name:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            hit = best[state]
+            if hit is not None and (found is None or hit < found):
+                found = hit
+        return found
+
+    def _containing(self, obs_name: str) -> Optional[int]:
+        """Lowest index of a hotel whose name contains obs_name."""
+        if len(obs_name) < 3:
+            candidates = range(len(self._names))
+        else:
+            postings = [self._trigrams.get(obs_name[k:k + 3]) for k in range(len(obs_name) - 2)]
+            if not all(postings):
+                return None
+            candidates = sorted(set.intersection(*postings))
+        for i in candidates:
+            if obs_name in self._names[i]:
+                return i
+        return None
+
+    def match(self, obs: Observation) -> Tuple[Optional[int], bool]:
+        """Return (competitor_hotel_id, is_self) for an observation, matching by url then name."""
+        obs_url = _norm(urlparse(obs.source_url or "").path)
+        obs_name = _norm(obs.hotel_name)
+        key = (obs_url, obs_name)
+        if key in self._memo:
+            return self._memo[key]
+        i = self._by_url.get(obs_url) if obs_url else None
+        if i is None and obs_name:
+            hits = [j for j in (self._contained_in(obs_name), self._containing(obs_name)) if j is not None]
+            i = min(hits) if hits else None
+        result = self._hotels[i] if i is not None else (None, False)
+        self._memo[key] = result
+        return result
 
 
 # ----------------------------------------------------------------------------
 # Scrape runs
 # ----------------------------------------------------------------------------
-def _recent_successful_run_exists(search_params: Dict[str, Any]) -> bool:
-    """Duplicate-run guard: skip if an equivalent run succeeded within the dedup window."""
-    conn = get_conn()
-    try:
-        cur = conn.cursor()
+StayKey = Tuple[date, int, int, int]  # (check_in, nights, adults, children)
+
+
+def _stay_key(search_params: Dict[str, Any]) -> StayKey:
+    check_in = search_params["check_in"]
+    if not isinstance(check_in, date):
+        check_in = date.fromisoformat(str(check_in))
+    return (
+        check_in,
+        int(search_params["nights"]),
+        int(search_params["adults"]),
+        int(search_params.get("children") or 0),
+    )
+
+
+def _recent_successful_stays(stays: List[Dict[str, Any]]) -> Set[StayKey]:
+    """Duplicate-run guard for a whole plan: the stays (as `_stay_key` tuples) that already
+    have a succeeded run within the dedup window. One indexed query for any number of stays.
+    """
+    keys = list(dict.fromkeys(_stay_key(s) for s in stays))
+    if not keys:
+        return set()
+    check_ins, nights, adults, children = (list(col) for col in zip(*keys))
+    with cursor() as cur:
         cur.execute(
             """
-            SELECT 1 FROM rateshop.pricing_scrape_runs
-            WHERE status = 'succeeded'
-              AND search_params->>'check_in' = %s
-              AND (search_params->>'nights')::int = %s
-              AND (search_params->>'adults')::int = %s
-              AND (search_params->>'children')::int = %s
-              AND started_at > now() - (%s || ' hours')::interval
-            LIMIT 1
+            SELECT s.check_in, s.nights, s.adults, s.children
+            FROM unnest(%s::date[], %s::int[], %s::int[], %s::int[])
+                 AS s(check_in, nights, adults, children)
+            WHERE EXISTS (
+                SELECT 1 FROM rateshop.pricing_scrape_runs r
+                WHERE r.status = 'succeeded'
+                  AND r.check_in = s.check_in
+                  AND r.nights = s.nights
+                  AND r.adults = s.adults
+                  AND r.children = s.children
+                  AND r.started_at > now() - (%s || ' hours')::interval
+            )
             """,
-            (
-                search_params["check_in"].isoformat() if isinstance(search_params["check_in"], date)
-                else search_params["check_in"],
-                search_params["nights"],
-                search_params["adults"],
-                search_params["children"],
-                DEDUP_WINDOW_HOURS,
-            ),
+            (check_ins, nights, adults, children, DEDUP_WINDOW_HOURS),
         )
-        return cur.fetchone() is not None
-    finally:
-        conn.close()
+        return {(ci, n, a, c) for ci, n, a, c in cur.fetchall()}
+
+
+def _recent_successful_run_exists(search_params: Dict[str, Any]) -> bool:
+    """Duplicate-run guard: skip if an equivalent run succeeded within the dedup window."""
+    return bool(_recent_successful_stays([search_params]))
 
 
 def _insert_run(actor_id: str, run_id: Optional[str], status: str, search_params: Dict[str, Any]) -> int:
+    check_in, nights, adults, children = _stay_key(search_params)
     sp = dict(search_params)
     for k in ("check_in", "check_out"):
         if isinstance(sp.get(k), date):
             sp[k] = sp[k].isoformat()
-    conn = get_conn()
-    try:
-        cur = conn.cursor()
+    with cursor(commit=True) as cur:
         cur.execute(
             """
-            INSERT INTO rateshop.pricing_scrape_runs (provider, actor_id, run_id, status, search_params)
-            VALUES ('apify', %s, %s, %s, %s) RETURNING id
+            INSERT INTO rateshop.pricing_scrape_runs
+                (provider, actor_id, run_id, status, search_params, check_in, nights, adults, children)
+            VALUES ('apify', %s, %s, %s, %s, %s, %s, %s, %s) RETURNING id
             """,
-            (actor_id, run_id, status, Json(sp)),
+            (actor_id, run_id, status, Json(sp), check_in, nights, adults, children),
         )
         new_id = cur.fetchone()[0]
-        conn.commit()
-        return int(new_id)
-    finally:
-        conn.close()
+    return int(new_id)
 
 
 def _finish_run(
@@ -429,39 +788,65 @@ def _finish_run(
     item_count: Optional[int] = None,
     cost_usd: Optional[float] = None,
     error_message: Optional[str] = None,
+    finished_at: Optional[str] = None,
+    dataset_id: Optional[str] = None,
 ) -> None:
-    conn = get_conn()
-    try:
-        cur = conn.cursor()
+    """Record a run's outcome. `finished_at` is Apify's own finish time when known (so run
+    durations stay accurate however late we sync); otherwise now()."""
+    with cursor(commit=True) as cur:
         cur.execute(
             """
             UPDATE rateshop.pricing_scrape_runs
             SET status = %s, item_count = %s, cost_usd = %s,
-                error_message = %s, finished_at = now()
+                error_message = %s, finished_at = COALESCE(%s::timestamptz, now()),
+                dataset_id = COALESCE(%s, dataset_id)
             WHERE id = %s
             """,
-            (status, item_count, cost_usd, error_message, db_run_id),
+            (status, item_count, cost_usd, error_message, finished_at, dataset_id, db_run_id),
         )
-        conn.commit()
-    finally:
-        conn.close()
 
 
-def start_scrape_run(
-    check_in: date,
-    nights: int = 1,
-    adults: int = 2,
-    children: int = 0,
-    hotel_ids: Optional[List[int]] = None,
-    currency: Optional[str] = None,
-) -> Dict[str, Any]:
-    """Start ONE Apify run covering all selected hotels for a single stay.
+def _attach_run(db_run_ids: List[int], run_id: Optional[str]) -> None:
+    """Store the Apify run id on rows inserted as pending before their run was started."""
+    with cursor(commit=True) as cur:
+        cur.execute(
+            "UPDATE rateshop.pricing_scrape_runs SET run_id = %s, status = 'running' WHERE id = ANY(%s)",
+            (run_id, db_run_ids),
+        )
+
+
+def _note_run_error(db_run_ids: List[int], error_message: str) -> None:
+    """Record a transient sync error on runs that stay open for the next sync."""
+    with cursor(commit=True) as cur:
+        cur.execute(
+            """
+            UPDATE rateshop.pricing_scrape_runs SET error_message = %s
+            WHERE id = ANY(%s) AND status IN ('running', 'pending')
+            """,
+            (error_message, db_run_ids),
+        )
 
-    Returns {db_run_id, apify_run_id, status, skipped}.
-    """
-    currency = currency or DEFAULT_CURRENCY
-    check_out = check_in + timedelta(days=nights)
 
+def _run_webhooks() -> Optional[List[Dict[str, Any]]]:
+    """Ad-hoc webhook definition attached to every run we start, if configured."""
+    if not (WEBHOOK_URL and WEBHOOK_SECRET):
+        return None
+    return [{
+        "eventTypes": WEBHOOK_EVENT_TYPES,
+        "requestUrl": WEBHOOK_URL,
+        "headersTemplate": json.dumps({WEBHOOK_SECRET_HEADER: WEBHOOK_SECRET}),
+    }]
+
+
+def webhook_secret_matches(provided: Optional[str]) -> bool:
+    """Constant-time check of a webhook's secret header. Always False if none is configured."""
+    if not WEBHOOK_SECRET or not provided:
+        return False
+    return hmac.compare_digest(provided.encode("utf-8"), WEBHOOK_SECRET.encode("utf-8"))
+
+
+def _select_hotels(hotel_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """Active hotels to scrape (optionally a subset), capped at MAX_COMPETITORS."""
     hotels = list_competitor_hotels(active_only=True)
     if hotel_ids:
         hotels = [h for h in hotels if h["id"] in set(hotel_ids)]
@@ -469,10 +854,15 @@ def start_scrape_run(
         raise ValueError("No active competitor hotels to scrape. Add some first.")
     if len(hotels) > MAX_COMPETITORS:
         hotels = hotels[:MAX_COMPETITORS]  # cost guard
+    return hotels
+
 
-    search_params = {
+def _stay_search_params(
+    hotels: List[Dict[str, Any]], check_in: date, nights: int, adults: int, children: int
+) -> Dict[str, Any]:
+    return {
         "check_in": check_in,
-        "check_out": check_out,
+        "check_out": check_in + timedelta(days=nights),
         "nights": nights,
         "adults": adults,
         "children": children,
@@ -480,15 +870,35 @@ def start_scrape_run(
         "hotel_ids": [h["id"] for h in hotels],
     }
 
+
+def start_scrape_run(
+    check_in: date,
+    nights: int = 1,
+    adults: int = 2,
+    children: int = 0,
+    hotel_ids: Optional[List[int]] = None,
+    currency: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Start ONE Apify run covering all selected hotels for a single stay.
+
+    Returns {db_run_id, apify_run_id, status, skipped}.
+    """
+    currency = currency or DEFAULT_CURRENCY
+    hotels = _select_hotels(hotel_ids)
+    search_params = _stay_search_params(hotels, check_in, nights, adults, children)
+
     # Cost guard: don't re-run an equivalent search if one just succeeded.
     if _recent_successful_run_exists(search_params):
         return {"db_run_id": None, "apify_run_id": None, "status": "skipped", "skipped": True}
 
     client = ApifyClient(actor_id=os.getenv("APIFY_ACTOR_ID"))
-    actor_input = build_booking_input(hotels, check_in, check_out, adults, children, currency)
+    actor_input = build_booking_input(
+        hotels, check_in, search_params["check_out"], adults, children, currency
+    )
 
     try:
-        run = client.start_run(actor_input)
+        with metrics.span("start", items=1):
+            run = client.start_run(actor_input, timeout_secs=_run_timeout_secs(1), webhooks=_run_webhooks())
     except ApifyError as exc:
         db_run_id = _insert_run(client.actor_id, None, "failed", search_params)
         _finish_run(db_run_id, "failed", error_message=str(exc))
@@ -503,128 +913,453 @@ def start_scrape_run(
     }
 
 
-def _load_run(db_run_id: int) -> Optional[Dict[str, Any]]:
-    conn = get_conn()
+def _plan_runs(
+    hotels: List[Dict[str, Any]],
+    to_start: List[Tuple[int, Dict[str, Any]]],
+    stays_per_run: int,
+    currency: str,
+) -> List[Tuple[Dict[str, Any], List[Tuple[int, Dict[str, Any]]]]]:
+    """Group (stay index, search_params) pairs into actor runs: [(actor_input, members)].
+
+    With stays_per_run > 1, hotels with a booking_url are scraped for up to that many stays
+    (sharing adults/children) per run; hotels found by name search still need one run per
+    stay. Each member becomes its own pricing_scrape_runs row.
+    """
+    if stays_per_run <= 1:
+        return [
+            (build_booking_input(hotels, sp["check_in"], sp["check_out"], sp["adults"], sp["children"], currency),
+             [(i, sp)])
+            for i, sp in to_start
+        ]
+
+    url_hotels = [h for h in hotels if _normalize_url(h.get("booking_url"))]
+    search_hotels = [h for h in hotels if not _normalize_url(h.get("booking_url"))]
+    by_guests: Dict[Tuple[int, int], List[Tuple[int, Dict[str, Any]]]] = {}
+    for i, sp in to_start:
+        by_guests.setdefault((sp["adults"], sp["children"]), []).append((i, sp))
+
+    plan: List[Tuple[Dict[str, Any], List[Tuple[int, Dict[str, Any]]]]] = []
+    for group in by_guests.values():
+        for lo in range(0, len(group), stays_per_run):
+            chunk = group[lo:lo + stays_per_run]
+            if url_hotels:
+                members = [
+                    (i, {**sp, "hotel_ids": [h["id"] for h in url_hotels], "batch_size": len(chunk)})
+                    for i, sp in chunk
+                ]
+                plan.append((build_booking_batch_input(url_hotels, [sp for _, sp in members], currency), members))
+            for i, sp in chunk if search_hotels else ():
+                sp = {**sp, "hotel_ids": [h["id"] for h in search_hotels]}
+                plan.append(
+                    (build_booking_input(search_hotels, sp["check_in"], sp["check_out"],
+                                         sp["adults"], sp["children"], currency),
+                     [(i, sp)])
+                )
+    return plan
+
+
+def _run_timeout_secs(stays: int) -> int:
+    """Apify timeout for a run covering `stays` stays (see RUN_TIMEOUT_SECS)."""
+    return min(RUN_TIMEOUT_SECS * max(1, stays), max(RUN_TIMEOUT_SECS, MAX_RUN_TIMEOUT_SECS))
+
+
+def start_scrape_runs(
+    stays: List[Dict[str, Any]],
+    hotel_ids: Optional[List[int]] = None,
+    currency: Optional[str] = None,
+    concurrency: Optional[int] = None,
+    stays_per_run: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Start the Apify runs for a set of stays, firing all the start requests concurrently.
+
+    `stays` items are {check_in, nights, adults, children}. By default each stay gets its
+    own run; `stays_per_run` (or RATESHOP_STAYS_PER_RUN) > 1 packs that many stays into one
+    run (see `_plan_runs`). Returns one entry per pricing_scrape_runs row, in stay order:
+    the stay's fields plus {db_run_id, apify_run_id, status, skipped} and `error` when its
+    start was rejected (that run is recorded as failed; the rest go ahead). Stays skipped
+    as recent duplicates get a single entry with no run.
+
+    The rows are inserted as `pending` before any run is started and get their run id
+    once it is known, so a process dying in between leaves a trace for whoever takes the
+    stays over (see scheduler.ScrapeWorker._adopt_started).
+    """
+    currency = currency or DEFAULT_CURRENCY
+    stays_per_run = stays_per_run or STAYS_PER_RUN
+    hotels = _select_hotels(hotel_ids)
+
+    # Cost guard: don't re-run an equivalent search if one just succeeded.
+    done_recently = _recent_successful_stays(stays)
+
+    results: List[Tuple[int, Dict[str, Any]]] = []
+    to_start: List[Tuple[int, Dict[str, Any]]] = []
+    for i, stay in enumerate(stays):
+        sp = _stay_search_params(
+            hotels, stay["check_in"], stay["nights"], stay["adults"], stay["children"]
+        )
+        if _stay_key(sp) in done_recently:
+            results.append((i, {
+                **{k: stay[k] for k in ("check_in", "nights", "adults", "children")},
+                "db_run_id": None, "apify_run_id": None, "status": "skipped", "skipped": True,
+            }))
+        else:
+            to_start.append((i, sp))
+    if not to_start:
+        return [entry for _, entry in results]
+
+    client = ApifyClient(actor_id=os.getenv("APIFY_ACTOR_ID"))
+    plan = _plan_runs(hotels, to_start, stays_per_run, currency)
+    db_run_ids = [[_insert_run(client.actor_id, None, "pending", sp) for _, sp in members] for _, members in plan]
     try:
-        cur = conn.cursor(cursor_factory=RealDictCursor)
+        with metrics.span("start", items=len(plan)):
+            started = client.start_runs(
+                [actor_input for actor_input, _ in plan],
+                timeout_secs=[_run_timeout_secs(len(members)) for _, members in plan],
+                concurrency=concurrency, webhooks=_run_webhooks(),
+            )
+    except Exception as exc:
+        for db_run_id in (i for ids in db_run_ids for i in ids):
+            _finish_run(db_run_id, "failed", error_message=str(exc))
+        raise
+
+    for (_, members), run, ids in zip(plan, started, db_run_ids):
+        if isinstance(run, ApifyError):
+            for db_run_id in ids:
+                _finish_run(db_run_id, "failed", error_message=str(run))
+        else:
+            _attach_run(ids, run.get("id"))
+        for (i, _), db_run_id in zip(members, ids):
+            entry: Dict[str, Any] = {
+                **{k: stays[i][k] for k in ("check_in", "nights", "adults", "children")},
+                "db_run_id": db_run_id, "apify_run_id": None, "skipped": False,
+            }
+            if isinstance(run, ApifyError):
+                entry.update({"status": "failed", "error": str(run)})
+            else:
+                entry.update({"apify_run_id": run.get("id"), "status": "running"})
+            results.append((i, entry))
+    results.sort(key=lambda r: r[0])
+    return [entry for _, entry in results]
+
+
+def _load_run(db_run_id: int) -> Optional[Dict[str, Any]]:
+    with cursor(cursor_factory=RealDictCursor) as cur:
         cur.execute("SELECT * FROM rateshop.pricing_scrape_runs WHERE id = %s", (db_run_id,))
         row = cur.fetchone()
-        return dict(row) if row else None
-    finally:
-        conn.close()
+    return dict(row) if row else None
 
 
-def _upsert_observations(db_run_id: int, observations: List[Dict[str, Any]], hotels: List[Dict[str, Any]]) -> int:
+def _load_runs(db_run_ids: List[int]) -> List[Dict[str, Any]]:
+    with cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(
+            "SELECT * FROM rateshop.pricing_scrape_runs WHERE id = ANY(%s) ORDER BY id",
+            (list(db_run_ids),),
+        )
+        return [dict(r) for r in cur.fetchall()]
+
+
+def _load_open_batch_rows(apify_run_id: str) -> List[Dict[str, Any]]:
+    """Still-unsynced rows sharing one (multi-stay) Apify run."""
+    with cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(
+            """
+            SELECT * FROM rateshop.pricing_scrape_runs
+            WHERE run_id = %s AND status IN ('running', 'pending')
+            ORDER BY id
+            """,
+            (apify_run_id,),
+        )
+        return [dict(r) for r in cur.fetchall()]
+
+
+def run_search_params(run_row: Dict[str, Any]) -> Dict[str, Any]:
+    """The stay a pricing_scrape_runs row scraped, as normalise_item's search_params."""
+    sp = run_row["search_params"] or {}
+    return {
+        "check_in": datetime.fromisoformat(sp["check_in"]).date(),
+        "check_out": datetime.fromisoformat(sp["check_out"]).date(),
+        "nights": sp["nights"],
+        "adults": sp["adults"],
+        "children": sp["children"],
+        "source": sp.get("source", "booking"),
+    }
+
+
+def find_run_by_apify_id(apify_run_id: str) -> Optional[int]:
+    """db_run_id of the pricing_scrape_runs row for an Apify run id, if we started it."""
+    with cursor() as cur:
+        cur.execute(
+            "SELECT id FROM rateshop.pricing_scrape_runs WHERE run_id = %s ORDER BY id DESC LIMIT 1",
+            (apify_run_id,),
+        )
+        row = cur.fetchone()
+    return int(row[0]) if row else None
+
+
+_OBS_COLUMNS = (
+    "scrape_run_id, hotel_name, competitor_hotel_id, is_self, source, "
+    "check_in, check_out, nights, guests_adults, guests_children, room_type, "
+    "price_amount, currency, available, cancellation_policy, breakfast_included, "
+    "source_url, raw_payload_hash, observed_on, scraped_at"
+)
+_OBS_TEMPLATE = "(" + ", ".join(["%s"] * 18) + ", COALESCE(%s::date, current_date), now())"
+
+# One statement per batch. Inserts stamp scraped_at with now() (the transaction start) and
+# conflict-updates with clock_timestamp(), which is always later, so RETURNING can tell
+# them apart without a second round trip (xmax is not readable through a partitioned table).
+_UPSERT_SQL = f"""
+    INSERT INTO rateshop.hotel_price_observations ({_OBS_COLUMNS})
+    VALUES %s
+    ON CONFLICT (hotel_name, check_in, nights, guests_adults,
+                 (COALESCE(room_type, '')), source, observed_on)
+    DO UPDATE SET
+        price_amount = EXCLUDED.price_amount,
+        available = EXCLUDED.available,
+        currency = EXCLUDED.currency,
+        competitor_hotel_id = EXCLUDED.competitor_hotel_id,
+        is_self = EXCLUDED.is_self,
+        cancellation_policy = EXCLUDED.cancellation_policy,
+        breakfast_included = EXCLUDED.breakfast_included,
+        source_url = EXCLUDED.source_url,
+        raw_payload_hash = EXCLUDED.raw_payload_hash,
+        scrape_run_id = EXCLUDED.scrape_run_id,
+        scraped_at = clock_timestamp()
+    RETURNING (scraped_at = now()) AS inserted
+"""
+
+
+def _dedup_key(obs: Observation) -> Tuple[Any, ...]:
+    """Mirror of the uq_obs_dedup columns (observed_on is the same for a whole batch)."""
+    return (
+        obs.hotel_name, obs.check_in, obs.nights, obs.guests_adults, obs.room_type or "", obs.source,
+    )
+
+
+def _upsert_observations(
+    db_run_id: int,
+    observations: List[Observation],
+    matcher: HotelMatcher,
+    observed_on: Optional[date] = None,
+) -> Dict[str, int]:
+    """Bulk-upsert observations with multi-row INSERT ... ON CONFLICT statements.
+
+    Postgres refuses to update the same row twice in one statement, so observations that
+    collide on uq_obs_dedup are collapsed first, keeping the last one — the same row the old
+    one-statement-per-observation loop ended up with (room_type is not part of the UPDATE,
+    so the first one's value is kept). `observed_on` defaults to today.
+    Returns {"inserted", "updated"}.
+    """
     if not observations:
-        return 0
-    conn = get_conn()
-    inserted = 0
-    try:
-        cur = conn.cursor()
-        for obs in observations:
-            comp_id, is_self = _match_hotel(obs, hotels)
-            cur.execute(
-                """
-                INSERT INTO rateshop.hotel_price_observations
-                    (scrape_run_id, hotel_name, competitor_hotel_id, is_self, source,
-                     check_in, check_out, nights, guests_adults, guests_children, room_type,
-                     price_amount, currency, available, cancellation_policy, breakfast_included,
-                     source_url, raw_payload)
-                VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
-                ON CONFLICT (hotel_name, check_in, nights, guests_adults,
-                             (COALESCE(room_type, '')), source, observed_on)
-                DO UPDATE SET
-                    price_amount = EXCLUDED.price_amount,
-                    available = EXCLUDED.available,
-                    currency = EXCLUDED.currency,
-                    competitor_hotel_id = EXCLUDED.competitor_hotel_id,
-                    is_self = EXCLUDED.is_self,
-                    cancellation_policy = EXCLUDED.cancellation_policy,
-                    breakfast_included = EXCLUDED.breakfast_included,
-                    source_url = EXCLUDED.source_url,
-                    raw_payload = EXCLUDED.raw_payload,
-                    scrape_run_id = EXCLUDED.scrape_run_id,
-                    scraped_at = now()
-                """,
-                (
-                    db_run_id, obs["hotel_name"], comp_id, is_self, obs["source"],
-                    obs["check_in"], obs["check_out"], obs["nights"], obs["guests_adults"],
-                    obs["guests_children"], obs["room_type"], obs["price_amount"], obs["currency"],
-                    obs["available"], obs["cancellation_policy"], obs["breakfast_included"],
-                    obs["source_url"], Json(obs["raw_payload"]),
-                ),
-            )
-            inserted += 1
-        conn.commit()
-        return inserted
-    finally:
-        conn.close()
+        return {"inserted": 0, "updated": 0}
+    with cursor(commit=True) as cur:
+        return write_observations(cur, db_run_id, observations, matcher, observed_on)
 
 
-def sync_scrape_run(db_run_id: int) -> Dict[str, Any]:
-    """Poll Apify for the run, and if finished, fetch + normalise + persist observations."""
-    run_row = _load_run(db_run_id)
+def write_observations(
+    cur,
+    db_run_id: int,
+    observations: List[Observation],
+    matcher: HotelMatcher,
+    observed_on: Optional[date] = None,
+) -> Dict[str, int]:
+    """`_upsert_observations` on the caller's cursor / transaction."""
+    latest: Dict[Tuple[Any, ...], Observation] = {}
+    for obs in observations:
+        key = _dedup_key(obs)
+        if key in latest:
+            obs = replace(obs, room_type=latest[key].room_type)
+        latest[key] = obs
+    if not latest:
+        return {"inserted": 0, "updated": 0}
+
+    with metrics.span("upsert", items=len(latest)):
+        # Raw items go to the content-addressed store in the same transaction.
+        store_payload_blobs(cur, ((obs.payload_hash, obs.payload) for obs in latest.values()))
+        rows = []
+        with metrics.span("match", items=len(latest)):
+            for obs in latest.values():
+                comp_id, is_self = matcher.match(obs)
+                rows.append((
+                    db_run_id, obs.hotel_name, comp_id, is_self, obs.source,
+                    obs.check_in, obs.check_out, obs.nights, obs.guests_adults,
+                    obs.guests_children, obs.room_type, obs.price_amount, obs.currency,
+                    obs.available, obs.cancellation_policy, obs.breakfast_included,
+                    obs.source_url, obs.payload_hash, observed_on,
+                ))
+        flags = execute_values(
+            cur, _UPSERT_SQL, rows, template=_OBS_TEMPLATE, page_size=UPSERT_BATCH_SIZE, fetch=True
+        )
+    inserted = sum(1 for (was_insert,) in flags if was_insert)
+    return {"inserted": inserted, "updated": len(flags) - inserted}
+
+
+def _written_stays(stays: Dict[StayDates, Dict[str, Any]]) -> List[Tuple[date, int, int]]:
+    """(check_in, nights, adults) of the stay slots that had observations written."""
+    return [
+        (stay["search_params"]["check_in"], stay["search_params"]["nights"], stay["search_params"]["adults"])
+        for stay in stays.values() if stay["written"]["inserted"] or stay["written"]["updated"]
+    ]
+
+
+def sync_scrape_run(
+    db_run_id: int,
+    run: Optional[Dict[str, Any]] = None,
+    run_row: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Poll Apify for the run, and if finished, fetch + normalise + persist observations.
+
+    Pass `run` (an Apify run object fetched by the caller, e.g. in a batched poll) to skip
+    the per-run status request, and `run_row` (its pricing_scrape_runs row) to skip
+    re-reading it from Postgres.
+
+    A multi-stay run is synced for all of its stay rows at once, splitting the dataset by
+    each item's checkin/checkout; the other rows' results are returned under `siblings`.
+
+    If the dataset download fails part way, the rows stay `running` (result status
+    "running" with an `error`) so the next sync fetches it again.
+    """
+    if run_row is None:
+        run_row = _load_run(db_run_id)
     if not run_row:
         raise ValueError(f"Scrape run {db_run_id} not found")
+    if run_row.get("status") not in ("running", "pending"):
+        # Already synced (e.g. a webhook redelivery racing a poll) — nothing to do.
+        return {"status": run_row["status"], "item_count": run_row.get("item_count") or 0}
     apify_run_id = run_row.get("run_id")
     if not apify_run_id:
         _finish_run(db_run_id, "failed", error_message="No Apify run id stored")
         return {"status": "failed", "item_count": 0}
 
+    batch_size = int((run_row["search_params"] or {}).get("batch_size") or 1)
+    rows = [run_row]
+    if batch_size > 1:
+        # A sibling stay row may already have synced the shared run.
+        rows = _load_open_batch_rows(apify_run_id)
+        if not any(r["id"] == db_run_id for r in rows):
+            row = _load_run(db_run_id) or run_row
+            return {"status": row["status"], "item_count": row.get("item_count") or 0}
+
     client = ApifyClient(actor_id=run_row.get("actor_id"))
-    try:
-        run = client.get_run(apify_run_id)
-    except ApifyError as exc:
-        _finish_run(db_run_id, "failed", error_message=str(exc))
-        return {"status": "failed", "error": str(exc)}
+    if run is None:
+        try:
+            with metrics.span("poll", items=1):
+                run = client.get_run(apify_run_id)
+        except ApifyError as exc:
+            for r in rows:
+                _finish_run(r["id"], "failed", error_message=str(exc))
+            return {"status": "failed", "error": str(exc)}
 
     status = (run.get("status") or "").upper()
     if status not in TERMINAL_OK and status not in TERMINAL_FAIL:
         return {"status": "running"}  # not finished yet
 
     cost = client.extract_cost_usd(run)
+    if cost is not None:
+        cost = cost / batch_size  # each stay row carries its share of the run's cost
+    ended = run.get("finishedAt") if isinstance(run.get("finishedAt"), str) else None
+
+    def _result(out: Dict[str, Any]) -> Dict[str, Any]:
+        mine = out.pop(db_run_id)
+        if out:
+            mine["siblings"] = out
+        return mine
 
     if status in TERMINAL_FAIL:
         mapped = "timed_out" if status == "TIMED-OUT" else "failed"
-        _finish_run(db_run_id, mapped, cost_usd=cost, error_message=f"Apify run {status}")
-        return {"status": mapped}
+        for r in rows:
+            _finish_run(r["id"], mapped, cost_usd=cost, error_message=f"Apify run {status}",
+                        finished_at=ended)
+        return _result({r["id"]: {"status": mapped} for r in rows})
+
+    # One slot per stay row, keyed by the stay's dates for splitting a multi-stay dataset.
+    stays: Dict[StayDates, Dict[str, Any]] = {}
+    for r in rows:
+        sp = run_search_params(r)
+        stays[(sp["check_in"].isoformat(), sp["check_out"].isoformat())] = {
+            "id": r["id"], "search_params": sp, "seen": 0,
+            "written": {"inserted": 0, "updated": 0},
+        }
+    single = next(iter(stays)) if batch_size == 1 else None
 
-    # SUCCEEDED -> fetch dataset
+    # SUCCEEDED -> stream the dataset page by page; each page is normalised and upserted
+    # before the next one is fetched, so memory stays flat however big the dataset is.
+    # Pages are also recorded to the local dataset cache (or replayed from it).
     dataset_id = run.get("defaultDatasetId")
+    matcher = HotelMatcher(list_competitor_hotels())
+    fetched = {"items": 0}
+
+    def _counted(pages_: Iterable[List[Dict[str, Any]]]) -> Iterator[List[Dict[str, Any]]]:
+        for page in pages_:
+            fetched["items"] += len(page)
+            yield page
+
+    pages = metrics.timed_iter(
+        "dataset",
+        _counted(dataset_cache.cached_pages(dataset_id, lambda: client.iter_dataset_pages(dataset_id)))
+        if dataset_id else (),
+        len,
+    )
+    search_params = {key: stay["search_params"] for key, stay in stays.items()}
     try:
-        items = client.get_dataset_items(dataset_id) if dataset_id else []
+        for routed in iter_normalised_pages(pages, search_params, single):
+            for key, (seen, observations) in routed.items():
+                stay = stays[key]
+                stay["seen"] += seen
+                for k, v in _upsert_observations(stay["id"], observations, matcher).items():
+                    stay["written"][k] += v
     except ApifyError as exc:
-        _finish_run(db_run_id, "failed", cost_usd=cost, error_message=str(exc))
-        return {"status": "failed", "error": str(exc)}
-
-    if not items:
-        _finish_run(db_run_id, "empty", item_count=0, cost_usd=cost,
-                    error_message="Actor returned an empty dataset")
-        return {"status": "empty", "item_count": 0}
-
-    sp = run_row["search_params"] or {}
-    search_params = {
-        "check_in": datetime.fromisoformat(sp["check_in"]).date(),
-        "check_out": datetime.fromisoformat(sp["check_out"]).date(),
-        "nights": sp["nights"],
-        "adults": sp["adults"],
-        "children": sp["children"],
-        "source": sp.get("source", "booking"),
-    }
-
-    observations = []
-    for it in items:
-        try:
-            obs = normalise_item(it, search_params=search_params, default_currency=DEFAULT_CURRENCY)
-        except Exception:  # malformed item -> skip, keep going
-            obs = None
-        if obs:
-            observations.append(obs)
+        # The dataset stopped mid-stream (after the client's own retries). The run itself
+        # succeeded, so keep its rows open for the next sync, which re-reads the dataset and
+        # upserts over what was written; the rollup covers the pages already stored.
+        refresh_daily_rollup(_written_stays(stays))
+        _note_run_error([stay["id"] for stay in stays.values()], f"Dataset fetch interrupted: {exc}")
+        return _result({stay["id"]: {"status": "running", "error": str(exc)} for stay in stays.values()})
+
+    refresh_daily_rollup(_written_stays(stays))
+
+    out: Dict[int, Dict[str, Any]] = {}
+    unroutable = batch_size > 1 and fetched["items"] and not any(s["seen"] for s in stays.values())
+    for stay in stays.values():
+        if not stay["seen"]:
+            if batch_size == 1:
+                msg = "Actor returned an empty dataset"
+            elif unroutable:
+                # Items came back but none carried checkin/checkout (URL query or
+                # checkIn/checkOut) to split them by: this actor can't do multi-stay runs.
+                msg = (f"{fetched['items']} item(s) without stay dates to split a multi-stay run by; "
+                       "use --batch-size 1 / RATESHOP_STAYS_PER_RUN=1 with this actor")
+            else:
+                msg = "No items for this stay"
+            _finish_run(stay["id"], "empty", item_count=0, cost_usd=cost,
+                        error_message=msg, finished_at=ended, dataset_id=dataset_id)
+            out[stay["id"]] = {"status": "empty", "item_count": 0}
+            continue
+        written = stay["written"]
+        count = written["inserted"] + written["updated"]
+        _finish_run(stay["id"], "succeeded", item_count=count, cost_usd=cost, finished_at=ended,
+                    dataset_id=dataset_id)
+        out[stay["id"]] = {"status": "succeeded", "item_count": count, "cost_usd": cost, **written}
+    return _result(out)
+
+
+def poll_runs(
+    pending: Dict[int, str],
+    timeout_secs: float = 240,
+    interval_secs: float = 8,
+) -> Dict[int, Dict[str, Any]]:
+    """Poll running runs until they finish or the deadline passes.
+
+    `pending` maps db_run_id -> Apify run id. Runs are polled around their predicted finish
+    time with per-run backoff starting at `interval_secs` (see PollScheduler); finished
+    ones are synced. Returns {db_run_id: sync result} for the runs that finished; anything
+    still running at the deadline is left out.
+    """
+    from backend.app.services.poll_scheduler import PollScheduler
 
-    hotels = list_competitor_hotels()
-    count = _upsert_observations(db_run_id, observations, hotels)
-    _finish_run(db_run_id, "succeeded", item_count=count, cost_usd=cost)
-    return {"status": "succeeded", "item_count": count, "cost_usd": cost}
+    if not pending:
+        return {}
+    scheduler = PollScheduler(min_interval=interval_secs)
+    scheduler.add_many(r for r in _load_runs(list(pending)) if r.get("run_id"))
+    return scheduler.run(timeout_secs)
 
 
 def run_price_check(
@@ -639,13 +1374,11 @@ def run_price_check(
 ) -> List[Dict[str, Any]]:
     """Scrape one check-in date per day in the range.
 
-    Starts every date's Apify run first (they run in parallel on Apify), then polls them
-    together until done or the overall deadline. This is far faster and more reliable than
-    waiting on each date sequentially. Any run still going at the deadline is left for the
-    "Sync latest runs" button. Applies the date-count and horizon safeguards.
+    Starts every date's Apify run first (concurrently; they run in parallel on Apify), then
+    polls them together until done or the overall deadline. This is far faster and more
+    reliable than waiting on each date sequentially. Any run still going at the deadline is
+    left for the "Sync latest runs" button. Applies the date-count and horizon safeguards.
     """
-    import time
-
     # Horizon safeguard.
     horizon_limit = date.today() + timedelta(days=MAX_HORIZON_DAYS)
     if end_date > horizon_limit:
@@ -659,92 +1392,221 @@ def run_price_check(
     if len(dates) > MAX_DATES_PER_MANUAL_RUN:
         dates = dates[:MAX_DATES_PER_MANUAL_RUN]  # cost guard
 
-    # Phase 1 — start every run (fast).
+    # Phase 1 — start every run (fast, concurrent).
+    stays = [{"check_in": ci, "nights": nights, "adults": adults, "children": children} for ci in dates]
+    try:
+        started = start_scrape_runs(stays, hotel_ids)
+    except Exception as exc:
+        return [{"check_in": ci.isoformat(), "status": "failed", "error": str(exc)} for ci in dates]
+
     results: List[Dict[str, Any]] = []
-    pending: Dict[int, Dict[str, Any]] = {}
-    for ci in dates:
-        entry: Dict[str, Any] = {"check_in": ci.isoformat(), "status": "running"}
-        try:
-            started = start_scrape_run(ci, nights, adults, children, hotel_ids)
-        except Exception as exc:
-            entry.update({"status": "failed", "error": str(exc)})
-            results.append(entry)
-            continue
-        if started.get("skipped"):
-            entry["status"] = "skipped"
-        elif started.get("db_run_id"):
-            entry["db_run_id"] = started["db_run_id"]
+    pending: Dict[int, str] = {}
+    by_run: Dict[int, Dict[str, Any]] = {}
+    for st in started:
+        entry: Dict[str, Any] = {"check_in": st["check_in"].isoformat(), "status": st["status"]}
+        if st.get("error"):
+            entry["error"] = st["error"]
+        elif st.get("db_run_id"):
+            entry["db_run_id"] = st["db_run_id"]
+            pending[st["db_run_id"]] = st["apify_run_id"]
+            by_run[st["db_run_id"]] = entry
         results.append(entry)
-        if entry.get("db_run_id"):
-            pending[entry["db_run_id"]] = entry
 
     # Phase 2 — poll all running runs together until done or deadline.
     if wait and pending:
-        deadline = time.monotonic() + poll_timeout_secs
-        while pending and time.monotonic() < deadline:
-            for rid in list(pending):
-                try:
-                    out = sync_scrape_run(rid)
-                except Exception as exc:
-                    pending[rid].update({"status": "failed", "error": str(exc)})
-                    del pending[rid]
-                    continue
-                if out["status"] != "running":
-                    pending[rid].update(out)
-                    del pending[rid]
-            if pending:
-                time.sleep(8)
+        for rid, out in poll_runs(pending, timeout_secs=poll_timeout_secs).items():
+            by_run[rid].update(out)
 
     return results
 
 
-def sync_pending_runs() -> List[Dict[str, Any]]:
-    """Poll and sync any runs still marked running/pending (no new scraping cost)."""
-    runs = [r for r in list_recent_runs(limit=200) if r["status"] in ("running", "pending")]
-    out = []
-    for r in runs:
-        try:
-            res = sync_scrape_run(r["id"])
-        except Exception as exc:
-            res = {"status": "error", "error": str(exc)}
-        out.append({"run_id": r["id"], **res})
+def _load_pending_runs(limit: int = PENDING_SYNC_LIMIT) -> List[Dict[str, Any]]:
+    """The most recent `limit` runs still marked running/pending, newest first.
+
+    Rows with no run id yet are skipped: their start is in flight (or was cut off, which
+    the scheduler's stay jobs sort out).
+    """
+    with cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(
+            """
+            SELECT * FROM rateshop.pricing_scrape_runs
+            WHERE status IN ('running', 'pending') AND run_id IS NOT NULL
+            ORDER BY started_at DESC LIMIT %s
+            """,
+            (limit,),
+        )
+        return [dict(r) for r in cur.fetchall()]
+
+
+def _sync_safely(db_run_id: int, **kwargs: Any) -> Dict[str, Any]:
+    try:
+        return sync_scrape_run(db_run_id, **kwargs)
+    except Exception as exc:
+        return {"status": "error", "error": str(exc)}
+
+
+def sync_runs_concurrently(
+    rows: List[Dict[str, Any]], workers: int = SYNC_WORKERS
+) -> Dict[int, Dict[str, Any]]:
+    """Sync many pricing_scrape_runs rows, up to `workers` Apify runs at a time.
+
+    Every distinct Apify run's status is fetched in one concurrent batch first, so runs
+    still going cost no further work. Finished runs are then synced on a thread pool: while
+    one thread downloads a dataset, another upserts its own, and each run's pages are still
+    written in order by the single thread that owns it. Stay rows sharing a multi-stay run
+    go to one thread together. Returns {db_run_id: sync result} for every row.
+    """
+    groups: Dict[Any, List[Dict[str, Any]]] = {}
+    for r in rows:
+        groups.setdefault(r.get("run_id") or ("row", r["id"]), []).append(r)
+    apify_ids = [k for k in groups if isinstance(k, str)]
+    statuses: Dict[str, Any] = {}
+    if apify_ids:
+        with metrics.span("poll", items=len(apify_ids)):
+            statuses = ApifyClient().get_runs(apify_ids)
+
+    out: Dict[int, Dict[str, Any]] = {}
+    tasks: List[Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]] = []
+    for key, members in groups.items():
+        run = statuses.get(key) if isinstance(key, str) else None
+        if isinstance(run, ApifyError):
+            run = None  # sync_scrape_run retries the lookup and records the failure
+        elif run is not None and (run.get("status") or "").upper() not in TERMINAL_OK | TERMINAL_FAIL:
+            for r in members:
+                out[r["id"]] = {"status": "running"}
+            continue
+        tasks.append((members, run))
+
+    def _task(members: List[Dict[str, Any]], run: Optional[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+        first = members[0]
+        res = _sync_safely(first["id"], run=run, run_row=first)
+        synced = {first["id"]: res, **res.pop("siblings", {})}
+        for r in members[1:]:
+            # A sibling absent from `siblings` was synced by an earlier pass (or failed).
+            if r["id"] not in synced:
+                synced[r["id"]] = dict(res) if res["status"] in ("error", "running") else _sync_safely(r["id"])
+        return synced
+
+    if workers <= 1 or len(tasks) <= 1:
+        for members, run in tasks:
+            out.update(_task(members, run))
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(tasks)), thread_name_prefix="sync") as pool:
+            for synced in pool.map(lambda t: _task(*t), tasks):
+                out.update(synced)
     return out
 
 
+def sync_pending_runs(workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Poll and sync any runs still marked running/pending (no new scraping cost).
+
+    Runs are synced `workers` (default RATESHOP_SYNC_WORKERS) at a time; see
+    `sync_runs_concurrently`. Returns [{run_id, **sync result}], newest run first.
+    """
+    rows = _load_pending_runs()
+    if not rows:
+        return []
+    try:
+        results = sync_runs_concurrently(rows, workers=SYNC_WORKERS if workers is None else workers)
+    except ApifyError as exc:  # the status batch itself failed (e.g. bad token)
+        results = {r["id"]: {"status": "error", "error": str(exc)} for r in rows}
+    return [{"run_id": r["id"], **results[r["id"]]} for r in rows]
+
+
 # ----------------------------------------------------------------------------
 # Insights + recommendations
 # ----------------------------------------------------------------------------
-def _median_trend(check_in: date, nights: int, adults: int) -> Optional[float]:
-    """% change of competitor median between the latest and the previous scrape day.
+def _stay_filters(
+    start_date: Optional[date], end_date: Optional[date], nights: Optional[int], adults: Optional[int]
+) -> Tuple[List[str], List[Any]]:
+    clauses, params = [], []
+    if start_date:
+        clauses.append("check_in >= %s")
+        params.append(start_date)
+    if end_date:
+        clauses.append("check_in <= %s")
+        params.append(end_date)
+    if nights is not None:
+        clauses.append("nights = %s")
+        params.append(nights)
+    if adults is not None:
+        clauses.append("guests_adults = %s")
+        params.append(adults)
+    return clauses, params
 
-    Negative = prices falling. Returns None if we have fewer than 2 scrape days.
+
+def refresh_daily_rollup(stays: List[Tuple[date, int, int]], since: Optional[date] = None) -> int:
+    """Recompute competitor_price_daily for (check_in, nights, adults) stays.
+
+    Only scrape days on/after `since` are rebuilt (default: today, the only day a sync
+    writes). Returns the number of rollup rows written.
     """
-    conn = get_conn()
-    try:
-        cur = conn.cursor()
+    stays = list(dict.fromkeys(stays))
+    if not stays:
+        return 0
+    check_ins, nights, adults = (list(col) for col in zip(*stays))
+    with metrics.span("rollup", items=len(stays)), cursor(commit=True) as cur:
         cur.execute(
-            """
-            WITH per_day AS (
-                SELECT observed_on,
-                       percentile_cont(0.5) WITHIN GROUP (ORDER BY price_amount)
-                         FILTER (WHERE available IS NOT FALSE) AS med
-                FROM rateshop.hotel_price_observations
-                WHERE check_in = %s AND nights = %s AND guests_adults = %s AND is_self = false
-                GROUP BY observed_on
-                ORDER BY observed_on DESC
-                LIMIT 2
-            )
-            SELECT med FROM per_day
+            "SELECT rateshop.refresh_competitor_price_daily(%s::date[], %s::int[], %s::int[], "
+            "COALESCE(%s::date, current_date))",
+            (check_ins, nights, adults, since),
+        )
+        written = int(cur.fetchone()[0] or 0)
+        bump_data_version(cur)
+        return written
+
+
+def _trend_from_medians(meds: List[Any]) -> Optional[float]:
+    """% change between the latest and previous per-day medians (newest first)."""
+    rows = [m for m in meds if m is not None]
+    if len(rows) < 2 or not rows[1]:
+        return None
+    latest, prev = float(rows[0]), float(rows[1])
+    return (latest - prev) / prev if prev else None
+
+
+def _median_trends(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    nights: Optional[int] = None,
+    adults: Optional[int] = None,
+) -> Dict[Tuple[date, int, int], Optional[float]]:
+    """Median trend for every (check_in, nights, adults) stay in the window, in one query.
+
+    Reads the per-day competitor medians precomputed in competitor_price_daily. Keys are
+    (check_in, nights, guests_adults); stays with no competitor data are absent.
+    """
+    clauses, params = _stay_filters(start_date, end_date, nights, adults)
+    clauses.append("competitor_day_count > 0")
+
+    with cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT check_in, nights, guests_adults, competitor_day_median
+            FROM (
+                SELECT check_in, nights, guests_adults, competitor_day_median,
+                       row_number() OVER (PARTITION BY check_in, nights, guests_adults
+                                          ORDER BY observed_on DESC) AS rn
+                FROM rateshop.competitor_price_daily
+                WHERE {' AND '.join(clauses)}
+            ) ranked
+            WHERE rn <= 2
+            ORDER BY check_in, nights, guests_adults, rn
             """,
-            (check_in, nights, adults),
+            params,
         )
-        rows = [r[0] for r in cur.fetchall() if r[0] is not None]
-        if len(rows) < 2 or not rows[1]:
-            return None
-        latest, prev = float(rows[0]), float(rows[1])
-        return (latest - prev) / prev if prev else None
-    finally:
-        conn.close()
+        meds: Dict[Tuple[date, int, int], List[Any]] = {}
+        for ci, n, a, med in cur.fetchall():
+            meds.setdefault((ci, n, a), []).append(med)
+    return {key: _trend_from_medians(m) for key, m in meds.items()}
+
+
+def _median_trend(check_in: date, nights: int, adults: int) -> Optional[float]:
+    """% change of competitor median between the latest and the previous scrape day.
+
+    Negative = prices falling. Returns None if we have fewer than 2 scrape days.
+    """
+    return _median_trends(check_in, check_in, nights, adults).get((check_in, nights, adults))
 
 
 def recommend(
@@ -803,48 +1665,45 @@ def get_insights(
     nights: Optional[int] = None,
     adults: Optional[int] = None,
 ) -> List[Dict[str, Any]]:
-    """Return insights rows (from the view) enriched with a suggested action."""
-    clauses, params = [], []
-    if start_date:
-        clauses.append("check_in >= %s")
-        params.append(start_date)
-    if end_date:
-        clauses.append("check_in <= %s")
-        params.append(end_date)
-    if nights is not None:
-        clauses.append("nights = %s")
-        params.append(nights)
-    if adults is not None:
-        clauses.append("guests_adults = %s")
-        params.append(adults)
+    """Return insights rows enriched with a suggested action.
+
+    Stats come from the latest competitor_price_daily row of each stay, which holds the
+    same latest-observation-per-hotel snapshot as the pricing_insights view.
+    """
+    clauses, params = _stay_filters(start_date, end_date, nights, adults)
     where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
 
-    conn = get_conn()
-    try:
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute(f"SELECT * FROM rateshop.pricing_insights{where} ORDER BY check_in", params)
+    with metrics.span("insights") as sp, cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(
+            f"""
+            SELECT check_in, nights, guests_adults, elbitat_price, elbitat_available,
+                   competitor_min, competitor_median, competitor_max,
+                   competitor_available_count, competitor_total_count, elbitat_position
+            FROM (
+                SELECT DISTINCT ON (check_in, nights, guests_adults) *
+                FROM rateshop.competitor_price_daily{where}
+                ORDER BY check_in, nights, guests_adults, observed_on DESC
+            ) latest
+            ORDER BY check_in
+            """,
+            params,
+        )
         rows = [dict(r) for r in cur.fetchall()]
+        sp.items = len(rows)
 
         # Dates where Elbitat has a price for SOME stay length — used to tell a minimum-stay
         # rule apart from a genuine "no listing" visibility issue.
-        sd_clauses = ["is_self", "price_amount IS NOT NULL"]
-        sd_params: List[Any] = []
-        if start_date:
-            sd_clauses.append("check_in >= %s")
-            sd_params.append(start_date)
-        if end_date:
-            sd_clauses.append("check_in <= %s")
-            sd_params.append(end_date)
+        sd_clauses, sd_params = _stay_filters(start_date, end_date, None, None)
+        sd_clauses.append("elbitat_day_priced")
         cur.execute(
-            f"SELECT DISTINCT check_in FROM rateshop.hotel_price_observations WHERE {' AND '.join(sd_clauses)}",
+            f"SELECT DISTINCT check_in FROM rateshop.competitor_price_daily WHERE {' AND '.join(sd_clauses)}",
             sd_params,
         )
         self_priced_dates = {r["check_in"] for r in cur.fetchall()}
-    finally:
-        conn.close()
 
+    trends = _median_trends(start_date, end_date, nights, adults) if rows else {}
     for r in rows:
-        trend = _median_trend(r["check_in"], r["nights"], r["guests_adults"])
+        trend = trends.get((r["check_in"], r["nights"], r["guests_adults"]))
         r["median_trend_pct"] = round(trend * 100, 1) if trend is not None else None
         self_other = r.get("elbitat_price") is None and r["check_in"] in self_priced_dates
         r["recommendation"] = recommend(r, trend, self_has_other_stay=self_other)
@@ -866,9 +1725,13 @@ def get_price_matrix(
     if start_date:
         clauses.append("check_in >= %s")
         params.append(start_date)
+        clauses.append("observed_on >= %s")
+        params.append(start_date - timedelta(days=OBS_LOOKBACK_DAYS))
     if end_date:
         clauses.append("check_in <= %s")
         params.append(end_date)
+        clauses.append("observed_on <= %s")
+        params.append(end_date)
     if nights is not None:
         clauses.append("nights = %s")
         params.append(nights)
@@ -877,9 +1740,7 @@ def get_price_matrix(
         params.append(adults)
     where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
 
-    conn = get_conn()
-    try:
-        cur = conn.cursor(cursor_factory=RealDictCursor)
+    with cursor(cursor_factory=RealDictCursor) as cur:
         cur.execute(
             f"""
             SELECT DISTINCT ON (check_in, hotel_name)
@@ -892,18 +1753,44 @@ def get_price_matrix(
             params,
         )
         return [dict(r) for r in cur.fetchall()]
-    finally:
-        conn.close()
+
+
+def bump_data_version(cur) -> None:
+    """Advance the data_version() token inside `cur`'s transaction.
+
+    For writers that change stored prices without finishing a run: re-normalising,
+    downsampling and rollup refreshes.
+    """
+    cur.execute(
+        "UPDATE rateshop.data_version SET version = version + 1, updated_at = now() WHERE id"
+    )
+
+
+def data_version() -> str:
+    """Cheap token that changes whenever runs start or finish syncing, or prices are rewritten.
+
+    A sync ends by stamping the run's status and finished_at; jobs that rewrite history
+    afterwards (renormalise, retention, rollup refreshes) call bump_data_version() in the
+    same transaction. A cache keyed on this token (plus its filters) therefore never
+    serves data older than the last committed write.
+    """
+    with cursor() as cur:
+        cur.execute(
+            """
+            SELECT max(id), max(finished_at), count(*) FILTER (WHERE status IN ('running', 'pending')),
+                   (SELECT version FROM rateshop.data_version)
+            FROM rateshop.pricing_scrape_runs
+            """
+        )
+        max_id, last_finished, open_runs, version = cur.fetchone()
+    finished = last_finished.isoformat() if last_finished else "-"
+    return f"{max_id or 0}:{finished}:{open_runs}:{version or 0}"
 
 
 def list_recent_runs(limit: int = 20) -> List[Dict[str, Any]]:
-    conn = get_conn()
-    try:
-        cur = conn.cursor(cursor_factory=RealDictCursor)
+    with cursor(cursor_factory=RealDictCursor) as cur:
         cur.execute(
             "SELECT * FROM rateshop.pricing_scrape_runs ORDER BY started_at DESC LIMIT %s",
             (limit,),
         )
         return [dict(r) for r in cur.fetchall()]
-    finally:
-        conn.close()
@@ -0,0 +1,218 @@
+"""Re-run normalisation and hotel matching over data already scraped, at no Apify cost.
+
+Used after `normalise_item` or the competitor list changes (CLI: `sync_apify.py
+renormalise`). Two sources:
+
+* ``cache`` — datasets in the local dataset cache (see dataset_cache), traced back to
+  their stay rows through `pricing_scrape_runs.dataset_id`. Every item the actor returned
+  is replayed, including ones the old normaliser skipped.
+* ``db`` — the raw payloads kept for existing observations (see payload_store), streamed
+  through a server-side cursor. Only items that produced an observation were kept, and
+  observations whose payload has been purged are left alone.
+
+Items are decompressed, parsed and normalised in a process pool. The parent then replaces
+each run's observations for the day they were originally observed in one transaction, in
+run id order, so a later run still wins a same-day conflict as it did at sync time.
+Finally the daily rollup is refreshed for every stay touched, but only for scrape days
+from the downsampling cutoff on: older weeks may already be thinned, and their rollup rows
+(built from the full history) are kept as they are.
+"""
+from __future__ import annotations
+
+import json
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from psycopg2.extras import RealDictCursor
+
+from backend.app.core.db import connection, cursor
+from backend.app.services import dataset_cache
+from backend.app.services import rate_shopping_service as rss
+from backend.app.services import retention
+from backend.app.services.payload_store import decompress
+
+SOURCES = ("cache", "db")
+# Server-side cursor fetch size for the `db` source.
+_ITERSIZE = 2000
+# Rollup stays refreshed per statement.
+_ROLLUP_CHUNK = 1000
+
+
+# --------------------------------------------------------------- pool workers
+def _normalise_cached_dataset(task) -> Dict[int, List[rss.Observation]]:
+    """{row id: observations} for one cached dataset, split across its stay rows by dates."""
+    dataset_id, stays, single = task
+    search_params = {key: sp for key, (_, sp) in stays.items()}
+    out: Dict[int, List[rss.Observation]] = {row_id: [] for row_id, _ in stays.values()}
+    for page in dataset_cache.iter_cached_pages(dataset_id):
+        for key, (_, observations) in rss.normalise_page(page, search_params, single).items():
+            out[stays[key][0]].extend(observations)
+    return out
+
+
+def _normalise_payloads(task) -> List[rss.Observation]:
+    _run_id, _observed_on, sp, blobs = task
+    items = (json.loads(decompress(encoding, body)) for _, encoding, body in blobs)
+    return list(rss.normalise_items(items, sp))
+
+
+# ---------------------------------------------------------------------- tasks
+def _cache_tasks(since: Optional[date]) -> Tuple[List[Tuple], Dict[str, List[Dict[str, Any]]]]:
+    """Pool tasks (dataset id, {stay dates: (row id, search params)}, single stay's dates or
+    None), in row id order, plus the stay rows of each cached dataset."""
+    cached = dataset_cache.cached_dataset_ids()
+    if not cached:
+        return [], {}
+    with cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(
+            """
+            SELECT r.id, r.dataset_id, r.search_params,
+                   COALESCE(
+                       (SELECT min(o.observed_on) FROM rateshop.hotel_price_observations o
+                        WHERE o.scrape_run_id = r.id),
+                       r.finished_at::date
+                   ) AS observed_on
+            FROM rateshop.pricing_scrape_runs r
+            WHERE r.dataset_id = ANY(%s) AND r.status IN ('succeeded', 'empty')
+              AND (%s::date IS NULL OR r.finished_at >= %s::date)
+            ORDER BY r.id
+            """,
+            (cached, since, since),
+        )
+        rows = [dict(r) for r in cur.fetchall()]
+    by_dataset: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        row["sp"] = rss.run_search_params(row)
+        by_dataset.setdefault(row["dataset_id"], []).append(row)
+    tasks = []
+    for dataset_id, ds_rows in by_dataset.items():
+        stays = {
+            (r["sp"]["check_in"].isoformat(), r["sp"]["check_out"].isoformat()): (r["id"], r["sp"])
+            for r in ds_rows
+        }
+        batch_size = int((ds_rows[0]["search_params"] or {}).get("batch_size") or 1)
+        single = next(iter(stays)) if batch_size == 1 else None
+        tasks.append((dataset_id, stays, single))
+    return tasks, by_dataset
+
+
+def _payload_tasks(since: Optional[date]) -> Iterator[Tuple[int, date, Dict[str, Any], List[Tuple]]]:
+    """(run id, observed_on, search params, [(obs id, encoding, body)]) per run and day."""
+    with cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("SELECT id, search_params FROM rateshop.pricing_scrape_runs")
+        params = {r["id"]: r for r in cur.fetchall()}
+
+    with connection() as conn:
+        cur = conn.cursor(name="renormalise_payloads")
+        cur.itersize = _ITERSIZE
+        try:
+            cur.execute(
+                """
+                SELECT o.scrape_run_id, o.observed_on, o.id, p.encoding, p.body
+                FROM rateshop.hotel_price_observations o
+                JOIN rateshop.raw_payloads p ON p.hash = o.raw_payload_hash
+                WHERE o.scrape_run_id IS NOT NULL
+                  AND (%s::date IS NULL OR o.observed_on >= %s::date)
+                ORDER BY o.scrape_run_id, o.observed_on, o.id
+                """,
+                (since, since),
+            )
+            key, blobs = None, []
+            for run_id, observed_on, obs_id, encoding, body in cur:
+                if (run_id, observed_on) != key:
+                    if blobs and key[0] in params:
+                        yield key[0], key[1], rss.run_search_params(params[key[0]]), blobs
+                    key, blobs = (run_id, observed_on), []
+                blobs.append((obs_id, encoding, bytes(body)))
+            if blobs and key[0] in params:
+                yield key[0], key[1], rss.run_search_params(params[key[0]]), blobs
+        finally:
+            cur.close()
+            conn.rollback()
+
+
+# --------------------------------------------------------------------- writes
+def _replace(
+    run_id: int,
+    observed_on: date,
+    observations: List[rss.Observation],
+    matcher: rss.HotelMatcher,
+    only_ids: Optional[List[int]] = None,
+) -> int:
+    """Swap a run's observations for one day (or just `only_ids`) for `observations`."""
+    with cursor(commit=True) as cur:
+        if only_ids is None:
+            cur.execute(
+                "DELETE FROM rateshop.hotel_price_observations "
+                "WHERE scrape_run_id = %s AND observed_on = %s",
+                (run_id, observed_on),
+            )
+        else:
+            cur.execute(
+                "DELETE FROM rateshop.hotel_price_observations "
+                "WHERE observed_on = %s AND id = ANY(%s)",
+                (observed_on, only_ids),
+            )
+        written = rss.write_observations(cur, run_id, observations, matcher, observed_on)
+        count = written["inserted"] + written["updated"]
+        if only_ids is None:
+            cur.execute(
+                "UPDATE rateshop.pricing_scrape_runs SET item_count = %s WHERE id = %s",
+                (count, run_id),
+            )
+        rss.bump_data_version(cur)
+    return count
+
+
+def renormalise(source: str = "cache", workers: int = 1, since: Optional[date] = None) -> Dict[str, Any]:
+    """Re-normalise history from `source` ("cache" or "db"). Returns a summary dict."""
+    if source not in SOURCES:
+        raise ValueError(f"source must be one of {SOURCES}")
+    matcher = rss.HotelMatcher(rss.list_competitor_hotels())
+    summary: Dict[str, Any] = {
+        "source": source, "runs": 0, "observations": 0, "stays_refreshed": 0, "rollup_since": None,
+    }
+    touched: Dict[Tuple[date, int, int], None] = {}
+    oldest: Optional[date] = None
+
+    def _note(sp: Dict[str, Any], observed_on: date) -> None:
+        nonlocal oldest
+        touched[(sp["check_in"], sp["nights"], sp["adults"])] = None
+        oldest = observed_on if oldest is None else min(oldest, observed_on)
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        if source == "cache":
+            tasks, rows_by_dataset = _cache_tasks(since)
+            for (dataset_id, _, _), by_row in rss.ordered_map(
+                pool, _normalise_cached_dataset, tasks, workers * 4
+            ):
+                for row in rows_by_dataset[dataset_id]:
+                    summary["observations"] += _replace(
+                        row["id"], row["observed_on"], by_row[row["id"]], matcher
+                    )
+                    summary["runs"] += 1
+                    _note(row["sp"], row["observed_on"])
+        else:
+            for (run_id, observed_on, sp, blobs), observations in rss.ordered_map(
+                pool, _normalise_payloads, _payload_tasks(since), workers * 4
+            ):
+                ids = [b[0] for b in blobs]
+                summary["observations"] += _replace(run_id, observed_on, observations, matcher, ids)
+                summary["runs"] += 1
+                _note(sp, observed_on)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    if oldest is None:
+        return summary
+    cutoff = retention.downsample_cutoff()
+    rollup_since = max(oldest, cutoff) if cutoff is not None else oldest
+    stays = list(touched)
+    for i in range(0, len(stays), _ROLLUP_CHUNK):
+        rss.refresh_daily_rollup(stays[i:i + _ROLLUP_CHUNK], since=rollup_since)
+    summary["stays_refreshed"] = len(stays)
+    summary["rollup_since"] = rollup_since
+    return summary
@@ -6,7 +6,7 @@ widths and a euro number format on price columns.
 from __future__ import annotations
 
 import io
-from typing import Dict, Optional
+from typing import Any, Dict, List, Optional
 
 import pandas as pd
 
@@ -17,6 +17,24 @@ NON_MONEY_NUMERIC = {
 }
 
 
+def price_grid(matrix: List[Dict[str, Any]], per_night: bool = False) -> pd.DataFrame:
+    """Check-in x hotel price grid from `get_price_matrix` rows, Elbitat's column first.
+
+    per_night divides each stay price by its nights. Empty input gives an empty frame.
+    """
+    if not matrix:
+        return pd.DataFrame()
+    mdf = pd.DataFrame(matrix)
+    if per_night and "nights" in mdf.columns:
+        mdf["price_amount"] = (pd.to_numeric(mdf["price_amount"], errors="coerce") / mdf["nights"]).round(2)
+    order = (
+        mdf[["hotel_name", "is_self"]].drop_duplicates()
+        .sort_values(["is_self", "hotel_name"], ascending=[False, True])["hotel_name"].tolist()
+    )
+    grid = mdf.pivot_table(index="check_in", columns="hotel_name", values="price_amount", aggfunc="first")
+    return grid.reindex(columns=[c for c in order if c in grid.columns]).sort_index()
+
+
 def build_excel_report(sheets: Dict[str, Optional[pd.DataFrame]]) -> bytes:
     """Build a formatted multi-sheet .xlsx from {sheet_name: DataFrame}. Returns bytes."""
     buffer = io.BytesIO()
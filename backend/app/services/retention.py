@@ -0,0 +1,206 @@
+"""Retention for the monthly-partitioned hotel_price_observations table.
+
+`run_maintenance()` (CLI: `sync_apify.py maintain`) does, in order:
+
+* **Partitions** — creates the next few monthly partitions ahead of time.
+* **Raw payloads** — moves any legacy inline `raw_payload` into the `raw_payloads` store,
+  then unlinks payloads from observations older than RATESHOP_RAW_PAYLOAD_RETENTION_DAYS
+  and deletes stored payloads not seen since then; the normalised columns are kept.
+* **Downsampling** — past RATESHOP_DOWNSAMPLE_AFTER_DAYS, keeps one observation per hotel /
+  stay / room per ISO week (the latest one).
+* **Dropping** — with RATESHOP_OBSERVATION_RETENTION_MONTHS set, drops whole monthly
+  partitions older than that.
+
+None of the steps touch the competitor_price_daily rollup: it was built from the full
+history and stays the long-term record (recomputing it from thinned observations would
+only make it worse).
+
+Each step works one window at a time in its own transaction, so nothing holds a long lock.
+"""
+from __future__ import annotations
+
+import os
+import re
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.app.core.db import cursor
+from backend.app.services.payload_store import migrate_inline_payloads
+from backend.app.services.rate_shopping_service import bump_data_version
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+# 0 disables a step.
+RAW_PAYLOAD_RETENTION_DAYS = _int_env("RATESHOP_RAW_PAYLOAD_RETENTION_DAYS", 90)
+DOWNSAMPLE_AFTER_DAYS = _int_env("RATESHOP_DOWNSAMPLE_AFTER_DAYS", 180)
+OBSERVATION_RETENTION_MONTHS = _int_env("RATESHOP_OBSERVATION_RETENTION_MONTHS", 0)
+PARTITIONS_AHEAD_MONTHS = _int_env("RATESHOP_PARTITIONS_AHEAD_MONTHS", 3)
+
+# Days per downsampling transaction (a whole number of weeks).
+_WINDOW_DAYS = 28
+_PARTITION_RE = re.compile(r"^hotel_price_observations_(\d{4})_(\d{2})$")
+
+
+def ensure_partitions(months_ahead: int = PARTITIONS_AHEAD_MONTHS) -> int:
+    """Create monthly partitions from this month through `months_ahead`. Returns # created.
+
+    Rows of a new month already sitting in the default partition are moved into it.
+    """
+    with cursor(commit=True) as cur:
+        cur.execute(
+            "SELECT rateshop.ensure_observation_partitions(current_date, %s)", (months_ahead + 1,)
+        )
+        return int(cur.fetchone()[0] or 0)
+
+
+def downsample_cutoff(older_than_days: int = DOWNSAMPLE_AFTER_DAYS) -> Optional[date]:
+    """First day downsampling leaves alone (a Monday), or None when it is disabled."""
+    if older_than_days <= 0:
+        return None
+    cutoff = date.today() - timedelta(days=older_than_days)
+    return cutoff - timedelta(days=cutoff.weekday())  # only whole weeks
+
+
+def _oldest_observed_on(extra_where: str = "") -> Optional[date]:
+    with cursor() as cur:
+        cur.execute(f"SELECT min(observed_on) FROM rateshop.hotel_price_observations {extra_where}")
+        return cur.fetchone()[0]
+
+
+def compact_raw_payloads(older_than_days: int = RAW_PAYLOAD_RETENTION_DAYS) -> Dict[str, int]:
+    """Drop raw payloads older than the cutoff.
+
+    Returns {"unlinked": observations cleared, "purged": raw_payloads rows deleted}.
+    """
+    out = {"unlinked": 0, "purged": 0}
+    if older_than_days <= 0:
+        return out
+    cutoff = date.today() - timedelta(days=older_than_days)
+    start = _oldest_observed_on(
+        "WHERE raw_payload_hash IS NOT NULL OR raw_payload IS NOT NULL"
+    )
+    while start is not None and start < cutoff:
+        end = min(cutoff, (start.replace(day=1) + timedelta(days=32)).replace(day=1))
+        with cursor(commit=True) as cur:
+            cur.execute(
+                """
+                UPDATE rateshop.hotel_price_observations
+                SET raw_payload_hash = NULL, raw_payload = NULL
+                WHERE observed_on >= %s AND observed_on < %s
+                  AND (raw_payload_hash IS NOT NULL OR raw_payload IS NOT NULL)
+                """,
+                (start, end),
+            )
+            out["unlinked"] += cur.rowcount
+        start = end
+    # A payload last seen before the cutoff is only referenced by observations cleared above.
+    with cursor(commit=True) as cur:
+        cur.execute("DELETE FROM rateshop.raw_payloads WHERE last_seen_on < %s", (cutoff,))
+        out["purged"] = cur.rowcount
+    return out
+
+
+def downsample_weekly(older_than_days: int = DOWNSAMPLE_AFTER_DAYS) -> Dict[str, int]:
+    """Keep the latest observation per hotel/stay/room/source and ISO week past the cutoff.
+
+    Returns {"deleted", "stays"}. The daily rollup keeps its rows for the thinned days.
+    """
+    out = {"deleted": 0, "stays": 0}
+    cutoff = downsample_cutoff(older_than_days)
+    if cutoff is None:
+        return out
+    oldest = _oldest_observed_on()
+    if oldest is None:
+        return out
+    start = oldest - timedelta(days=oldest.weekday())
+    while start < cutoff:
+        end = min(cutoff, start + timedelta(days=_WINDOW_DAYS))
+        with cursor(commit=True) as cur:
+            cur.execute(
+                """
+                WITH ranked AS (
+                    SELECT id, observed_on,
+                           row_number() OVER (
+                               PARTITION BY hotel_name, check_in, nights, guests_adults,
+                                            COALESCE(room_type, ''), source,
+                                            date_trunc('week', observed_on)
+                               ORDER BY observed_on DESC, scraped_at DESC
+                           ) AS rn
+                    FROM rateshop.hotel_price_observations
+                    WHERE observed_on >= %(start)s AND observed_on < %(end)s
+                ), gone AS (
+                    DELETE FROM rateshop.hotel_price_observations o
+                    USING ranked r
+                    WHERE o.id = r.id AND o.observed_on = r.observed_on AND r.rn > 1
+                      AND o.observed_on >= %(start)s AND o.observed_on < %(end)s
+                    RETURNING o.check_in, o.nights, o.guests_adults
+                )
+                SELECT count(DISTINCT (check_in, nights, guests_adults)), count(*) FROM gone
+                """,
+                {"start": start, "end": end},
+            )
+            stays, deleted = cur.fetchone()
+            if deleted:
+                bump_data_version(cur)
+        out["stays"] += int(stays)
+        out["deleted"] += int(deleted)
+        start = end
+    return out
+
+
+def _observation_partitions() -> List[Tuple[str, date]]:
+    """(table name, first day of month) for each monthly partition, oldest first."""
+    with cursor() as cur:
+        cur.execute(
+            """
+            SELECT c.relname FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'rateshop.hotel_price_observations'::regclass
+            """
+        )
+        names = [r[0] for r in cur.fetchall()]
+    parts = []
+    for name in names:
+        m = _PARTITION_RE.match(name)
+        if m:
+            parts.append((name, date(int(m.group(1)), int(m.group(2)), 1)))
+    return sorted(parts, key=lambda p: p[1])
+
+
+def drop_old_partitions(retention_months: int = OBSERVATION_RETENTION_MONTHS) -> List[str]:
+    """Drop monthly partitions that ended more than `retention_months` ago. Returns names."""
+    if retention_months <= 0:
+        return []
+    today = date.today()
+    months = today.year * 12 + today.month - 1 - retention_months
+    keep_from = date(months // 12, months % 12 + 1, 1)
+    dropped = []
+    for name, month in _observation_partitions():
+        if month >= keep_from:
+            break
+        with cursor(commit=True) as cur:
+            cur.execute(f'DROP TABLE rateshop."{name}"')
+            bump_data_version(cur)
+        dropped.append(name)
+    return dropped
+
+
+def run_maintenance(
+    raw_payload_days: int = RAW_PAYLOAD_RETENTION_DAYS,
+    downsample_days: int = DOWNSAMPLE_AFTER_DAYS,
+    retention_months: int = OBSERVATION_RETENTION_MONTHS,
+    months_ahead: int = PARTITIONS_AHEAD_MONTHS,
+) -> Dict[str, Any]:
+    """Run every retention step; returns what each one did."""
+    summary: Dict[str, Any] = {"partitions_created": ensure_partitions(months_ahead)}
+    summary["payloads_moved"] = migrate_inline_payloads()
+    summary.update({f"payloads_{k}": v for k, v in compact_raw_payloads(raw_payload_days).items()})
+    summary.update({f"downsample_{k}": v for k, v in downsample_weekly(downsample_days).items()})
+    summary["partitions_dropped"] = drop_old_partitions(retention_months)
+    return summary
@@ -0,0 +1,532 @@
+"""Durable scrape job queue in Postgres, drained by one or more `ScrapeWorker`s.
+
+A scrape used to live in one process: `cmd_scrape` started every run, kept the pending
+ones in a dict and polled them until its deadline, so a crash or CI timeout lost track of
+everything in flight. Here each step of a scrape is a row in `rateshop.scrape_jobs`:
+
+* ``stay`` — a planned stay. Claimed in batches and started through `start_scrape_runs`
+  (dedup guard and multi-stay batching included); each Apify run started queues a
+  ``run`` job.
+* ``run`` — an Apify run in flight. Polled (one concurrent `get_runs` batch per step)
+  around its predicted finish time, backing off while it is still going; once it ends it
+  queues a ``sync`` job carrying the final run object.
+* ``sync`` — a finished run to fetch, normalise and upsert with `sync_scrape_run`.
+
+Workers claim due jobs with ``SELECT ... FOR UPDATE SKIP LOCKED`` and hold them under a
+lease (`locked_until`), so any number of worker processes or machines can share a queue,
+and a job whose worker died is picked up again once its lease expires. A reclaimed stay
+first adopts any run its previous worker already started instead of paying for a second.
+Stays are only started while fewer than RATESHOP_MAX_ACTIVE_RUNS Apify runs are in flight
+across all workers (counted from the queue under an advisory lock).
+
+Failed jobs are retried with exponential backoff up to RATESHOP_JOB_MAX_ATTEMPTS times.
+Enqueueing the same stay while it is still open is a no-op, so rerunning a crashed
+`sync_apify.py scrape --queue` resumes where it stopped.
+"""
+from __future__ import annotations
+
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from psycopg2.extras import Json, RealDictCursor, execute_values
+
+from backend.app.clients.apify_client import ApifyClient, ApifyError, TERMINAL_FAIL, TERMINAL_OK
+from backend.app.core import metrics
+from backend.app.core.db import cursor
+from backend.app.services import rate_shopping_service as rss
+from backend.app.services.poll_scheduler import POLL_MAX_BATCH, learn_run_durations, predict_run_secs
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+# Apify runs allowed in flight at once across every worker (the account's actor-run limit).
+MAX_ACTIVE_RUNS = _int_env("RATESHOP_MAX_ACTIVE_RUNS", 25)
+# How long a claimed job stays locked to its worker before others may take it over.
+JOB_LEASE_SECS = _int_env("RATESHOP_JOB_LEASE_SECS", 900)
+JOB_MAX_ATTEMPTS = _int_env("RATESHOP_JOB_MAX_ATTEMPTS", 5)
+# Finished jobs kept for inspection before `prune_finished_jobs` deletes them.
+JOB_RETENTION_DAYS = _int_env("RATESHOP_JOB_RETENTION_DAYS", 14)
+# Finished runs synced per worker step; each one streams a whole dataset.
+SYNC_BATCH = _int_env("RATESHOP_SYNC_BATCH", 4)
+
+RETRY_BASE_SECS = 30.0
+RETRY_MAX_SECS = 1800.0
+POLL_MIN_SECS = 10.0
+POLL_MAX_SECS = 120.0
+# Recompute learned run durations this often in a long-running worker.
+DURATIONS_TTL_SECS = 3600.0
+
+KINDS = ("stay", "run", "sync")
+_START_LOCK = "rateshop.scrape_jobs:start"
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+# ----------------------------------------------------------------------------
+# Enqueueing
+# ----------------------------------------------------------------------------
+def _stay_dedup_key(stay: Dict[str, Any]) -> str:
+    check_in, nights, adults, children = rss._stay_key(stay)
+    return f"{check_in.isoformat()}:{nights}:{adults}:{children}"
+
+
+_ENQUEUE_SQL = """
+    INSERT INTO rateshop.scrape_jobs (kind, dedup_key, payload, run_at, parent_id)
+    VALUES %s
+    ON CONFLICT (kind, dedup_key) WHERE status IN ('queued', 'running') DO NOTHING
+    RETURNING id
+"""
+_ENQUEUE_TEMPLATE = "(%s, %s, %s, now() + make_interval(secs => %s), %s)"
+
+
+def _enqueue(cur, jobs: List[Tuple[str, str, Dict[str, Any], float, Optional[int]]]) -> int:
+    """Insert (kind, dedup_key, payload, delay_secs, parent_id) jobs; skips open duplicates."""
+    if not jobs:
+        return 0
+    rows = [(kind, key, Json(payload), delay, parent) for kind, key, payload, delay, parent in jobs]
+    return len(execute_values(cur, _ENQUEUE_SQL, rows, template=_ENQUEUE_TEMPLATE, fetch=True))
+
+
+def enqueue_stays(stays: List[Dict[str, Any]], hotel_ids: Optional[List[int]] = None) -> int:
+    """Queue a `stay` job per {check_in, nights, adults, children}. Returns # newly queued.
+
+    A stay that already has a queued or running job is left alone.
+    """
+    jobs = []
+    for stay in stays:
+        check_in, nights, adults, children = rss._stay_key(stay)
+        payload: Dict[str, Any] = {
+            "check_in": check_in.isoformat(), "nights": nights, "adults": adults, "children": children,
+        }
+        if hotel_ids:
+            payload["hotel_ids"] = sorted(hotel_ids)
+        jobs.append(("stay", _stay_dedup_key(stay), payload, 0.0, None))
+    with cursor(commit=True) as cur:
+        return _enqueue(cur, jobs)
+
+
+# ----------------------------------------------------------------------------
+# Claiming and finishing jobs
+# ----------------------------------------------------------------------------
+_CLAIM_SQL = """
+    WITH due AS (
+        SELECT id FROM rateshop.scrape_jobs
+        WHERE kind = %(kind)s
+          AND ((status = 'queued' AND run_at <= now())
+               OR (status = 'running' AND locked_until < now()))
+        ORDER BY run_at, id
+        LIMIT %(limit)s
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE rateshop.scrape_jobs j
+    SET status = 'running',
+        locked_by = %(worker)s,
+        locked_until = now() + make_interval(secs => %(lease)s),
+        -- A lapsed lease means the previous worker died mid-job: that counts as an attempt.
+        attempts = j.attempts + (j.status = 'running')::int,
+        updated_at = now()
+    FROM due
+    WHERE j.id = due.id
+    RETURNING j.*
+"""
+
+
+def _claim(cur, kind: str, limit: int, worker_id: str, lease_secs: float) -> List[Dict[str, Any]]:
+    if limit <= 0:
+        return []
+    cur.execute(_CLAIM_SQL, {"kind": kind, "limit": limit, "worker": worker_id, "lease": lease_secs})
+    return [dict(r) for r in cur.fetchall()]
+
+
+def _finish(cur, job: Dict[str, Any], worker_id: str, result: Optional[Dict[str, Any]] = None) -> None:
+    """Mark a job done (only while this worker still holds it)."""
+    cur.execute(
+        """
+        UPDATE rateshop.scrape_jobs
+        SET status = 'done', payload = payload || %s::jsonb, locked_by = NULL, locked_until = NULL,
+            last_error = NULL, updated_at = now()
+        WHERE id = %s AND locked_by = %s AND status = 'running'
+        """,
+        (Json({"result": result} if result is not None else {}), job["id"], worker_id),
+    )
+
+
+def _requeue(cur, job: Dict[str, Any], worker_id: str, delay_secs: float,
+             payload: Optional[Dict[str, Any]] = None) -> None:
+    """Put a job back for a later step without counting an attempt (e.g. run still going)."""
+    cur.execute(
+        """
+        UPDATE rateshop.scrape_jobs
+        SET status = 'queued', run_at = now() + make_interval(secs => %s), payload = payload || %s::jsonb,
+            locked_by = NULL, locked_until = NULL, updated_at = now()
+        WHERE id = %s AND locked_by = %s AND status = 'running'
+        """,
+        (delay_secs, Json(payload or {}), job["id"], worker_id),
+    )
+
+
+def _retry_delay(attempts: int) -> float:
+    return min(RETRY_MAX_SECS, RETRY_BASE_SECS * (2 ** max(0, attempts - 1)))
+
+
+def _fail(cur, job: Dict[str, Any], worker_id: str, error: str, max_attempts: int = JOB_MAX_ATTEMPTS) -> bool:
+    """Count a failed attempt: retry with backoff, or give up after `max_attempts`.
+
+    Returns True when the job was given up on.
+    """
+    attempts = int(job["attempts"]) + 1
+    final = attempts >= max_attempts
+    cur.execute(
+        """
+        UPDATE rateshop.scrape_jobs
+        SET status = %s, attempts = %s, last_error = %s,
+            run_at = now() + make_interval(secs => %s),
+            locked_by = NULL, locked_until = NULL, updated_at = now()
+        WHERE id = %s AND locked_by = %s AND status = 'running'
+        """,
+        ("failed" if final else "queued", attempts, error[:2000], _retry_delay(attempts),
+         job["id"], worker_id),
+    )
+    return final
+
+
+def _fail_cut_off_runs(cur, db_run_ids: List[int]) -> None:
+    """Close pending pricing_scrape_runs rows whose start never got a run id back."""
+    cur.execute(
+        """
+        UPDATE rateshop.pricing_scrape_runs
+        SET status = 'failed', error_message = 'start interrupted before the run id was stored',
+            finished_at = now()
+        WHERE id = ANY(%s) AND status = 'pending' AND run_id IS NULL
+        """,
+        (db_run_ids,),
+    )
+
+
+# ----------------------------------------------------------------------------
+# Queue inspection / housekeeping
+# ----------------------------------------------------------------------------
+def queue_stats() -> Dict[str, Dict[str, int]]:
+    """{kind: {status: count}} over the whole queue."""
+    with cursor() as cur:
+        cur.execute("SELECT kind, status, count(*) FROM rateshop.scrape_jobs GROUP BY kind, status")
+        out: Dict[str, Dict[str, int]] = {kind: {} for kind in KINDS}
+        for kind, status, n in cur.fetchall():
+            out.setdefault(kind, {})[status] = int(n)
+    return out
+
+
+def open_job_count() -> int:
+    """Jobs queued or running (including ones not due yet)."""
+    with cursor() as cur:
+        cur.execute("SELECT count(*) FROM rateshop.scrape_jobs WHERE status IN ('queued', 'running')")
+        return int(cur.fetchone()[0])
+
+
+def prune_finished_jobs(days: int = JOB_RETENTION_DAYS) -> int:
+    """Delete done / failed jobs last touched more than `days` ago (0 = keep). Returns # deleted."""
+    if days <= 0:
+        return 0
+    with cursor(commit=True) as cur:
+        cur.execute(
+            """
+            DELETE FROM rateshop.scrape_jobs
+            WHERE status IN ('done', 'failed') AND updated_at < now() - make_interval(days => %s)
+            """,
+            (days,),
+        )
+        return cur.rowcount
+
+
+# ----------------------------------------------------------------------------
+# Worker
+# ----------------------------------------------------------------------------
+class ScrapeWorker:
+    """Drains the scrape job queue: starts stays, polls runs and syncs finished ones.
+
+    Safe to run several at once, in one process or many. `step()` does one round of each
+    job kind; `run()` loops over it until stopped, the deadline, or an empty queue.
+    """
+
+    def __init__(
+        self,
+        worker_id: Optional[str] = None,
+        max_active_runs: int = MAX_ACTIVE_RUNS,
+        stays_per_run: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        lease_secs: float = JOB_LEASE_SECS,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        client: Optional[ApifyClient] = None,
+    ):
+        self.worker_id = worker_id or default_worker_id()
+        self.max_active_runs = max(1, int(max_active_runs))
+        self.stays_per_run = max(1, int(stays_per_run or rss.STAYS_PER_RUN))
+        self.concurrency = concurrency
+        self.lease_secs = lease_secs
+        self.max_attempts = max(1, int(max_attempts))
+        self._client = client
+        self._durations: Optional[Dict[Any, float]] = None
+        self._durations_at = 0.0
+        self._stop = threading.Event()
+        self.totals = {"started": 0, "skipped": 0, "adopted": 0, "polled": 0, "synced": 0,
+                       "items": 0, "retried": 0, "failed": 0}
+
+    @property
+    def client(self) -> ApifyClient:
+        if self._client is None:
+            self._client = ApifyClient(actor_id=os.getenv("APIFY_ACTOR_ID"))
+        return self._client
+
+    def stop(self) -> None:
+        """Ask `run()` to return after the current step (e.g. from a signal handler)."""
+        self._stop.set()
+
+    def _predicted_secs(self, nights: Optional[int], stays: int = 1) -> float:
+        now = time.monotonic()
+        if self._durations is None or now - self._durations_at > DURATIONS_TTL_SECS:
+            self._durations, self._durations_at = learn_run_durations(), now
+        return predict_run_secs(self._durations, nights, stays)
+
+    # ------------------------------------------------------------------ stays
+    def _claim_stays(self) -> List[Dict[str, Any]]:
+        """Claim as many stays as free Apify run slots allow, serialised across workers."""
+        with cursor(commit=True, cursor_factory=RealDictCursor) as cur:
+            cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (_START_LOCK,))
+            cur.execute(
+                """
+                SELECT count(*) FILTER (WHERE kind = 'run') AS runs,
+                       count(*) FILTER (WHERE kind = 'stay' AND status = 'running'
+                                        AND locked_until >= now()) AS starting
+                FROM rateshop.scrape_jobs
+                WHERE status IN ('queued', 'running') AND kind IN ('run', 'stay')
+                """
+            )
+            row = cur.fetchone()
+            starting_runs = -(-int(row["starting"]) // self.stays_per_run)
+            slots = self.max_active_runs - int(row["runs"]) - starting_runs
+            return _claim(cur, "stay", slots * self.stays_per_run, self.worker_id, self.lease_secs)
+
+    def _adopt_started(self, jobs: List[Dict[str, Any]]) -> Dict[int, List[Dict[str, Any]]]:
+        """pricing_scrape_runs rows started for these stays since their jobs were queued.
+
+        A stay job reclaimed from a dead worker may already have its run; this lets the
+        new worker pick that run up instead of starting (and paying for) another. Rows are
+        written `pending` before their run is started, so a worker that died mid-start
+        leaves pending rows without a run id (see `start_stays`).
+        """
+        reclaimed = [j for j in jobs if j["attempts"] > 0]
+        if not reclaimed:
+            return {}
+        with cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(
+                """
+                SELECT j.id AS job_id, r.id, r.run_id, r.status
+                FROM unnest(%s::bigint[], %s::date[], %s::int[], %s::int[], %s::int[], %s::timestamptz[])
+                     AS j(id, check_in, nights, adults, children, queued_at)
+                JOIN rateshop.pricing_scrape_runs r
+                  ON r.check_in = j.check_in AND r.nights = j.nights AND r.adults = j.adults
+                 AND r.children = j.children AND r.started_at >= j.queued_at
+                WHERE r.status NOT IN ('failed', 'timed_out')
+                ORDER BY r.id
+                """,
+                (
+                    [j["id"] for j in reclaimed],
+                    [j["payload"]["check_in"] for j in reclaimed],
+                    [j["payload"]["nights"] for j in reclaimed],
+                    [j["payload"]["adults"] for j in reclaimed],
+                    [j["payload"]["children"] for j in reclaimed],
+                    [j["created_at"] for j in reclaimed],
+                ),
+            )
+            out: Dict[int, List[Dict[str, Any]]] = {}
+            for r in cur.fetchall():
+                out.setdefault(r["job_id"], []).append(dict(r))
+        return out
+
+    def _run_jobs(self, runs: Dict[str, Tuple[List[int], int]], parent: Dict[str, int]) -> List[Tuple]:
+        """`run` jobs for {apify run id: (db run ids, nights)}, first poll at the predicted finish."""
+        return [
+            ("run", apify_id, {"apify_run_id": apify_id, "db_run_ids": ids, "polls": 0},
+             self._predicted_secs(nights, len(ids)), parent.get(apify_id))
+            for apify_id, (ids, nights) in runs.items()
+        ]
+
+    def start_stays(self) -> int:
+        """Claim due stay jobs within the run limit and start their Apify runs."""
+        jobs = self._claim_stays()
+        if not jobs:
+            return 0
+        adopted = self._adopt_started(jobs)
+        to_start: List[Dict[str, Any]] = []
+        with cursor(commit=True) as cur:
+            runs: Dict[str, Tuple[List[int], int]] = {}
+            parent: Dict[str, int] = {}
+            for job in jobs:
+                rows = adopted.get(job["id"]) or []
+                cut_off = [r["id"] for r in rows if r["status"] == "pending" and not r["run_id"]]
+                if cut_off:
+                    # The dead worker got no run id back (or never sent the start): close
+                    # those rows; the stay is started again unless another row has a run.
+                    _fail_cut_off_runs(cur, cut_off)
+                    rows = [r for r in rows if r["id"] not in cut_off]
+                if not rows:
+                    to_start.append(job)
+                    continue
+                for r in rows:
+                    if r["status"] in ("running", "pending") and r["run_id"]:
+                        runs.setdefault(r["run_id"], ([], job["payload"]["nights"]))[0].append(r["id"])
+                        parent.setdefault(r["run_id"], job["id"])
+                _finish(cur, job, self.worker_id, {"adopted": [r["id"] for r in rows]})
+                self.totals["adopted"] += 1
+            _enqueue(cur, self._run_jobs(runs, parent))
+
+        # One start_scrape_runs call per hotel selection (normally just the one).
+        groups: Dict[Tuple[int, ...], List[Dict[str, Any]]] = {}
+        for job in to_start:
+            groups.setdefault(tuple(job["payload"].get("hotel_ids") or ()), []).append(job)
+        for hotel_ids, group in groups.items():
+            self._start_group(group, list(hotel_ids) or None)
+        return len(jobs)
+
+    def _start_group(self, jobs: List[Dict[str, Any]], hotel_ids: Optional[List[int]]) -> None:
+        stays = [
+            {"check_in": date.fromisoformat(j["payload"]["check_in"]), "nights": j["payload"]["nights"],
+             "adults": j["payload"]["adults"], "children": j["payload"]["children"]}
+            for j in jobs
+        ]
+        try:
+            results = rss.start_scrape_runs(
+                stays, hotel_ids=hotel_ids, concurrency=self.concurrency, stays_per_run=self.stays_per_run,
+            )
+        except Exception as exc:  # noqa: BLE001 - e.g. no hotels, DB hiccup: retry the lot
+            with cursor(commit=True) as cur:
+                for job in jobs:
+                    self._record_failure(cur, job, f"start failed: {exc}")
+            return
+
+        # start_scrape_runs returns one entry per stay, in stay order.
+        with cursor(commit=True) as cur:
+            runs: Dict[str, Tuple[List[int], int]] = {}
+            parent: Dict[str, int] = {}
+            for job, res in zip(jobs, results):
+                if res.get("error"):
+                    self._record_failure(cur, job, f"start failed: {res['error']}")
+                    continue
+                if res.get("skipped"):
+                    self.totals["skipped"] += 1
+                    _finish(cur, job, self.worker_id, {"skipped": True})
+                    continue
+                runs.setdefault(res["apify_run_id"], ([], res["nights"]))[0].append(res["db_run_id"])
+                parent.setdefault(res["apify_run_id"], job["id"])
+                self.totals["started"] += 1
+                _finish(cur, job, self.worker_id, {"db_run_id": res["db_run_id"],
+                                                   "apify_run_id": res["apify_run_id"]})
+            _enqueue(cur, self._run_jobs(runs, parent))
+
+    def _record_failure(self, cur, job: Dict[str, Any], error: str) -> None:
+        if _fail(cur, job, self.worker_id, error, self.max_attempts):
+            self.totals["failed"] += 1
+        else:
+            self.totals["retried"] += 1
+
+    # ------------------------------------------------------------------- runs
+    def poll_runs(self) -> int:
+        """Claim due run jobs, fetch their status in one batch, queue syncs for finished ones."""
+        with cursor(commit=True, cursor_factory=RealDictCursor) as cur:
+            jobs = _claim(cur, "run", POLL_MAX_BATCH, self.worker_id, self.lease_secs)
+        if not jobs:
+            return 0
+        with metrics.span("poll", items=len(jobs)):
+            runs = self.client.get_runs(
+                [j["payload"]["apify_run_id"] for j in jobs], concurrency=self.concurrency
+            )
+        self.totals["polled"] += len(jobs)
+        with cursor(commit=True) as cur:
+            syncs = []
+            for job in jobs:
+                payload = job["payload"]
+                run = runs.get(payload["apify_run_id"])
+                if isinstance(run, ApifyError) or run is None:
+                    if int(job["attempts"]) + 1 < self.max_attempts:
+                        self._record_failure(cur, job, f"poll failed: {run}")
+                        continue
+                    run = None  # out of retries: sync_scrape_run re-polls and records the failure
+                elif (run.get("status") or "").upper() not in TERMINAL_OK | TERMINAL_FAIL:
+                    polls = int(payload.get("polls") or 0)
+                    delay = min(POLL_MAX_SECS, POLL_MIN_SECS * (2 ** polls))
+                    _requeue(cur, job, self.worker_id, delay, {"polls": polls + 1})
+                    continue
+                syncs.append(("sync", payload["apify_run_id"],
+                              {"db_run_id": payload["db_run_ids"][0], "run": run}, 0.0, job["id"]))
+                _finish(cur, job, self.worker_id, {"status": (run or {}).get("status")})
+            _enqueue(cur, syncs)
+        return len(jobs)
+
+    # ------------------------------------------------------------------ syncs
+    def sync_runs(self) -> int:
+        """Claim finished runs and sync their datasets (one run at a time)."""
+        with cursor(commit=True, cursor_factory=RealDictCursor) as cur:
+            jobs = _claim(cur, "sync", SYNC_BATCH, self.worker_id, self.lease_secs)
+        for job in jobs:
+            payload = job["payload"]
+            try:
+                out = rss.sync_scrape_run(payload["db_run_id"], run=payload.get("run"))
+            except Exception as exc:  # noqa: BLE001
+                with cursor(commit=True) as cur:
+                    self._record_failure(cur, job, f"sync failed: {exc}")
+                continue
+            with cursor(commit=True) as cur:
+                if out.get("status") == "running":
+                    # The stored run object was not terminal after all, or its dataset
+                    # download broke off: try again.
+                    self._record_failure(cur, job, out.get("error") or "run still running at sync")
+                    continue
+                items = int(out.get("item_count") or 0) + sum(
+                    int(s.get("item_count") or 0) for s in (out.get("siblings") or {}).values()
+                )
+                self.totals["synced"] += 1
+                self.totals["items"] += items
+                _finish(cur, job, self.worker_id, {"status": out.get("status"), "item_count": items})
+        return len(jobs)
+
+    # ------------------------------------------------------------------- loop
+    def step(self) -> int:
+        """One round: sync finished runs, poll due runs, then start stays into free slots.
+
+        Returns the number of jobs handled.
+        """
+        return self.sync_runs() + self.poll_runs() + self.start_stays()
+
+    def run(
+        self,
+        timeout_secs: Optional[float] = None,
+        until_empty: bool = False,
+        idle_secs: float = 5.0,
+    ) -> Dict[str, int]:
+        """Drain the queue until `stop()`, the deadline, or (with `until_empty`) no open jobs.
+
+        Sleeps `idle_secs` between rounds that found nothing due. Returns the running totals.
+        """
+        deadline = time.monotonic() + timeout_secs if timeout_secs else None
+        while not self._stop.is_set():
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            if self.step():
+                continue
+            if until_empty and open_job_count() == 0:
+                break
+            wait = idle_secs if deadline is None else min(idle_secs, max(0.0, deadline - time.monotonic()))
+            self._stop.wait(wait)
+        return dict(self.totals)
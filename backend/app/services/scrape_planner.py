@@ -0,0 +1,208 @@
+"""Incremental scrape planning: refresh only the stays whose prices are likely to have moved.
+
+A full sweep rescrapes every (check_in, nights) in the horizon each time, however quiet
+the market for that stay has been. `plan_stays` instead scores each candidate stay:
+
+* **Volatility** — RMS of the day-to-day log change of the competitor median, per
+  sqrt(day) between scrape days, over the last RATESHOP_PLAN_LOOKBACK_DAYS. Read from the
+  competitor_price_daily rollup (one row per stay per scrape day, maintained from
+  hotel_price_observations) rather than the raw observations. Stays with too little
+  history borrow the median volatility of their stay length.
+* **Staleness** — days since the stay's last succeeded run; prices drift roughly like a
+  random walk, so the expected move since then is volatility x sqrt(days).
+* **Lead time** — near check-ins move more and matter more: the expected move is weighted
+  by 1 / (1 + lead_days / RATESHOP_PLAN_LEAD_SCALE_DAYS).
+
+Stays never scraped, or not scraped for RATESHOP_PLAN_MAX_AGE_DAYS, are always due. The
+rest are taken best score first while their expected move is at least
+RATESHOP_PLAN_MIN_MOVE_PCT, and everything stops at the budget, priced at the average
+cost of a recent stay run.
+"""
+from __future__ import annotations
+
+import math
+import os
+import statistics
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.app.core.db import cursor
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def _float_env(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+PLAN_LOOKBACK_DAYS = _int_env("RATESHOP_PLAN_LOOKBACK_DAYS", 28)
+PLAN_MAX_AGE_DAYS = _int_env("RATESHOP_PLAN_MAX_AGE_DAYS", 14)
+PLAN_LEAD_SCALE_DAYS = _int_env("RATESHOP_PLAN_LEAD_SCALE_DAYS", 30)
+PLAN_MIN_MOVE_PCT = _float_env("RATESHOP_PLAN_MIN_MOVE_PCT", 2.0)
+# Apify spend one smart plan may commit to; 0 = no cap (the min-move threshold still applies).
+PLAN_BUDGET_USD = _float_env("RATESHOP_PLAN_BUDGET_USD", 0.0)
+# Assumed cost of one stay when no recent run reported its cost.
+DEFAULT_STAY_COST_USD = _float_env("RATESHOP_STAY_COST_USD", 0.05)
+# Daily volatility assumed for a stay length with no history at all.
+DEFAULT_DAILY_VOLATILITY = 0.02
+COST_HISTORY_DAYS = 30
+
+PLANS = ("full", "smart")
+
+StayKey = Tuple[date, int]  # (check_in, nights)
+
+
+def _volatilities(stays: List[Dict[str, Any]], adults: int, lookback_days: int) -> Dict[StayKey, float]:
+    """{(check_in, nights): daily volatility} for the stays with at least one price change."""
+    with cursor() as cur:
+        cur.execute(
+            """
+            WITH d AS (
+                SELECT check_in, nights, observed_on, competitor_day_median AS m,
+                       lag(competitor_day_median) OVER w AS prev_m,
+                       lag(observed_on) OVER w AS prev_on
+                FROM rateshop.competitor_price_daily
+                WHERE guests_adults = %s
+                  AND (check_in, nights) IN (SELECT * FROM unnest(%s::date[], %s::int[]))
+                  AND observed_on >= current_date - %s
+                  AND competitor_day_median > 0
+                WINDOW w AS (PARTITION BY check_in, nights ORDER BY observed_on)
+            )
+            SELECT check_in, nights,
+                   sqrt(avg(power(ln(m / prev_m), 2) / (observed_on - prev_on))) AS vol
+            FROM d
+            WHERE prev_m IS NOT NULL
+            GROUP BY check_in, nights
+            """,
+            (adults, [s["check_in"] for s in stays], [s["nights"] for s in stays], lookback_days),
+        )
+        return {(ci, n): float(vol) for ci, n, vol in cur.fetchall() if vol is not None}
+
+
+def _last_scraped(stays: List[Dict[str, Any]], adults: int, children: int) -> Dict[StayKey, date]:
+    """{(check_in, nights): date of the latest succeeded run} for the stays that have one."""
+    with cursor() as cur:
+        cur.execute(
+            """
+            SELECT check_in, nights, max(COALESCE(finished_at, started_at))::date
+            FROM rateshop.pricing_scrape_runs
+            WHERE status = 'succeeded' AND adults = %s AND children = %s
+              AND (check_in, nights) IN (SELECT * FROM unnest(%s::date[], %s::int[]))
+            GROUP BY check_in, nights
+            """,
+            (adults, children, [s["check_in"] for s in stays], [s["nights"] for s in stays]),
+        )
+        return {(ci, n): last for ci, n, last in cur.fetchall()}
+
+
+def stay_cost_usd(days: int = COST_HISTORY_DAYS) -> float:
+    """Average Apify cost of one stay row over recent runs (batch runs are already split)."""
+    with cursor() as cur:
+        cur.execute(
+            """
+            SELECT avg(cost_usd) FROM rateshop.pricing_scrape_runs
+            WHERE cost_usd IS NOT NULL AND status IN ('succeeded', 'empty')
+              AND started_at > now() - (%s || ' days')::interval
+            """,
+            (days,),
+        )
+        avg = cur.fetchone()[0]
+    return float(avg) if avg else DEFAULT_STAY_COST_USD
+
+
+def score_stays(
+    stays: List[Dict[str, Any]],
+    vols: Dict[StayKey, float],
+    last: Dict[StayKey, date],
+    today: date,
+    max_age_days: int = PLAN_MAX_AGE_DAYS,
+    lead_scale_days: int = PLAN_LEAD_SCALE_DAYS,
+) -> List[Dict[str, Any]]:
+    """One scored entry per stay: the stay plus volatility, age, expected move, score, reason."""
+    by_nights: Dict[int, List[float]] = {}
+    for (_, nights), v in vols.items():
+        by_nights.setdefault(nights, []).append(v)
+    fallback = {n: statistics.median(vs) for n, vs in by_nights.items()}
+    overall = statistics.median(vols.values()) if vols else DEFAULT_DAILY_VOLATILITY
+
+    scored = []
+    for stay in stays:
+        key = (stay["check_in"], int(stay["nights"]))
+        vol = vols.get(key, fallback.get(key[1], overall))
+        lead = max(0, (stay["check_in"] - today).days)
+        scraped = last.get(key)
+        age = (today - scraped).days if scraped else None
+        if age is None:
+            move, reason = math.inf, "never scraped"
+        else:
+            move = vol * math.sqrt(max(age, 0))
+            reason = "stale" if age >= max_age_days else "volatile"
+        scored.append({
+            **stay,
+            "volatility": round(vol, 5),
+            "days_since_scrape": age,
+            "lead_days": lead,
+            "expected_move": move,
+            "score": move / (1 + lead / max(1, lead_scale_days)),
+            "reason": reason,
+        })
+    return scored
+
+
+def plan_stays(
+    stays: List[Dict[str, Any]],
+    budget_usd: Optional[float] = None,
+    min_move_pct: float = PLAN_MIN_MOVE_PCT,
+    max_age_days: int = PLAN_MAX_AGE_DAYS,
+    lookback_days: int = PLAN_LOOKBACK_DAYS,
+    today: Optional[date] = None,
+) -> Dict[str, Any]:
+    """Pick the stays worth refreshing from a full-sweep list of {check_in, nights, adults, children}.
+
+    Returns {stays (the picks, by check-in), scores (every candidate, best first,
+    with `planned`), full_count, planned_count, cost_per_stay_usd, full_cost_usd,
+    planned_cost_usd, saved_cost_usd}.
+    """
+    today = today or date.today()
+    budget = PLAN_BUDGET_USD if budget_usd is None else budget_usd
+    cost = stay_cost_usd()
+    scored: List[Dict[str, Any]] = []
+    # History is per guest mix; a sweep normally has just one.
+    groups: Dict[Tuple[int, int], List[Dict[str, Any]]] = {}
+    for stay in stays:
+        groups.setdefault((int(stay["adults"]), int(stay.get("children") or 0)), []).append(stay)
+    for (adults, children), group in groups.items():
+        vols = _volatilities(group, adults, lookback_days)
+        last = _last_scraped(group, adults, children)
+        scored.extend(score_stays(group, vols, last, today, max_age_days))
+
+    forced = [s for s in scored if s["reason"] != "volatile"]
+    optional = [s for s in scored if s["reason"] == "volatile"]
+    forced.sort(key=lambda s: (s["days_since_scrape"] is not None, s["lead_days"]))
+    optional.sort(key=lambda s: -s["score"])
+    limit = int(budget // cost) if budget and budget > 0 else len(scored)
+    picked = 0
+    for s in forced + optional:
+        s["planned"] = picked < limit and (s["reason"] != "volatile" or s["expected_move"] * 100 >= min_move_pct)
+        picked += s["planned"]
+
+    planned = sorted((s for s in scored if s["planned"]), key=lambda s: (s["check_in"], s["nights"]))
+    full_cost, planned_cost = len(stays) * cost, picked * cost
+    return {
+        "stays": [{k: s[k] for k in ("check_in", "nights", "adults", "children")} for s in planned],
+        "scores": forced + optional,
+        "full_count": len(stays),
+        "planned_count": picked,
+        "cost_per_stay_usd": round(cost, 4),
+        "full_cost_usd": round(full_cost, 4),
+        "planned_cost_usd": round(planned_cost, 4),
+        "saved_cost_usd": round(full_cost - planned_cost, 4),
+    }
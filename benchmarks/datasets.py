@@ -0,0 +1,215 @@
+"""Deterministic synthetic data for the benchmarks.
+
+Everything is derived from fixed seeds, so two runs (or two machines) see byte-identical
+inputs. Apify items come from scripts/fake_apify_server.generate_items, i.e. the same
+booking-scraper shape the load test syncs: BENCH_HOTELS competitors per stay, every fifth
+found through a name search (the hotel plus look-alikes a name match must skip) and the
+rest through a Booking URL.
+
+Scales name row counts. In-memory cases cycle a pool of at most POOL_ITEMS distinct items
+so 1m does not need gigabytes of dicts; the observation tables written by the DB cases are
+real rows (see `observation_days`).
+"""
+from __future__ import annotations
+
+import math
+import random
+import sys
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import cycle, islice
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS_DIR = REPO_ROOT / "scripts"
+for p in (REPO_ROOT, SCRIPTS_DIR):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+import fake_apify_server  # noqa: E402
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+SEED = 20261018
+BENCH_HOTELS = 50
+SOURCE = "benchmark"
+NIGHTS = (1, 2)
+POOL_ITEMS = 10_000
+# Scrape days in the observation table of each scale (rows = stays x items per stay x days).
+OBSERVED_DAYS = {"1k": 1, "100k": 10, "1m": 30}
+# Check-ins start this far out: past RATESHOP_MAX_HORIZON_DAYS, so a scratch database's own
+# scrapes do not share stays with the benchmark's, yet within RATESHOP_OBS_LOOKBACK_DAYS.
+CHECK_IN_OFFSET_DAYS = 200
+
+_CFG = fake_apify_server.FakeApifyConfig(seed=SEED)
+ITEMS_PER_STAY = BENCH_HOTELS - BENCH_HOTELS // 5 + _CFG.search_results * (BENCH_HOTELS // 5)
+
+
+def scale_rows(scale: str) -> int:
+    try:
+        return SCALES[scale]
+    except KeyError:
+        raise ValueError(f"Unknown scale {scale!r}; expected one of {', '.join(SCALES)}") from None
+
+
+def hotel_name(i: int) -> str:
+    return f"Bench Hotel {i:03d}"
+
+
+def hotel_url(i: int) -> Optional[str]:
+    # Every fifth hotel has no Booking URL and is scraped by name search.
+    return f"https://www.booking.com/hotel/it/bench-hotel-{i:03d}.html" if i % 5 else None
+
+
+def hotels() -> List[Dict[str, Any]]:
+    """Competitor rows as list_competitor_hotels returns them, Elbitat (is_self) first."""
+    rows = [{"id": 1, "name": "Hotel Elbitat", "is_self": True,
+             "booking_url": "https://www.booking.com/hotel/it/elbitat.html"}]
+    rows += [{"id": i + 1, "name": hotel_name(i), "is_self": False, "booking_url": hotel_url(i)}
+             for i in range(1, BENCH_HOTELS + 1)]
+    return rows
+
+
+def stays(count: int, start: date) -> List[Dict[str, Any]]:
+    """`count` search params: consecutive check-ins from `start`, each at every NIGHTS."""
+    out = []
+    for k in range(count):
+        check_in = start + timedelta(days=k // len(NIGHTS))
+        nights = NIGHTS[k % len(NIGHTS)]
+        out.append({"check_in": check_in, "check_out": check_in + timedelta(days=nights),
+                    "nights": nights, "adults": 2, "children": 0, "source": SOURCE})
+    return out
+
+
+def actor_input(sp: Dict[str, Any], hotel_rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    ci, co = sp["check_in"].isoformat(), sp["check_out"].isoformat()
+    return {
+        "startUrls": [{"url": f"{h['booking_url']}?checkin={ci}&checkout={co}"}
+                      for h in hotel_rows if h.get("booking_url")],
+        "search": ", ".join(f"{h['name']} Isola d'Elba" for h in hotel_rows if not h.get("booking_url")),
+        "checkIn": ci, "checkOut": co, "currency": "EUR",
+    }
+
+
+def stay_items(sp: Dict[str, Any], hotel_rows: List[Dict[str, Any]], observed_on: date) -> List[Dict[str, Any]]:
+    """The dataset one stay's run returns on `observed_on` (prices drift day to day)."""
+    run_id = f"{sp['check_in']}:{sp['nights']}:{observed_on}"
+    return fake_apify_server.generate_items(actor_input(sp, hotel_rows), _CFG, run_id=run_id)
+
+
+def item_pool(rows: int) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """min(rows, POOL_ITEMS) distinct (search params, item) pairs."""
+    hotel_rows = [h for h in hotels() if not h["is_self"]]
+    start = date(2027, 7, 1)
+    pool: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+    for sp in stays(math.ceil(min(rows, POOL_ITEMS) / ITEMS_PER_STAY), start):
+        pool.extend((sp, item) for item in stay_items(sp, hotel_rows, start))
+    return pool[:min(rows, POOL_ITEMS)]
+
+
+def take(pool: List[Any], rows: int) -> List[Any]:
+    """`rows` entries, cycling `pool`."""
+    return list(islice(cycle(pool), rows))
+
+
+# Room prices are re-rendered in the formats seen across actors and locales.
+_PRICE_FORMATS = (
+    lambda v: v,
+    lambda v: f"€ {v:,.2f}",
+    lambda v: f"€{v:,.2f}".replace(",", " ").replace(".", ",").replace(" ", "."),  # €1.234,50
+    lambda v: f"US${v:,.0f}",
+)
+
+
+def price_texts(rows: int) -> List[Any]:
+    """Raw price fields: items' "EUR 1,234.56" strings plus room prices in mixed formats."""
+    values: List[Any] = []
+    for _, item in item_pool(rows):
+        values.append(item.get("price"))
+        for k, room in enumerate(item.get("rooms") or []):
+            price = room.get("price")
+            values.append(_PRICE_FORMATS[k % len(_PRICE_FORMATS)](price) if price else price)
+    return take(values, rows)
+
+
+def insight_rows(rows: int) -> List[Tuple[Dict[str, Any], Optional[float], bool]]:
+    """(get_insights row, median trend, self_has_other_stay) triples covering every rule."""
+    rng = random.Random(SEED)
+    out = []
+    for _ in range(rows):
+        total = rng.randint(0, BENCH_HOTELS)
+        median = round(rng.uniform(80, 400), 2) if total and rng.random() > 0.05 else None
+        elbitat = round(median * rng.uniform(0.7, 1.4), 2) if median and rng.random() > 0.1 else None
+        row = {
+            "elbitat_price": Decimal(str(elbitat)) if elbitat is not None else None,
+            "elbitat_available": rng.choice([True, True, False, None]),
+            "competitor_median": median,
+            "competitor_available_count": rng.randint(0, total) if total else 0,
+            "competitor_total_count": total,
+        }
+        trend = rng.uniform(-0.2, 0.2) if rng.random() > 0.2 else None
+        out.append((row, trend, rng.random() < 0.3))
+    return out
+
+
+def pricing_config():
+    from backend.app.agent.pricing import PricingConfig
+
+    return PricingConfig(
+        min_rate=Decimal("80.00"), max_rate=Decimal("450.00"), weekend_uplift=Decimal("15.00"),
+        undercut=Decimal("-5.00"), lead_buckets={7: Decimal("-10"), 30: Decimal("0"), 90: Decimal("10")},
+        max_change_pct=Decimal("0.20"),
+    )
+
+
+def rate_inputs(rows: int, today: date) -> List[Tuple[date, List[Decimal], Optional[Decimal]]]:
+    """(day, competitor prices, current rate) per horizon day, for recommend_rate."""
+    rng = random.Random(SEED + 1)
+    out = []
+    for k in range(rows):
+        comps = [Decimal(rng.randint(8000, 40000)).scaleb(-2) for _ in range(rng.randint(0, 8))]
+        current = Decimal(rng.randint(9000, 30000)).scaleb(-2) if rng.random() > 0.1 else None
+        out.append((today + timedelta(days=k % 365 + 1), comps, current))
+    return out
+
+
+def price_matrix(rows: int) -> List[Dict[str, Any]]:
+    """get_price_matrix-shaped rows: every hotel on consecutive check-ins, `rows` in all."""
+    rng = random.Random(SEED + 2)
+    names = [(h["name"], h["is_self"]) for h in hotels()]
+    start, observed = date(2027, 7, 1), date(2027, 6, 1)
+    days = [start + timedelta(days=k) for k in range(math.ceil(rows / len(names)))]
+    out = []
+    for k in range(rows):
+        name, is_self = names[k % len(names)]
+        nights = NIGHTS[(k // len(names)) % len(NIGHTS)]
+        available = rng.random() > 0.1
+        out.append({
+            "check_in": days[k // len(names)], "hotel_name": name, "is_self": is_self,
+            "nights": nights, "guests_adults": 2,
+            "price_amount": Decimal(rng.randint(8000, 60000)).scaleb(-2) if available else None,
+            "currency": "EUR", "available": available, "observed_on": observed,
+        })
+    return out
+
+
+def observation_days(scale: str, hotel_rows: List[Dict[str, Any]], today: date) -> Tuple[
+    List[Dict[str, Any]], List[date]
+]:
+    """(stays, scrape days) of the `scale` observation table: about SCALES[scale] rows."""
+    days = OBSERVED_DAYS[scale]
+    per_stay = len(fake_apify_server.generate_items(
+        actor_input(stays(1, today)[0], hotel_rows), _CFG
+    ))
+    n_stays = math.ceil(scale_rows(scale) / (per_stay * days))
+    observed = [today - timedelta(days=days - 1 - k) for k in range(days)]
+    return stays(n_stays, today + timedelta(days=CHECK_IN_OFFSET_DAYS)), observed
+
+
+def iter_stay_datasets(
+    stay_rows: List[Dict[str, Any]], observed: List[date], hotel_rows: List[Dict[str, Any]]
+) -> Iterator[Tuple[date, Dict[str, Any], List[Dict[str, Any]]]]:
+    """(observed_on, search params, items) for every scrape day and stay, oldest day first."""
+    for day in observed:
+        for sp in stay_rows:
+            yield day, sp, stay_items(sp, hotel_rows, day)
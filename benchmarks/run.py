@@ -0,0 +1,529 @@
+#!/usr/bin/env python
+"""Reproducible benchmarks for the pricing and rate-shopping hot paths.
+
+CPU cases time the real functions on the deterministic data in benchmarks/datasets.py:
+`_to_float_price`, `normalise_item`, `HotelMatcher`, `recommend`,
+`recommend_rate` (and `CompiledPricingPolicy.recommend_horizon`), the `price_grid` pivot
+behind `sync_apify.py report` and the Streamlit grid, and `build_excel_report`.
+
+With --db it also builds an observation table of each scale in SUPABASE_DB_URL through
+`_upsert_observations` (one call per stay, as a sync writes them) and times that, then
+`refresh_daily_rollup`, `get_insights` and `get_price_matrix` over it. Those rows use
+source "benchmark", check-ins CHECK_IN_OFFSET_DAYS out and "Bench Hotel NNN" competitors,
+and are deleted again afterwards — but point it at a scratch database and pass --yes.
+
+Each case is run --repeat times (fewer once --max-seconds is spent); a run shorter than
+--min-time (--short-min-time for cases under 10 ms a call) loops the case so short cases
+are not pure timer noise. Results carry the best and median time and a `score`: median
+time over the median of a fixed pure-Python calibration loop timed right before and after
+that case, so a baseline recorded on one machine is still a fair yardstick on another and
+slow drift of a shared machine cancels out.
+
+Every result is compared with the baseline, but gating is opt-in: only with --gate-scales
+does a case whose score exceeds the baseline's by more than --threshold fail the run
+(exit 1), and only if it is timed again and still exceeds it (--confirm).
+
+Usage
+-----
+  python benchmarks/run.py                               # CPU cases at 1k and 100k vs baseline.json
+  python benchmarks/run.py --gate-scales 100k            # exit 1 on a confirmed 100k regression
+  python benchmarks/run.py --scales 1k,100k,1m --json results.json
+  python benchmarks/run.py --cases normalise_item,price_grid --repeat 10
+  python benchmarks/run.py --db --yes --scales 1k,100k   # plus the Postgres paths (scratch DB!)
+  python benchmarks/run.py --save-baseline               # record these numbers as the baseline
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BENCH_DIR = Path(__file__).resolve().parent
+if str(BENCH_DIR) not in sys.path:
+    sys.path.insert(0, str(BENCH_DIR))
+
+import datasets  # noqa: E402  (also puts the repo root and scripts/ on sys.path)
+
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+DEFAULT_SCALES = "1k,100k"
+DEFAULT_GATE_SCALES = "none"
+DEFAULT_THRESHOLD = 0.25
+# A case faster than this per call loops for --short-min-time instead of --min-time.
+SHORT_CASE_S = 0.01
+RESULTS_VERSION = 1
+TODAY = date(2027, 6, 1)  # fixed "today" for lead-time rules, so results never drift with the date
+
+
+# ------------------------------------------------------------------ CPU cases
+# Each setup takes a row count and returns the callable to time; building inputs is untimed.
+def _to_float_price(rows: int) -> Callable[[], None]:
+    from backend.app.services import rate_shopping_service as rss
+
+    values = datasets.price_texts(rows)
+
+    def run() -> None:
+        rss._parse_price_text.cache_clear()  # each run starts cold, like a fresh sync process
+        for v in values:
+            rss._to_float_price(v)
+    return run
+
+
+def _normalise_item(rows: int) -> Callable[[], None]:
+    from backend.app.services import rate_shopping_service as rss
+
+    pairs = datasets.take(datasets.item_pool(rows), rows)
+
+    def run() -> None:
+        for sp, item in pairs:
+            rss.normalise_item(item, search_params=sp, default_currency="EUR")
+    return run
+
+
+def _observations(rows: int) -> List[Any]:
+    from backend.app.services import rate_shopping_service as rss
+
+    pool = [rss.normalise_item(item, search_params=sp, default_currency="EUR")
+            for sp, item in datasets.item_pool(rows)]
+    return datasets.take([o for o in pool if o is not None], rows)
+
+
+def _hotel_matcher(rows: int) -> Callable[[], None]:
+    from backend.app.services import rate_shopping_service as rss
+
+    hotel_rows, observations = datasets.hotels(), _observations(rows)
+
+    def run() -> None:
+        matcher = rss.HotelMatcher(hotel_rows)  # built once per sync, so once per run
+        for obs in observations:
+            matcher.match(obs)
+    return run
+
+
+def _recommend(rows: int) -> Callable[[], None]:
+    from backend.app.services import rate_shopping_service as rss
+
+    data = datasets.take(datasets.insight_rows(min(rows, datasets.POOL_ITEMS)), rows)
+
+    def run() -> None:
+        for row, trend, self_other in data:
+            rss.recommend(row, trend, self_has_other_stay=self_other)
+    return run
+
+
+def _recommend_rate(rows: int) -> Callable[[], None]:
+    from backend.app.agent.pricing import recommend_rate
+
+    cfg = datasets.pricing_config()
+    data = datasets.take(datasets.rate_inputs(min(rows, datasets.POOL_ITEMS), TODAY), rows)
+
+    def run() -> None:
+        for day, comps, current in data:
+            recommend_rate(day, comps, current, cfg, today=TODAY)
+    return run
+
+
+def _recommend_horizon(rows: int) -> Callable[[], None]:
+    from backend.app.agent.pricing import CompiledPricingPolicy
+
+    policy = CompiledPricingPolicy(datasets.pricing_config())
+    data = datasets.take(datasets.rate_inputs(min(rows, datasets.POOL_ITEMS), TODAY), rows)
+    days = [d for d, _, _ in data]
+    lowest = [min(comps) if comps else None for _, comps, _ in data]
+    current = [c for _, _, c in data]
+
+    def run() -> None:
+        policy.recommend_horizon(days, lowest, current, today=TODAY)
+    return run
+
+
+def _price_grid(rows: int) -> Callable[[], None]:
+    from backend.app.services.report_export import price_grid
+
+    matrix = datasets.price_matrix(rows)
+
+    def run() -> None:
+        price_grid(matrix, per_night=True)
+    return run
+
+
+def _excel_report(rows: int) -> Callable[[], None]:
+    import pandas as pd
+
+    from backend.app.services import rate_shopping_service as rss
+    from backend.app.services.report_export import build_excel_report, price_grid
+
+    # The two sheets `sync_apify.py report --xlsx-out` writes: `rows` insights rows and the
+    # grid pivoted from a `rows`-row price matrix.
+    start = TODAY + timedelta(days=1)
+    comparison = pd.DataFrame([
+        {"check_in": start + timedelta(days=k // 2), "nights": 1 + k % 2, "guests_adults": 2,
+         **row, "median_trend_pct": round(trend * 100, 1) if trend is not None else None,
+         "recommendation": rss.recommend(row, trend, self_has_other_stay=self_other)}
+        for k, (row, trend, self_other) in enumerate(
+            datasets.take(datasets.insight_rows(min(rows, datasets.POOL_ITEMS)), rows)
+        )
+    ])
+    grid = price_grid(datasets.price_matrix(rows), per_night=True)
+
+    def run() -> None:
+        build_excel_report({"Elbitat vs competitors": comparison, "Price per hotel": grid})
+    return run
+
+
+# name -> (setup, largest scale it runs at or None for all). Excel output past 100k rows
+# is far beyond any real report.
+CPU_CASES: Dict[str, Tuple[Callable[[int], Callable[[], None]], Optional[str]]] = {
+    "to_float_price": (_to_float_price, None),
+    "normalise_item": (_normalise_item, None),
+    "hotel_matcher": (_hotel_matcher, None),
+    "recommend": (_recommend, None),
+    "recommend_rate": (_recommend_rate, None),
+    "recommend_horizon": (_recommend_horizon, None),
+    "price_grid": (_price_grid, None),
+    "excel_report": (_excel_report, "100k"),
+}
+DB_CASES = ("db_upsert", "db_rollup", "db_insights", "db_price_matrix")
+
+
+# --------------------------------------------------------------------- timing
+def _calibrate(repeat: int = 7) -> List[float]:
+    """Times of `repeat` runs of a fixed pure-Python workload (dicts, ints, strings, sorting)."""
+    def work() -> int:
+        d: Dict[int, int] = {}
+        for i in range(300_000):
+            k = i % 997
+            d[k] = d.get(k, 0) + i * 3 // 7
+        return len(sorted(str(v) for v in d.values()))
+
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        work()
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def _measure(
+    run: Callable[[], Any], repeat: int, min_time: float, max_seconds: float, short_min_time: float = 0.0
+) -> List[float]:
+    """Per-call seconds of up to `repeat` timed runs, each looping `run` to last >= min_time.
+
+    A case under SHORT_CASE_S per call loops for `short_min_time` (if longer) instead.
+    """
+    t0 = time.perf_counter()
+    run()  # warm-up: imports, caches of the code under test aside
+    first = time.perf_counter() - t0
+    if first < SHORT_CASE_S:
+        min_time = max(min_time, short_min_time)
+    loops = max(1, math.ceil(min_time / first)) if first > 0 else 1
+    times: List[float] = []
+    spent = first
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            run()
+        elapsed = time.perf_counter() - t0
+        times.append(elapsed / loops)
+        spent += elapsed
+        if spent > max_seconds:
+            break
+    return times
+
+
+def _time_case(
+    setup: Callable[[int], Callable[[], None]], rows: int, args: argparse.Namespace
+) -> Tuple[List[float], float]:
+    """(per-call times, median calibration time around them) for one CPU case."""
+    run = setup(rows)
+    calibration = _calibrate(3)
+    times = _measure(run, args.repeat, args.min_time, args.max_seconds, args.short_min_time)
+    return times, statistics.median(calibration + _calibrate(3))
+
+
+def _result(case: str, scale: str, rows: int, times: List[float], calibration: float) -> Dict[str, Any]:
+    best, median = min(times), statistics.median(times)
+    return {
+        "case": case,
+        "scale": scale,
+        "rows": rows,
+        "runs": len(times),
+        "best_s": round(best, 6),
+        "median_s": round(median, 6),
+        "us_per_row": round(best / rows * 1e6, 3) if rows else None,
+        "rows_per_s": round(rows / best, 1) if best else None,
+        "calibration_s": round(calibration, 6),
+        "score": round(median / calibration, 4),
+    }
+
+
+# ----------------------------------------------------------------------- DB
+def _db_cleanup(start: date) -> None:
+    """Delete benchmark observations, payloads, runs and rollup rows left on the database."""
+    from backend.app.core.db import cursor
+
+    with cursor(commit=True) as cur:
+        cur.execute(
+            """
+            DELETE FROM rateshop.raw_payloads p USING rateshop.hotel_price_observations o
+            WHERE o.source = %s AND p.hash = o.raw_payload_hash
+            """,
+            (datasets.SOURCE,),
+        )
+        cur.execute("DELETE FROM rateshop.hotel_price_observations WHERE source = %s", (datasets.SOURCE,))
+        cur.execute("DELETE FROM rateshop.pricing_scrape_runs WHERE actor_id = %s", (datasets.SOURCE,))
+        cur.execute(
+            """
+            DELETE FROM rateshop.competitor_price_daily d
+            WHERE d.check_in >= %s AND NOT EXISTS (
+                SELECT 1 FROM rateshop.hotel_price_observations o
+                WHERE o.check_in = d.check_in AND o.nights = d.nights
+                  AND o.guests_adults = d.guests_adults
+            )
+            """,
+            (start,),
+        )
+
+
+def _db_hotels(rss) -> List[Dict[str, Any]]:
+    rss.seed_competitor_hotels([
+        {"name": datasets.hotel_name(i), "location": "Isola d'Elba", "booking_url": datasets.hotel_url(i),
+         "notes": "synthetic (benchmarks/run.py)"}
+        for i in range(1, datasets.BENCH_HOTELS + 1)
+    ])
+    wanted = {datasets.hotel_name(i).lower() for i in range(1, datasets.BENCH_HOTELS + 1)}
+    return [h for h in rss.list_competitor_hotels()
+            if h["is_self"] or h["name"].strip().lower() in wanted]
+
+
+def _run_db(scale: str, args: argparse.Namespace, calibration: float) -> List[Dict[str, Any]]:
+    from backend.app.services import rate_shopping_service as rss
+
+    today = date.today()
+    window_start = today + timedelta(days=datasets.CHECK_IN_OFFSET_DAYS)
+    _db_cleanup(window_start)
+    hotel_rows = _db_hotels(rss)
+    stay_rows, observed = datasets.observation_days(scale, hotel_rows, today)
+    matcher = rss.HotelMatcher(rss.list_competitor_hotels())
+    run_ids = {day: rss._insert_run(datasets.SOURCE, None, "succeeded", stay_rows[0]) for day in observed}
+
+    results = []
+    try:
+        upsert_s, written = 0.0, 0
+        for day, sp, items in datasets.iter_stay_datasets(stay_rows, observed, hotel_rows):
+            observations = list(rss.normalise_items(items, sp, default_currency="EUR"))
+            t0 = time.perf_counter()
+            out = rss._upsert_observations(run_ids[day], observations, matcher, observed_on=day)
+            upsert_s += time.perf_counter() - t0
+            written += out["inserted"] + out["updated"]
+        results.append(_result("db_upsert", scale, written, [upsert_s], calibration))
+
+        # Read paths are idempotent, so they are timed like the CPU cases.
+        stay_keys = [(sp["check_in"], sp["nights"], sp["adults"]) for sp in stay_rows]
+        end = stay_rows[-1]["check_in"]
+        reads = {
+            "db_rollup": lambda: rss.refresh_daily_rollup(stay_keys, since=observed[0]),
+            "db_insights": lambda: rss.get_insights(window_start, end),
+            "db_price_matrix": lambda: rss.get_price_matrix(window_start, end),
+        }
+        for case, run in reads.items():
+            if case in args.case_set:
+                times = _measure(run, args.repeat, args.min_time, args.max_seconds, args.short_min_time)
+                results.append(_result(case, scale, written, times, calibration))
+    finally:
+        if not args.keep_data:
+            _db_cleanup(window_start)
+    return [r for r in results if r["case"] in args.case_set]
+
+
+# ----------------------------------------------------------------- reporting
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                             capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], threshold: float, gate_scales: Optional[set] = None
+) -> List[Dict[str, Any]]:
+    """One row per result that also has a baseline: score change and whether it regressed.
+
+    Only results at `gate_scales` (None: all) can count as regressed.
+    """
+    rows = []
+    for key, res in results["results"].items():
+        base = baseline.get("results", {}).get(key)
+        if not base or not base.get("score"):
+            continue
+        change = res["score"] / base["score"] - 1
+        gated = gate_scales is None or res["scale"] in gate_scales
+        rows.append({"key": key, "baseline_score": base["score"], "score": res["score"],
+                     "change": round(change, 4), "gated": gated, "regressed": gated and change > threshold})
+    return rows
+
+
+def _confirm_regressions(
+    comparison: List[Dict[str, Any]], results: Dict[str, Any], baseline: Dict[str, Any], args: argparse.Namespace
+) -> None:
+    """Time each regressed CPU case again (--confirm times); it stays regressed only if every retry is too."""
+    for c in comparison:
+        res = results["results"][c["key"]]
+        if not c["regressed"] or res["case"] not in CPU_CASES:
+            continue
+        for attempt in range(args.confirm):
+            print(f"  {c['key']} regressed {c['change']:+.0%}; timing it again ({attempt + 1}/{args.confirm}) ...",
+                  flush=True)
+            times, calibration = _time_case(CPU_CASES[res["case"]][0], res["rows"], args)
+            retry = _result(res["case"], res["scale"], res["rows"], times, calibration)
+            change = retry["score"] / c["baseline_score"] - 1
+            c.setdefault("retry_changes", []).append(round(change, 4))
+            if change <= args.threshold:
+                c["regressed"] = False
+                break
+
+
+def _print_results(results: Dict[str, Any], comparison: List[Dict[str, Any]]) -> None:
+    changes = {c["key"]: c for c in comparison}
+    print(f"\n{'case':<18} {'scale':>6} {'rows':>9} {'runs':>5} {'best s':>10} {'median s':>10} "
+          f"{'us/row':>9} {'rows/s':>12} {'score':>9} {'vs base':>8}")
+    for key, r in results["results"].items():
+        c = changes.get(key)
+        vs = f"{c['change']:+.0%}{' !' if c['regressed'] else ''}" if c else "-"
+        print(f"{r['case']:<18} {r['scale']:>6} {r['rows']:>9} {r['runs']:>5} {r['best_s']:>10.4f} "
+              f"{r['median_s']:>10.4f} "
+              f"{r['us_per_row'] if r['us_per_row'] is not None else '':>9} "
+              f"{r['rows_per_s'] or '':>12} {r['score']:>9.3f} {vs:>8}")
+
+
+def main() -> int:
+    all_cases = [*CPU_CASES, *DB_CASES]
+    parser = argparse.ArgumentParser(description="Benchmark the pricing and rate-shopping hot paths")
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help=f"Comma list of {', '.join(datasets.SCALES)}")
+    parser.add_argument("--cases", default=None, help="Comma list of cases (default: all)")
+    parser.add_argument("--list", action="store_true", help="List the cases and exit")
+    parser.add_argument("--db", action="store_true", help="Also run the Postgres cases (writes to SUPABASE_DB_URL)")
+    parser.add_argument("--yes", action="store_true", help="Confirm SUPABASE_DB_URL is a scratch database")
+    parser.add_argument("--keep-data", action="store_true", help="Leave the benchmark rows in the database")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Loop a case until one run lasts this long")
+    parser.add_argument("--short-min-time", type=float, default=1.0,
+                        help=f"--min-time for cases under {SHORT_CASE_S * 1000:.0f} ms a call")
+    parser.add_argument("--max-seconds", type=float, default=20.0, help="Stop repeating a case after this long")
+    parser.add_argument("--json", default=None, help="Write the results to this file")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Fail when a score is this fraction above the baseline's")
+    parser.add_argument("--gate-scales", default=DEFAULT_GATE_SCALES,
+                        help="Comma list of scales whose regressions fail the run ('all', or 'none' to only report)")
+    parser.add_argument("--confirm", type=int, default=2,
+                        help="Times a regressed case is re-timed; it fails only if every retry regresses too")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Merge these results into --baseline instead of comparing")
+    args = parser.parse_args()
+
+    if args.list:
+        for name in all_cases:
+            print(name)
+        return 0
+    scales = [s.strip() for s in args.scales.split(",") if s.strip()]
+    for s in scales:
+        datasets.scale_rows(s)  # validates
+    args.case_set = set(all_cases if not args.cases else [c.strip() for c in args.cases.split(",") if c.strip()])
+    unknown = args.case_set - set(all_cases)
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(sorted(unknown))}")
+    if args.db and not args.yes:
+        print("--db writes synthetic hotels, runs and observations to SUPABASE_DB_URL. "
+              "Point it at a scratch database and rerun with --yes.")
+        return 1
+
+    calibration_times = _calibrate()
+    calibration = statistics.median(calibration_times)
+    print(f"Calibration loop: {calibration * 1000:.1f} ms")
+    results: Dict[str, Any] = {
+        "version": RESULTS_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "processor": platform.processor() or platform.machine(), "git_commit": _git_commit(),
+                    "calibration_s": round(calibration, 6)},
+        "results": {},
+    }
+    order = list(datasets.SCALES)
+    for scale in scales:
+        rows = datasets.scale_rows(scale)
+        for name, (setup, max_scale) in CPU_CASES.items():
+            if name not in args.case_set:
+                continue
+            if max_scale is not None and order.index(scale) > order.index(max_scale):
+                continue
+            print(f"  {name} @ {scale} ...", flush=True)
+            times, case_calibration = _time_case(setup, rows, args)
+            results["results"][f"{name}@{scale}"] = _result(name, scale, rows, times, case_calibration)
+        if args.db and args.case_set & set(DB_CASES):
+            print(f"  db @ {scale} ...", flush=True)
+            for r in _run_db(scale, args, calibration):
+                results["results"][f"{r['case']}@{scale}"] = r
+
+    # DB cases share the run-wide calibration: the median of both rounds, as one slow
+    # calibration on a busy machine would otherwise skew all of their scores.
+    calibration = statistics.median(calibration_times + _calibrate())
+    results["machine"]["calibration_s"] = round(calibration, 6)
+    for r in results["results"].values():
+        if r["case"] in DB_CASES:
+            r["calibration_s"] = round(calibration, 6)
+            r["score"] = round(r["median_s"] / calibration, 4)
+
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8")) if baseline_path.exists() else None
+    gate = args.gate_scales.strip()
+    gate_scales = None if gate == "all" else set() if gate == "none" else {
+        s.strip() for s in gate.split(",") if s.strip()
+    }
+    comparison = ([] if args.save_baseline or baseline is None
+                  else compare(results, baseline, args.threshold, gate_scales))
+    _confirm_regressions(comparison, results, baseline, args)
+    results["comparison"] = {"baseline": str(baseline_path), "threshold": args.threshold,
+                             "gate_scales": sorted(gate_scales) if gate_scales is not None else "all",
+                             "confirm": args.confirm,
+                             "cases": comparison}
+    _print_results(results, comparison)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\nWrote {args.json}")
+    if args.save_baseline:
+        merged = dict(baseline or {}, version=RESULTS_VERSION, created_at=results["created_at"],
+                      machine=results["machine"])
+        merged["results"] = {**(baseline or {}).get("results", {}), **results["results"]}
+        baseline_path.write_text(json.dumps(merged, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"\nSaved baseline -> {baseline_path}")
+        return 0
+    if baseline is None:
+        print(f"\nNo baseline at {baseline_path}; run with --save-baseline to record one.")
+        return 0
+
+    regressed = [c for c in comparison if c["regressed"]]
+    if regressed:
+        print(f"\n{len(regressed)} gated case(s) slower than the baseline by more than {args.threshold:.0%}:")
+        for c in regressed:
+            retries = ", ".join(f"{r:+.0%}" for r in c.get("retry_changes", []))
+            print(f"  {c['key']}: score {c['baseline_score']} -> {c['score']} ({c['change']:+.0%})"
+                  + (f", retried {retries}" if retries else ""))
+        return 1
+    gated = sum(c["gated"] for c in comparison)
+    print(f"\nNo regressions beyond {args.threshold:.0%} ({len(comparison)} case(s) compared, {gated} gated).")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
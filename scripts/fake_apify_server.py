@@ -0,0 +1,393 @@
+#!/usr/bin/env python
+"""Offline stand-in for the parts of the Apify REST API that ApifyClient uses.
+
+Serves, under `/v2`:
+
+  POST /acts/<actor>/runs          start a run (input = actor input JSON)
+  GET  /actor-runs/<run id>        run object; RUNNING until its simulated duration passes
+  GET  /datasets/<dataset id>/items  offset/limit pages + X-Apify-Pagination-Total
+
+Datasets are synthetic voyager/booking-scraper items generated from each run's input: one
+item (with a `rooms` array) per dated startUrl, and a few candidates per name search.
+Prices are deterministic per hotel and stay for a given --seed, so repeated runs look like
+a real market rather than noise. No token is checked beyond being present.
+
+Point the app at it with APIFY_API_BASE:
+
+  python scripts/fake_apify_server.py --port 8765 --run-secs 20 --failure-rate 0.05
+  APIFY_API_BASE=http://127.0.0.1:8765/v2 APIFY_TOKEN=fake python scripts/sync_apify.py scrape
+
+scripts/load_test.py starts one in-process and drives the whole pipeline through it.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import itertools
+import json
+import random
+import secrets
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+ROOM_TYPES = ["Double Room", "Twin Room", "Superior Double Room", "Junior Suite", "Family Room"]
+CANCELLATION = ["Free cancellation", "Non-refundable", "Free cancellation until 3 days before"]
+
+
+@dataclass
+class FakeApifyConfig:
+    run_secs: float = 5.0             # mean simulated run duration
+    run_jitter: float = 0.5           # +/- fraction of run_secs
+    failure_rate: float = 0.0         # share of runs that end FAILED
+    http_error_rate: float = 0.0      # share of requests answered 429 / 503 (client retries)
+    request_latency_ms: float = 0.0   # added to every response
+    rooms: int = 3                    # rooms per startUrl item
+    search_results: int = 3           # items per name search (the hotel + look-alikes)
+    extra_items: int = 0              # unrelated hotels appended to every dataset
+    sold_out_rate: float = 0.1        # share of (hotel, stay) with nothing bookable
+    cost_per_item_usd: float = 0.0025
+    seed: int = 0
+
+
+@dataclass
+class _Run:
+    id: str
+    dataset_id: str
+    actor_input: Dict[str, Any]
+    started: float
+    duration: float
+    fails: bool
+
+
+@dataclass
+class FakeApify:
+    """Server state: runs by id and per-endpoint call counts."""
+
+    config: FakeApifyConfig = field(default_factory=FakeApifyConfig)
+    runs: Dict[str, _Run] = field(default_factory=dict)
+    datasets: Dict[str, _Run] = field(default_factory=dict)
+    calls: Dict[str, int] = field(default_factory=lambda: {"start": 0, "run": 0, "dataset": 0, "errors": 0})
+    # Ids are unique per server instance so a local dataset cache never replays an old run.
+    prefix: str = field(default_factory=lambda: secrets.token_hex(3))
+    _ids: "itertools.count[int]" = field(default_factory=lambda: itertools.count(1))
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    # ----------------------------------------------------------------- runs
+    def start(self, actor_input: Dict[str, Any]) -> _Run:
+        cfg = self.config
+        with self._lock:
+            n = next(self._ids)
+            rng = random.Random(f"{cfg.seed}:{self.prefix}:{n}")
+            run = _Run(
+                id=f"fake{self.prefix}r{n}",
+                dataset_id=f"fake{self.prefix}d{n}",
+                actor_input=actor_input,
+                started=time.time(),
+                duration=max(0.0, cfg.run_secs * (1 + rng.uniform(-cfg.run_jitter, cfg.run_jitter))),
+                fails=rng.random() < cfg.failure_rate,
+            )
+            self.runs[run.id] = self.datasets[run.dataset_id] = run
+            self.calls["start"] += 1
+        return run
+
+    def run_object(self, run: _Run) -> Dict[str, Any]:
+        done = time.time() - run.started >= run.duration
+        status = ("FAILED" if run.fails else "SUCCEEDED") if done else "RUNNING"
+        obj: Dict[str, Any] = {
+            "id": run.id,
+            "actId": "fake-actor",
+            "status": status,
+            "startedAt": _iso(run.started),
+            "finishedAt": _iso(run.started + run.duration) if done else None,
+            "defaultDatasetId": run.dataset_id,
+        }
+        if done:
+            count = 0 if run.fails else item_count(run.actor_input, self.config)
+            obj["usageTotalUsd"] = round(count * self.config.cost_per_item_usd, 6)
+        return obj
+
+    def items(self, run: _Run) -> List[Dict[str, Any]]:
+        # Regenerated per request (deterministic per run) rather than held for every run.
+        return [] if run.fails else generate_items(run.actor_input, self.config, run.id)
+
+
+# ---------------------------------------------------------------- synthetic items
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _unit(*parts: Any) -> float:
+    """Deterministic number in [0, 1) from `parts`."""
+    digest = hashlib.blake2b(":".join(map(str, parts)).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2 ** 64
+
+
+def _name_from_url(url: str) -> str:
+    slug = urlparse(url).path.rstrip("/").split("/")[-1]
+    slug = slug.split(".")[0]
+    return " ".join(w.capitalize() for w in slug.replace("_", "-").split("-") if w) or "Hotel"
+
+
+def _stay_price(cfg: FakeApifyConfig, hotel: str, check_in: str, nights: int, rng: random.Random) -> float:
+    """Nightly rate * nights: a per-hotel base, summer/weekend uplift and a little noise."""
+    base = 70 + 180 * _unit(cfg.seed, hotel)
+    try:
+        d = date.fromisoformat(check_in)
+        season = 1.0 + 0.6 * max(0.0, 1 - abs(d.timetuple().tm_yday - 210) / 75)
+        weekend = 1.15 if d.weekday() in (4, 5) else 1.0
+    except ValueError:
+        season = weekend = 1.0
+    noise = 1 + rng.uniform(-0.05, 0.05)
+    return round(base * season * weekend * noise * max(1, nights), 2)
+
+
+def _item(
+    cfg: FakeApifyConfig,
+    rng: random.Random,
+    name: str,
+    url: str,
+    check_in: str,
+    check_out: str,
+    currency: str,
+) -> Dict[str, Any]:
+    try:
+        nights = (date.fromisoformat(check_out) - date.fromisoformat(check_in)).days
+    except ValueError:
+        nights = 1
+    sold_out = _unit(cfg.seed, name, check_in, check_out) < cfg.sold_out_rate
+    lead = _stay_price(cfg, name, check_in, nights, rng)
+    rooms = []
+    for k in range(cfg.rooms):
+        available = not sold_out and rng.random() > 0.15
+        rooms.append({
+            "roomType": ROOM_TYPES[k % len(ROOM_TYPES)],
+            "bedType": "1 large double bed" if k % 2 == 0 else "2 single beds",
+            "persons": 2 + (k // 3),
+            "available": available,
+            "price": round(lead * (1 + 0.2 * k), 2) if available else None,
+            "currency": currency,
+            "cancellationPolicy": CANCELLATION[k % len(CANCELLATION)],
+            "breakfast": "Breakfast included" if k % 2 else "Room only",
+        })
+    prices = [r["price"] for r in rooms if r["price"]]
+    return {
+        "name": name,
+        "type": "hotel",
+        "url": url,
+        "address": {"full": f"{rng.randint(1, 200)} Via Roma, Isola d'Elba, Italy"},
+        "stars": 2 + int(_unit(cfg.seed, name, "stars") * 4),
+        "rating": round(6 + 4 * _unit(cfg.seed, name, "rating"), 1),
+        "reviews": int(2000 * _unit(cfg.seed, name, "reviews")),
+        "checkIn": check_in,
+        "checkOut": check_out,
+        "price": f"{currency} {min(prices):,.2f}" if prices else None,
+        "currency": currency,
+        "available": bool(prices),
+        "rooms": rooms,
+        "images": [f"https://cf.bstatic.com/xdata/images/hotel/fake/{rng.randint(1, 10 ** 9)}.jpg"],
+    }
+
+
+def _search_terms(actor_input: Dict[str, Any]) -> List[str]:
+    return [t.strip() for t in (actor_input.get("search") or "").split(", ") if t.strip()]
+
+
+def item_count(actor_input: Dict[str, Any], cfg: FakeApifyConfig) -> int:
+    """len(generate_items(actor_input, cfg)), without generating them."""
+    return (len(actor_input.get("startUrls") or []) + cfg.search_results * len(_search_terms(actor_input))
+            + cfg.extra_items)
+
+
+def generate_items(actor_input: Dict[str, Any], cfg: FakeApifyConfig, run_id: str = "") -> List[Dict[str, Any]]:
+    """The dataset a booking-scraper run with `actor_input` might return."""
+    rng = random.Random(f"{cfg.seed}:{run_id}")
+    currency = actor_input.get("currency") or "EUR"
+    ci_default, co_default = actor_input.get("checkIn", ""), actor_input.get("checkOut", "")
+    items: List[Dict[str, Any]] = []
+    for start in actor_input.get("startUrls") or []:
+        url = start.get("url") if isinstance(start, dict) else str(start)
+        q = parse_qs(urlparse(url).query)
+        ci = (q.get("checkin") or [ci_default])[0]
+        co = (q.get("checkout") or [co_default])[0]
+        items.append(_item(cfg, rng, _name_from_url(url), url, ci, co, currency))
+    for term in _search_terms(actor_input):
+        # The searched hotel first, then nearby properties a name match should not pick.
+        name = term.rsplit(" Isola", 1)[0]
+        for k in range(cfg.search_results):
+            cand = name if k == 0 else f"Residence {name.split()[-1]}-{k}"
+            slug = cand.lower().replace(" ", "-")
+            url = f"https://www.booking.com/hotel/it/{slug}.html"
+            items.append(_item(cfg, rng, cand, url, ci_default, co_default, currency))
+    for k in range(cfg.extra_items):
+        name = f"Unrelated Hotel {run_id} {k}"
+        items.append(_item(cfg, rng, name, f"https://www.booking.com/hotel/it/unrelated-{k}.html",
+                           ci_default, co_default, currency))
+    return items
+
+
+# ----------------------------------------------------------------------- server
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Send headers and body in one segment; no Nagle / delayed-ACK stalls on keep-alive.
+    wbufsize = 1 << 16
+    disable_nagle_algorithm = True
+    server: "FakeApifyServer"
+
+    def log_message(self, *args: Any) -> None:  # keep load tests quiet
+        pass
+
+    def _send(self, code: int, body: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _route(self) -> Tuple[List[str], Dict[str, List[str]]]:
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        if parts[:1] == ["v2"]:
+            parts = parts[1:]
+        return parts, parse_qs(url.query)
+
+    def _prelude(self, query: Dict[str, List[str]]) -> bool:
+        """Simulated latency / throttling / auth. False when a response was already sent."""
+        state, cfg = self.server.state, self.server.state.config
+        if cfg.request_latency_ms:
+            time.sleep(cfg.request_latency_ms / 1000)
+        if not (query.get("token") or [""])[0]:
+            self._send(401, {"error": {"type": "token-not-provided", "message": "Authentication token was not provided"}})
+            return False
+        if cfg.http_error_rate and random.random() < cfg.http_error_rate:
+            with state._lock:
+                state.calls["errors"] += 1
+            code = random.choice((429, 503))
+            self._send(code, {"error": {"type": "rate-limit-exceeded" if code == 429 else "server-error",
+                                        "message": "Simulated error"}})
+            return False
+        return True
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server naming
+        parts, query = self._route()
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if not self._prelude(query):
+            return
+        if len(parts) == 3 and parts[0] == "acts" and parts[2] == "runs":
+            try:
+                actor_input = json.loads(body or b"{}")
+            except ValueError:
+                self._send(400, {"error": {"type": "invalid-input", "message": "Input is not valid JSON"}})
+                return
+            run = self.server.state.start(actor_input)
+            self._send(201, {"data": self.server.state.run_object(run)})
+            return
+        self._send(404, {"error": {"type": "page-not-found", "message": self.path}})
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        parts, query = self._route()
+        if not self._prelude(query):
+            return
+        state = self.server.state
+        if len(parts) == 2 and parts[0] == "actor-runs" and parts[1] in state.runs:
+            with state._lock:
+                state.calls["run"] += 1
+            self._send(200, {"data": state.run_object(state.runs[parts[1]])})
+            return
+        if len(parts) == 3 and parts[0] == "datasets" and parts[2] == "items":
+            run = state.datasets.get(parts[1])
+            if run is not None:
+                with state._lock:
+                    state.calls["dataset"] += 1
+                items = state.items(run)
+                offset = int((query.get("offset") or ["0"])[0])
+                limit = int((query.get("limit") or [str(len(items) or 1)])[0])
+                self._send(200, items[offset:offset + limit],
+                           {"X-Apify-Pagination-Total": str(len(items))})
+                return
+        self._send(404, {"error": {"type": "record-not-found", "message": self.path}})
+
+
+class FakeApifyServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # clients open up to APIFY_MAX_CONCURRENCY connections at once
+
+    def __init__(self, address: Tuple[str, int], state: FakeApify):
+        super().__init__(address, _Handler)
+        self.state = state
+
+    @property
+    def api_base(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v2"
+
+
+def serve_in_background(
+    config: Optional[FakeApifyConfig] = None, host: str = "127.0.0.1", port: int = 0
+) -> FakeApifyServer:
+    """Start a server on a daemon thread (port 0 = any free port); stop with .shutdown()."""
+    server = FakeApifyServer((host, port), FakeApify(config or FakeApifyConfig()))
+    threading.Thread(target=server.serve_forever, name="fake-apify", daemon=True).start()
+    return server
+
+
+def add_config_args(parser: argparse.ArgumentParser) -> None:
+    """--run-secs, --failure-rate, ... for FakeApifyConfig (shared with load_test.py)."""
+    d = FakeApifyConfig()
+    g = parser.add_argument_group("fake Apify behaviour")
+    g.add_argument("--run-secs", type=float, default=d.run_secs, help="Mean simulated run duration")
+    g.add_argument("--run-jitter", type=float, default=d.run_jitter, help="+/- fraction of --run-secs")
+    g.add_argument("--failure-rate", type=float, default=d.failure_rate, help="Share of runs ending FAILED")
+    g.add_argument("--http-error-rate", type=float, default=d.http_error_rate,
+                   help="Share of requests answered 429/503")
+    g.add_argument("--request-latency-ms", type=float, default=d.request_latency_ms,
+                   help="Delay added to every response")
+    g.add_argument("--rooms", type=int, default=d.rooms, help="Rooms per hotel item")
+    g.add_argument("--search-results", type=int, default=d.search_results, help="Items per name search")
+    g.add_argument("--extra-items", type=int, default=d.extra_items,
+                   help="Unrelated hotels appended to each dataset")
+    g.add_argument("--seed", type=int, default=d.seed)
+
+
+def config_from_args(args: argparse.Namespace) -> FakeApifyConfig:
+    return FakeApifyConfig(
+        run_secs=args.run_secs,
+        run_jitter=args.run_jitter,
+        failure_rate=args.failure_rate,
+        http_error_rate=args.http_error_rate,
+        request_latency_ms=args.request_latency_ms,
+        rooms=args.rooms,
+        search_results=args.search_results,
+        extra_items=args.extra_items,
+        seed=args.seed,
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local fake Apify API for offline testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_config_args(parser)
+    args = parser.parse_args()
+
+    server = FakeApifyServer((args.host, args.port), FakeApify(config_from_args(args)))
+    print(f"Fake Apify listening; set APIFY_API_BASE={server.api_base} (any APIFY_TOKEN)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Calls: {server.state.calls}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+"""End-to-end load test of the scrape pipeline against the offline fake Apify server.
+
+Drives start_scrape_runs -> PollScheduler / sync_scrape_run -> _upsert_observations ->
+refresh_daily_rollup -> get_insights exactly as `sync_apify.py scrape` does, but with
+Apify replaced by scripts/fake_apify_server.py (started in-process unless --api-base is
+given), and reports calls, throughput and latency per pipeline stage from the same
+core.metrics spans the CLI and /metrics expose. Stage times are exclusive (a dataset page
+fetched while waiting on the normalise pool counts as `dataset`); `start` and `poll`
+include queueing behind APIFY_MAX_CONCURRENCY, `rateshop_apify_request_seconds` does not.
+
+It WRITES to the database in SUPABASE_DB_URL: synthetic "Loadtest Hotel NNN" competitors,
+their scrape runs and observations. Point it at a scratch database and pass --yes.
+
+Usage
+-----
+  python scripts/load_test.py --yes                        # today's horizon (90 days x 1,2 nights)
+  python scripts/load_test.py --yes --scale 10 --hotels 15  # 10x the check-in dates
+  python scripts/load_test.py --yes --scale 100 --batch-size 30 --run-secs 2 --json out.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS_DIR = Path(__file__).resolve().parent
+for p in (REPO_ROOT, SCRIPTS_DIR):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+import fake_apify_server  # noqa: E402
+
+
+def _seed_hotels(rss, n: int) -> List[int]:
+    rss.seed_competitor_hotels([
+        {"name": f"Loadtest Hotel {i:03d}", "location": "Isola d'Elba",
+         "booking_url": f"https://www.booking.com/hotel/it/loadtest-hotel-{i:03d}.html"
+                        if i % 5 else None,  # every fifth hotel goes through name search
+         "notes": "synthetic (scripts/load_test.py)"}
+        for i in range(1, n + 1)
+    ])
+    wanted = {f"loadtest hotel {i:03d}" for i in range(1, n + 1)}
+    return [h["id"] for h in rss.list_competitor_hotels() if h["name"].strip().lower() in wanted]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load-test the scrape pipeline against a fake Apify")
+    parser.add_argument("--yes", action="store_true", help="Confirm SUPABASE_DB_URL is a scratch database")
+    parser.add_argument("--api-base", default=None, help="Use an already running fake server")
+    parser.add_argument("--days", type=int, default=90, help="Current horizon, before --scale")
+    parser.add_argument("--scale", type=int, default=1, help="Multiply the check-in dates (10, 100, ...)")
+    parser.add_argument("--nights", default="1,2")
+    parser.add_argument("--adults", type=int, default=2)
+    parser.add_argument("--hotels", type=int, default=15, help="Synthetic competitors to scrape")
+    parser.add_argument("--batch-size", type=int, default=None, help="Stays per Apify run")
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--timeout", type=int, default=1800, help="Poll deadline in seconds")
+    parser.add_argument("--insights-repeat", type=int, default=5)
+    parser.add_argument("--json", default=None, help="Also write the report to this file")
+    fake_apify_server.add_config_args(parser)
+    args = parser.parse_args()
+
+    if not args.yes:
+        print("This writes synthetic hotels, runs and observations to SUPABASE_DB_URL. "
+              "Point it at a scratch database and rerun with --yes.")
+        return 1
+
+    server = None
+    if args.api_base:
+        api_base = args.api_base.rstrip("/")
+    else:
+        server = fake_apify_server.serve_in_background(fake_apify_server.config_from_args(args))
+        api_base = server.api_base
+    if "apify.com" in api_base:
+        print("Refusing to load-test the real Apify API.")
+        return 1
+    # Must be set before the pipeline modules are imported (they read them at import time).
+    cache_dir = tempfile.mkdtemp(prefix="rateshop-loadtest-")
+    os.environ.update({
+        "APIFY_API_BASE": api_base,
+        "APIFY_TOKEN": "fake-load-test",
+        "APIFY_WEBHOOK_URL": "",
+        "RATESHOP_DEDUP_WINDOW_HOURS": "0",
+        "RATESHOP_DATASET_CACHE_DIR": cache_dir,
+    })
+
+    from backend.app.core import metrics
+    from backend.app.services import rate_shopping_service as rss
+    from backend.app.services.poll_scheduler import PollScheduler
+
+    try:
+        hotel_ids = _seed_hotels(rss, args.hotels)
+        nights_list = [int(n) for n in str(args.nights).split(",") if n.strip()]
+        start = date.today() + timedelta(days=1)
+        stays = [
+            {"check_in": start + timedelta(days=offset), "nights": nights,
+             "adults": args.adults, "children": 0}
+            for offset in range(args.days * max(1, args.scale))
+            for nights in nights_list
+        ]
+        print(f"{len(stays)} stays x {len(hotel_ids)} hotels against {api_base}")
+
+        t_all = time.perf_counter()
+        t0 = time.perf_counter()
+        started = rss.start_scrape_runs(
+            stays, hotel_ids=hotel_ids, concurrency=args.concurrency, stays_per_run=args.batch_size
+        )
+        start_wall = time.perf_counter() - t0
+        pending = {s["db_run_id"]: s["apify_run_id"] for s in started if s.get("apify_run_id")}
+
+        t0 = time.perf_counter()
+        # First poll at the simulated run length: no reliance on this database's run history.
+        scheduler = PollScheduler(durations={None: args.run_secs}, min_interval=max(0.5, args.run_secs / 4),
+                                  request_budget=10 * len(pending) + 100)
+        scheduler.add_many(r for r in rss._load_runs(list(pending)) if r.get("run_id"))
+        finished = scheduler.run(args.timeout)
+        sync_wall = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        end = stays[-1]["check_in"]
+        for _ in range(max(1, args.insights_repeat)):
+            rss.get_insights(start, end)
+        insights_wall = time.perf_counter() - t0
+        total_wall = time.perf_counter() - t_all
+    finally:
+        if server is not None:
+            server.shutdown()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    statuses: Dict[str, int] = {}
+    for out in finished.values():
+        statuses[out["status"]] = statuses.get(out["status"], 0) + 1
+    observations = sum(int(out.get("item_count") or 0) for out in finished.values())
+    measured = metrics.summary()
+    stage_items = measured.get("rateshop_stage_items_total", {})
+    stages: Dict[str, Dict[str, Any]] = {}
+    for name, st in measured.get("rateshop_stage_seconds", {}).items():
+        items = int(stage_items.get(name, 0))
+        stages[name] = {**st, "items": items,
+                        "items_per_s": round(items / st["total_s"], 1) if items and st["total_s"] else None}
+    report = {
+        "stays": len(stays),
+        "hotels": len(hotel_ids),
+        "apify_runs": len(set(pending.values())),
+        "stay_rows_finished": len(finished),
+        "stay_rows_unfinished": len(pending) - len(finished),
+        "statuses": statuses,
+        "observations": observations,
+        "wall_s": {"start": round(start_wall, 3), "poll_and_sync": round(sync_wall, 3),
+                   "insights": round(insights_wall, 3), "total": round(total_wall, 3)},
+        "observations_per_s": round(observations / sync_wall, 1) if sync_wall else None,
+        "stages": stages,
+        "apify_requests": measured.get("rateshop_apify_request_seconds", {}),
+        "db_queries": measured.get("rateshop_db_query_seconds", {}),
+        "db_pool": measured.get("rateshop_db_pool", {}),
+        "fake_apify_calls": server.state.calls if server is not None else None,
+        "poll_requests": scheduler.requests_made,
+    }
+
+    print(f"\nRuns: {report['apify_runs']} Apify / {len(pending)} stay rows; finished {len(finished)} "
+          f"{statuses}; observations {observations}")
+    print(f"Wall: start {start_wall:.2f}s, poll+sync {sync_wall:.2f}s, insights {insights_wall:.2f}s "
+          f"(total {total_wall:.2f}s; {report['observations_per_s']} obs/s while syncing)")
+    print(f"\n{'stage':<10} {'calls':>7} {'total s':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'items/s':>10}")
+    for name, s in sorted(stages.items(), key=lambda kv: -kv[1]["total_s"]):
+        print(f"{name:<10} {s['count']:>7} {s['total_s']:>9.3f} {s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} "
+              f"{s['max_ms']:>9.2f} {s['items_per_s'] or '':>10}")
+    slowest = sorted(report["db_queries"].items(), key=lambda kv: -kv[1]["total_s"])[:8]
+    if slowest:
+        print(f"\n{'db caller':<52} {'calls':>7} {'total s':>9} {'p95 ms':>9}")
+        for caller, q in slowest:
+            print(f"{caller:<52} {q['count']:>7} {q['total_s']:>9.3f} {q['p95_ms']:>9.2f}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2, default=str), encoding="utf-8")
+        print(f"\nWrote {args.json}")
+    return 0 if not report["stay_rows_unfinished"] else 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""Local stand-in for Apify's run-finished webhook.
+
+Posts the same payload shape Apify sends (default payload template) to the FastAPI
+receiver, with the shared secret header, so the webhook path can be exercised without a
+public URL or a real Apify run.
+
+Usage
+-----
+  python scripts/send_apify_webhook.py --run-id <apify run id>
+  python scripts/send_apify_webhook.py --run-id abc123 --status FAILED \
+      --url http://localhost:8000/webhooks/apify --secret "$APIFY_WEBHOOK_SECRET"
+
+By default the `resource` only carries id/status/defaultDatasetId; pass --fetch-run to
+embed the real run object from Apify instead (needs APIFY_TOKEN).
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict
+
+import requests
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from backend.app.services.rate_shopping_service import WEBHOOK_SECRET_HEADER  # noqa: E402
+
+EVENT_BY_STATUS = {
+    "SUCCEEDED": "ACTOR.RUN.SUCCEEDED",
+    "FAILED": "ACTOR.RUN.FAILED",
+    "ABORTED": "ACTOR.RUN.ABORTED",
+    "TIMED-OUT": "ACTOR.RUN.TIMED_OUT",
+}
+
+
+def build_payload(run: Dict[str, Any], actor_id: str = "") -> Dict[str, Any]:
+    """Apify's default webhook payload for a finished run."""
+    status = (run.get("status") or "SUCCEEDED").upper()
+    return {
+        "userId": "local-stand-in",
+        "createdAt": datetime.now(timezone.utc).isoformat(),
+        "eventType": EVENT_BY_STATUS.get(status, "ACTOR.RUN.SUCCEEDED"),
+        "eventData": {"actorId": actor_id, "actorRunId": run["id"]},
+        "resource": run,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Send a fake Apify run-finished webhook")
+    parser.add_argument("--run-id", required=True, help="Apify run id stored in pricing_scrape_runs.run_id")
+    parser.add_argument("--status", default="SUCCEEDED", choices=sorted(EVENT_BY_STATUS))
+    parser.add_argument("--dataset-id", default=None, help="defaultDatasetId to report")
+    parser.add_argument("--fetch-run", action="store_true", help="Embed the real run object from Apify")
+    parser.add_argument("--url", default=os.getenv("APIFY_WEBHOOK_URL") or "http://localhost:8000/webhooks/apify")
+    parser.add_argument("--secret", default=os.getenv("APIFY_WEBHOOK_SECRET", ""))
+    args = parser.parse_args()
+
+    if args.fetch_run:
+        from backend.app.clients.apify_client import ApifyClient
+
+        run = ApifyClient().get_run(args.run_id)
+    else:
+        run = {"id": args.run_id, "status": args.status}
+        if args.dataset_id:
+            run["defaultDatasetId"] = args.dataset_id
+
+    resp = requests.post(
+        args.url,
+        json=build_payload(run, os.getenv("APIFY_ACTOR_ID", "")),
+        headers={WEBHOOK_SECRET_HEADER: args.secret},
+        timeout=30,
+    )
+    print(f"HTTP {resp.status_code}: {resp.text[:500]}")
+    return 0 if resp.ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -8,19 +8,31 @@ Usage
 -----
   python scripts/sync_apify.py seed [--file config/competitors.yaml]
   python scripts/sync_apify.py scrape [--days 90] [--nights 1,2] [--adults 2] [--children 0]
-  python scripts/sync_apify.py sync-pending          # poll any still-running runs
+  python scripts/sync_apify.py scrape --queue ...    # same, through the durable job queue
+  python scripts/sync_apify.py scrape --plan smart [--budget-usd 2]
+                                                     # only stays whose prices likely moved
+  python scripts/sync_apify.py worker [--until-empty] # drain the job queue (run several at once)
+  python scripts/sync_apify.py sync-pending [--workers 4] [--wait 0]
+                                                     # poll + sync still-running runs in parallel
+  python scripts/sync_apify.py maintain              # partitions, payload retention, downsampling
+  python scripts/sync_apify.py renormalise [--source cache|db] [--workers N]
+                                                     # re-map stored data, no Apify cost
 
 The daily scheduled scrape:
   python scripts/sync_apify.py scrape --days 90 --nights 1,2 --adults 2
 
 Cost safeguards (horizon cap, competitor cap, duplicate-run suppression) are enforced
 inside rate_shopping_service, so this script stays thin.
+
+Every command ends by printing a JSON metrics summary (per-stage timings, DB query times by
+function, Apify request times); `--metrics-out FILE` (before the command) also saves it.
 """
 from __future__ import annotations
 
 import argparse
+import json
+import os
 import sys
-import time
 from datetime import date, timedelta
 from pathlib import Path
 
@@ -28,7 +40,9 @@ REPO_ROOT = Path(__file__).resolve().parents[1]
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
+from backend.app.core import metrics  # noqa: E402
 from backend.app.services import rate_shopping_service as rss  # noqa: E402
+from backend.app.services import renormalise, retention, scheduler, scrape_planner  # noqa: E402
 
 
 def cmd_seed(args: argparse.Namespace) -> int:
@@ -50,70 +64,183 @@ def cmd_scrape(args: argparse.Namespace) -> int:
     horizon = min(int(args.days), rss.MAX_HORIZON_DAYS)
     start = date.today() + timedelta(days=int(args.lead))
 
-    # 1) Start phase — fire one Apify run per (check-in date, nights). Dedup auto-skips.
-    pending: list[int] = []
+    # 1) Start phase — one Apify run per (check-in date, nights), or per --batch-size stays,
+    #    all started concurrently. Dedup auto-skips.
+    stays = [
+        {"check_in": start + timedelta(days=offset), "nights": nights,
+         "adults": int(args.adults), "children": int(args.children)}
+        for offset in range(horizon)
+        for nights in nights_list
+    ]
+    if args.plan == "smart":
+        plan = scrape_planner.plan_stays(
+            stays, budget_usd=float(args.budget_usd) if args.budget_usd is not None else None
+        )
+        stays = plan["stays"]
+        reasons: dict[str, int] = {}
+        for s in plan["scores"]:
+            if s["planned"]:
+                reasons[s["reason"]] = reasons.get(s["reason"], 0) + 1
+        saved_pct = plan["saved_cost_usd"] / plan["full_cost_usd"] * 100 if plan["full_cost_usd"] else 0.0
+        print(
+            f"Smart plan: {plan['planned_count']} of {plan['full_count']} stay(s) "
+            f"({', '.join(f'{n} {r}' for r, n in sorted(reasons.items())) or 'nothing due'}). "
+            f"Expected cost ${plan['planned_cost_usd']:.2f} vs ${plan['full_cost_usd']:.2f} "
+            f"for a full sweep — saves ${plan['saved_cost_usd']:.2f} ({saved_pct:.0f}%, "
+            f"at ${plan['cost_per_stay_usd']:.4f}/stay)."
+        )
+        if not stays:
+            return 0
+    if args.queue:
+        queued = scheduler.enqueue_stays(stays)
+        print(f"Queued {queued} new stay job(s) of {len(stays)} planned "
+              f"({len(stays) - queued} already queued or running).")
+        return _drain_queue(args, until_empty=True)
+
+    try:
+        results = rss.start_scrape_runs(
+            stays,
+            concurrency=int(args.concurrency) if args.concurrency else None,
+            stays_per_run=int(args.batch_size) if args.batch_size else None,
+        )
+    except Exception as exc:  # noqa: BLE001
+        print(f"  ! start failed: {exc}")
+        return 1
+    pending: dict[int, str] = {}
     started, skipped, errors = 0, 0, 0
-    for offset in range(horizon):
-        ci = start + timedelta(days=offset)
-        for nights in nights_list:
-            try:
-                res = rss.start_scrape_run(
-                    check_in=ci, nights=nights, adults=int(args.adults), children=int(args.children)
-                )
-            except Exception as exc:  # noqa: BLE001
-                errors += 1
-                print(f"  ! start failed {ci} x{nights}: {exc}")
-                continue
-            if res.get("skipped"):
-                skipped += 1
-            elif res.get("db_run_id"):
-                pending.append(res["db_run_id"])
-                started += 1
-    print(f"Started {started} run(s), skipped {skipped} (recent duplicates), {errors} start error(s).")
+    for res in results:
+        if res.get("error"):
+            errors += 1
+            print(f"  ! start failed {res['check_in']} x{res['nights']}: {res['error']}")
+        elif res.get("skipped"):
+            skipped += 1
+        elif res.get("db_run_id"):
+            pending[res["db_run_id"]] = res["apify_run_id"]
+            started += 1
+    apify_runs = len({v for v in pending.values() if v})
+    print(
+        f"Started {started} stay run(s) in {apify_runs} Apify run(s), "
+        f"skipped {skipped} (recent duplicates), {errors} start error(s)."
+    )
 
     # 2) Poll phase — sync running runs until done or the overall deadline.
-    deadline = time.monotonic() + int(args.timeout)
-    remaining = set(pending)
+    finished = rss.poll_runs(pending, timeout_secs=int(args.timeout), interval_secs=10)
     total_items, total_cost = 0, 0.0
-    while remaining and time.monotonic() < deadline:
-        for run_id in list(remaining):
-            try:
-                out = rss.sync_scrape_run(run_id)
-            except Exception as exc:  # noqa: BLE001
-                print(f"  ! sync error run {run_id}: {exc}")
-                remaining.discard(run_id)
-                continue
-            if out["status"] != "running":
-                remaining.discard(run_id)
-                total_items += int(out.get("item_count") or 0)
-                total_cost += float(out.get("cost_usd") or 0.0)
-        if remaining:
-            time.sleep(10)
+    for run_id, out in finished.items():
+        if out.get("error"):
+            print(f"  ! sync error run {run_id}: {out['error']}")
+        total_items += int(out.get("item_count") or 0)
+        total_cost += float(out.get("cost_usd") or 0.0)
+    remaining = len(pending) - len(finished)
 
     print(
-        f"Synced {len(pending) - len(remaining)}/{len(pending)} run(s). "
+        f"Synced {len(finished)}/{len(pending)} run(s). "
         f"Observations upserted: {total_items}. Approx Apify cost: ${total_cost:.4f}."
     )
     if remaining:
-        print(f"{len(remaining)} run(s) still running at deadline — rerun 'sync-pending' later.")
+        print(f"{remaining} run(s) still running at deadline — rerun 'sync-pending' later.")
     return 0
 
 
-def cmd_sync_pending(args: argparse.Namespace) -> int:
-    runs = [r for r in rss.list_recent_runs(limit=200) if r["status"] in ("running", "pending")]
-    if not runs:
-        print("No pending runs.")
-        return 0
-    done = 0
-    for r in runs:
+def _drain_queue(args: argparse.Namespace, until_empty: bool) -> int:
+    worker = scheduler.ScrapeWorker(
+        max_active_runs=int(args.max_active_runs),
+        concurrency=int(args.concurrency) if args.concurrency else None,
+        stays_per_run=int(args.batch_size) if args.batch_size else None,
+    )
+    _stop_on_signals(worker)
+    print(f"Worker {worker.worker_id} draining the scrape queue "
+          f"(max {worker.max_active_runs} Apify run(s) in flight).")
+    totals = worker.run(timeout_secs=float(args.timeout) if args.timeout else None,
+                        until_empty=until_empty)
+    print(
+        f"Started {totals['started']} stay run(s) (adopted {totals['adopted']}, "
+        f"skipped {totals['skipped']} recent duplicates). Synced {totals['synced']} Apify run(s), "
+        f"{totals['items']} observation(s) upserted. Retries: {totals['retried']}, "
+        f"failed jobs: {totals['failed']}."
+    )
+    remaining = scheduler.open_job_count()
+    if remaining:
+        print(f"{remaining} job(s) still open — any 'worker' (or a rerun) picks them up.")
+    return 0
+
+
+def _stop_on_signals(worker: scheduler.ScrapeWorker) -> None:
+    import signal
+
+    def _handler(signum, _frame):
+        print(f"Signal {signum}: finishing the current step, then stopping.")
+        worker.stop()
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
         try:
-            out = rss.sync_scrape_run(r["id"])
-            print(f"  run {r['id']}: {out['status']}")
-            if out["status"] != "running":
+            signal.signal(sig, _handler)
+        except (ValueError, OSError):  # not the main thread / unsupported platform
+            pass
+
+
+def cmd_worker(args: argparse.Namespace) -> int:
+    """Long-running queue worker; several can run at once, on any number of machines."""
+    return _drain_queue(args, until_empty=args.until_empty)
+
+
+def cmd_sync_pending(args: argparse.Namespace) -> int:
+    """Sync still-running runs, several at once; with --wait, repeat until none are left."""
+    import time
+
+    deadline = time.monotonic() + float(args.wait)
+    workers = int(args.workers) if args.workers else None
+    while True:
+        results = rss.sync_pending_runs(workers=workers)
+        if not results:
+            print("No pending runs.")
+            return 0
+        done = 0
+        for r in results:
+            if r["status"] == "error":
+                print(f"  ! run {r['run_id']}: {r.get('error')}")
+                continue
+            if r["status"] != "running":
+                print(f"  run {r['run_id']}: {r['status']}")
                 done += 1
-        except Exception as exc:  # noqa: BLE001
-            print(f"  ! run {r['id']}: {exc}")
-    print(f"Finished {done}/{len(runs)} pending run(s).")
+        running = sum(1 for r in results if r["status"] == "running")
+        print(f"Finished {done}/{len(results)} pending run(s); {running} still running.")
+        if not running or time.monotonic() + float(args.interval) > deadline:
+            return 0
+        time.sleep(float(args.interval))
+
+
+def cmd_maintain(args: argparse.Namespace) -> int:
+    """Create upcoming partitions and apply observation retention (see services/retention)."""
+    summary = retention.run_maintenance(
+        raw_payload_days=int(args.payload_days),
+        downsample_days=int(args.downsample_days),
+        retention_months=int(args.retention_months),
+    )
+    print(
+        f"Partitions created: {summary['partitions_created']}. "
+        f"Raw payloads moved out of line: {summary['payloads_moved']}, "
+        f"unlinked: {summary['payloads_unlinked']}, purged: {summary['payloads_purged']}. "
+        f"Downsampled away: {summary['downsample_deleted']} observation(s) "
+        f"across {summary['downsample_stays']} stay(s)."
+    )
+    if summary["partitions_dropped"]:
+        print("Dropped partitions: " + ", ".join(summary["partitions_dropped"]))
+    pruned = scheduler.prune_finished_jobs(int(args.job_days))
+    print(f"Finished scrape jobs pruned: {pruned}.")
+    return 0
+
+
+def cmd_renormalise(args: argparse.Namespace) -> int:
+    """Re-run normalisation + matching over cached datasets or stored raw payloads."""
+    since = date.fromisoformat(args.since) if args.since else None
+    summary = renormalise.renormalise(source=args.source, workers=int(args.workers), since=since)
+    print(
+        f"Re-normalised {summary['runs']} run(s) from {summary['source']}: "
+        f"{summary['observations']} observation(s) written, "
+        f"rollup refreshed for {summary['stays_refreshed']} stay(s)"
+        + (f" from {summary['rollup_since']}." if summary["rollup_since"] else ".")
+    )
     return 0
 
 
@@ -152,23 +279,12 @@ def cmd_report(args: argparse.Namespace) -> int:
     if args.xlsx_out:
         try:
             import pandas as pd
-            from backend.app.services.report_export import build_excel_report
+            from backend.app.services.report_export import build_excel_report, price_grid
 
             comp_df = pd.DataFrame(rows)[[c for c in cols if rows and c in rows[0]]] if rows else pd.DataFrame()
 
             matrix = rss.get_price_matrix(start_date=start, end_date=end, nights=nights)
-            grid_df = pd.DataFrame()
-            if matrix:
-                mdf = pd.DataFrame(matrix)
-                if args.per_night and "nights" in mdf.columns:
-                    mdf["price_amount"] = (pd.to_numeric(mdf["price_amount"], errors="coerce") / mdf["nights"]).round(2)
-                order = (
-                    mdf[["hotel_name", "is_self"]].drop_duplicates()
-                    .sort_values(["is_self", "hotel_name"], ascending=[False, True])["hotel_name"].tolist()
-                )
-                grid_df = mdf.pivot_table(index="check_in", columns="hotel_name",
-                                          values="price_amount", aggfunc="first")
-                grid_df = grid_df.reindex(columns=[c for c in order if c in grid_df.columns]).sort_index()
+            grid_df = price_grid(matrix, per_night=args.per_night)
 
             with open(args.xlsx_out, "wb") as f:
                 f.write(build_excel_report({
@@ -209,6 +325,8 @@ def cmd_report(args: argparse.Namespace) -> int:
 
 def main() -> int:
     parser = argparse.ArgumentParser(description="Elbitat rate-shopping CLI")
+    parser.add_argument("--metrics-out", default=None,
+                        help="Also write the end-of-command metrics summary (JSON) to this file")
     sub = parser.add_subparsers(dest="command", required=True)
 
     p_seed = sub.add_parser("seed", help="Seed competitor hotels from a YAML file")
@@ -222,11 +340,60 @@ def main() -> int:
     p_scrape.add_argument("--adults", default=2)
     p_scrape.add_argument("--children", default=0)
     p_scrape.add_argument("--timeout", default=1500, help="Max seconds to wait in the poll phase")
+    p_scrape.add_argument("--concurrency", default=None,
+                          help="Max concurrent Apify API requests (default APIFY_MAX_CONCURRENCY or 16)")
+    p_scrape.add_argument("--batch-size", default=None,
+                          help="Stays packed into one Apify run (default RATESHOP_STAYS_PER_RUN or 1)")
+    p_scrape.add_argument("--plan", choices=scrape_planner.PLANS, default="full",
+                          help="full = every date x stay length; smart = only stays likely to have moved")
+    p_scrape.add_argument("--budget-usd", default=None,
+                          help="With --plan smart: Apify spend cap (default RATESHOP_PLAN_BUDGET_USD, 0 = none)")
+    p_scrape.add_argument("--queue", action="store_true",
+                          help="Queue the stays in scrape_jobs and drain them (resumable)")
+    p_scrape.add_argument("--max-active-runs", default=scheduler.MAX_ACTIVE_RUNS,
+                          help="With --queue: Apify runs in flight across all workers")
     p_scrape.set_defaults(func=cmd_scrape)
 
+    p_worker = sub.add_parser("worker", help="Drain the durable scrape job queue")
+    p_worker.add_argument("--until-empty", action="store_true",
+                          help="Exit once no job is queued or running (default: run forever)")
+    p_worker.add_argument("--timeout", default=None, help="Exit after this many seconds")
+    p_worker.add_argument("--max-active-runs", default=scheduler.MAX_ACTIVE_RUNS,
+                          help="Apify runs in flight across all workers (RATESHOP_MAX_ACTIVE_RUNS)")
+    p_worker.add_argument("--concurrency", default=None,
+                          help="Max concurrent Apify API requests (default APIFY_MAX_CONCURRENCY or 16)")
+    p_worker.add_argument("--batch-size", default=None,
+                          help="Stays packed into one Apify run (default RATESHOP_STAYS_PER_RUN or 1)")
+    p_worker.set_defaults(func=cmd_worker)
+
     p_sync = sub.add_parser("sync-pending", help="Poll and sync any still-running runs")
+    p_sync.add_argument("--workers", default=None,
+                        help="Runs synced in parallel (default RATESHOP_SYNC_WORKERS or 4; 1 = serial)")
+    p_sync.add_argument("--wait", default=0,
+                        help="Keep re-checking still-running runs for up to this many seconds")
+    p_sync.add_argument("--interval", default=30, help="Seconds between passes with --wait")
     p_sync.set_defaults(func=cmd_sync_pending)
 
+    p_maint = sub.add_parser("maintain", help="Create partitions and apply observation retention")
+    p_maint.add_argument("--payload-days", default=retention.RAW_PAYLOAD_RETENTION_DAYS,
+                         help="Clear raw payloads older than this (0 = keep)")
+    p_maint.add_argument("--downsample-days", default=retention.DOWNSAMPLE_AFTER_DAYS,
+                         help="Keep one observation per week past this age (0 = keep all)")
+    p_maint.add_argument("--retention-months", default=retention.OBSERVATION_RETENTION_MONTHS,
+                         help="Drop monthly partitions older than this (0 = keep forever)")
+    p_maint.add_argument("--job-days", default=scheduler.JOB_RETENTION_DAYS,
+                         help="Delete finished scrape jobs older than this (0 = keep)")
+    p_maint.set_defaults(func=cmd_maintain)
+
+    p_renorm = sub.add_parser("renormalise", help="Re-normalise stored data without re-scraping")
+    p_renorm.add_argument("--source", choices=renormalise.SOURCES, default="cache",
+                          help="cache = local dataset cache, db = stored raw payloads")
+    p_renorm.add_argument("--workers", default=os.cpu_count() or 1,
+                          help="Processes normalising in parallel (default: CPU count)")
+    p_renorm.add_argument("--since", default=None,
+                          help="Only runs finished / observed on or after this date (YYYY-MM-DD)")
+    p_renorm.set_defaults(func=cmd_renormalise)
+
     p_report = sub.add_parser("report", help="Write a CSV + text summary of current insights")
     p_report.add_argument("--days", default=90)
     p_report.add_argument("--nights", default="2")
@@ -237,7 +404,21 @@ def main() -> int:
     p_report.set_defaults(func=cmd_report)
 
     args = parser.parse_args()
-    return args.func(args)
+    try:
+        return args.func(args)
+    finally:
+        _report_metrics(args.metrics_out)
+
+
+def _report_metrics(path: str | None) -> None:
+    """Per-stage timings, DB query times and Apify calls for this command, as JSON."""
+    summary = metrics.summary()
+    if not summary:
+        return
+    text = json.dumps(summary, indent=2, sort_keys=True)
+    if path:
+        Path(path).write_text(text + "\n", encoding="utf-8")
+    print("\nMetrics:\n" + text)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,20 @@
+-- Stay columns on pricing_scrape_runs so the duplicate-run guard can use an index
+-- instead of casting search_params JSONB on every row.
+
+ALTER TABLE rateshop.pricing_scrape_runs
+    ADD COLUMN IF NOT EXISTS check_in date,
+    ADD COLUMN IF NOT EXISTS nights   int,
+    ADD COLUMN IF NOT EXISTS adults   int,
+    ADD COLUMN IF NOT EXISTS children int;
+
+UPDATE rateshop.pricing_scrape_runs
+SET check_in = (search_params->>'check_in')::date,
+    nights   = (search_params->>'nights')::int,
+    adults   = (search_params->>'adults')::int,
+    children = COALESCE((search_params->>'children')::int, 0)
+WHERE check_in IS NULL
+  AND search_params ? 'check_in';
+
+CREATE INDEX IF NOT EXISTS ix_scrape_runs_succeeded_stay
+    ON rateshop.pricing_scrape_runs (check_in, nights, adults, children, started_at DESC)
+    WHERE status = 'succeeded';
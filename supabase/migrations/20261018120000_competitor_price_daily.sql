@@ -0,0 +1,112 @@
+-- Daily rollup of competitor price statistics, one row per stay per scrape day.
+--
+-- For each (check_in, nights, guests_adults, observed_on) it holds the market as of that
+-- day: every hotel's latest observation on or before observed_on (the same snapshot the
+-- pricing_insights view takes for "now"), plus the competitor median of that day's own
+-- observations for the trend. sync_scrape_run refreshes just the stays a run touched, so
+-- insights and trends read a handful of precomputed rows instead of raw observations.
+
+CREATE TABLE IF NOT EXISTS rateshop.competitor_price_daily (
+    check_in                   date    NOT NULL,
+    nights                     int     NOT NULL,
+    guests_adults              int     NOT NULL,
+    observed_on                date    NOT NULL,
+    competitor_min             numeric(10,2),
+    competitor_median          double precision,
+    competitor_max             numeric(10,2),
+    competitor_available_count int     NOT NULL DEFAULT 0,
+    competitor_total_count     int     NOT NULL DEFAULT 0,
+    elbitat_price              numeric(10,2),
+    elbitat_available          boolean,
+    elbitat_position           text GENERATED ALWAYS AS (
+        CASE
+            WHEN elbitat_price IS NULL OR competitor_median IS NULL THEN NULL
+            WHEN elbitat_price > competitor_median THEN 'above'
+            WHEN elbitat_price < competitor_median THEN 'below'
+            ELSE 'at'
+        END
+    ) STORED,
+    -- Only observations scraped on observed_on itself:
+    competitor_day_count       int     NOT NULL DEFAULT 0,
+    competitor_day_median      double precision,
+    elbitat_day_priced         boolean NOT NULL DEFAULT false,
+    updated_at                 timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (check_in, nights, guests_adults, observed_on)
+);
+
+ALTER TABLE rateshop.competitor_price_daily ENABLE ROW LEVEL SECURITY;
+
+-- Recompute the rollup rows of the given stays for every scrape day >= since.
+CREATE OR REPLACE FUNCTION rateshop.refresh_competitor_price_daily(
+    p_check_in date[], p_nights int[], p_adults int[], p_since date DEFAULT '-infinity'
+) RETURNS int
+LANGUAGE sql AS $$
+    WITH stays AS (
+        SELECT DISTINCT * FROM unnest(p_check_in, p_nights, p_adults) AS s(check_in, nights, guests_adults)
+    ), per_day AS (
+        SELECT o.check_in, o.nights, o.guests_adults, o.observed_on,
+               count(*) FILTER (WHERE NOT o.is_self) AS day_count,
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY o.price_amount)
+                   FILTER (WHERE NOT o.is_self AND o.available IS NOT FALSE) AS day_median,
+               bool_or(o.is_self AND o.price_amount IS NOT NULL) AS self_priced
+        FROM rateshop.hotel_price_observations o
+        JOIN stays s USING (check_in, nights, guests_adults)
+        WHERE o.observed_on >= p_since
+        GROUP BY o.check_in, o.nights, o.guests_adults, o.observed_on
+    ), snapshot AS (
+        SELECT d.check_in, d.nights, d.guests_adults, d.observed_on, l.is_self, l.price_amount, l.available
+        FROM per_day d
+        CROSS JOIN LATERAL (
+            SELECT DISTINCT ON (o.hotel_name) o.is_self, o.price_amount, o.available
+            FROM rateshop.hotel_price_observations o
+            WHERE o.check_in = d.check_in AND o.nights = d.nights
+              AND o.guests_adults = d.guests_adults AND o.observed_on <= d.observed_on
+            ORDER BY o.hotel_name, o.observed_on DESC, o.scraped_at DESC
+        ) l
+    ), stats AS (
+        SELECT check_in, nights, guests_adults, observed_on,
+               min(price_amount) FILTER (WHERE NOT is_self AND available IS NOT FALSE) AS competitor_min,
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY price_amount)
+                   FILTER (WHERE NOT is_self AND available IS NOT FALSE) AS competitor_median,
+               max(price_amount) FILTER (WHERE NOT is_self AND available IS NOT FALSE) AS competitor_max,
+               count(*) FILTER (WHERE NOT is_self AND available IS NOT FALSE) AS competitor_available_count,
+               count(*) FILTER (WHERE NOT is_self) AS competitor_total_count,
+               min(price_amount) FILTER (WHERE is_self) AS elbitat_price,
+               bool_or(available) FILTER (WHERE is_self) AS elbitat_available
+        FROM snapshot
+        GROUP BY check_in, nights, guests_adults, observed_on
+    ), upserted AS (
+        INSERT INTO rateshop.competitor_price_daily AS r (
+            check_in, nights, guests_adults, observed_on,
+            competitor_min, competitor_median, competitor_max,
+            competitor_available_count, competitor_total_count,
+            elbitat_price, elbitat_available,
+            competitor_day_count, competitor_day_median, elbitat_day_priced, updated_at
+        )
+        SELECT s.check_in, s.nights, s.guests_adults, s.observed_on,
+               s.competitor_min, s.competitor_median, s.competitor_max,
+               s.competitor_available_count, s.competitor_total_count,
+               s.elbitat_price, s.elbitat_available,
+               d.day_count, d.day_median, coalesce(d.self_priced, false), now()
+        FROM stats s
+        JOIN per_day d USING (check_in, nights, guests_adults, observed_on)
+        ON CONFLICT (check_in, nights, guests_adults, observed_on) DO UPDATE SET
+            competitor_min = EXCLUDED.competitor_min,
+            competitor_median = EXCLUDED.competitor_median,
+            competitor_max = EXCLUDED.competitor_max,
+            competitor_available_count = EXCLUDED.competitor_available_count,
+            competitor_total_count = EXCLUDED.competitor_total_count,
+            elbitat_price = EXCLUDED.elbitat_price,
+            elbitat_available = EXCLUDED.elbitat_available,
+            competitor_day_count = EXCLUDED.competitor_day_count,
+            competitor_day_median = EXCLUDED.competitor_day_median,
+            elbitat_day_priced = EXCLUDED.elbitat_day_priced,
+            updated_at = EXCLUDED.updated_at
+        RETURNING 1
+    )
+    SELECT count(*)::int FROM upserted;
+$$;
+
+-- Backfill from existing history.
+SELECT rateshop.refresh_competitor_price_daily(array_agg(check_in), array_agg(nights), array_agg(guests_adults))
+FROM (SELECT DISTINCT check_in, nights, guests_adults FROM rateshop.hotel_price_observations) s;
@@ -0,0 +1,142 @@
+-- Partition hotel_price_observations by month of observed_on.
+--
+-- The table is rebuilt as a RANGE-partitioned table with the same columns, defaults,
+-- indexes, foreign keys and dependent views; existing rows are copied across. Monthly
+-- partitions keep insert speed, index size and latest-per-hotel scans flat as history
+-- grows, and let retention drop whole months (see services/retention.py).
+-- Run inside one transaction; expect a brief lock on the table while rows are copied.
+
+BEGIN;
+
+ALTER TABLE rateshop.hotel_price_observations RENAME TO hotel_price_observations_legacy;
+
+-- Free the old index names for the new table.
+DO $$
+DECLARE idx record;
+BEGIN
+    FOR idx IN
+        SELECT i.relname FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        WHERE x.indrelid = 'rateshop.hotel_price_observations_legacy'::regclass
+    LOOP
+        EXECUTE format('ALTER INDEX rateshop.%I RENAME TO %I', idx.relname, left(idx.relname, 50) || '_legacy');
+    END LOOP;
+END $$;
+
+CREATE TABLE rateshop.hotel_price_observations (
+    LIKE rateshop.hotel_price_observations_legacy
+        INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING GENERATED INCLUDING STORAGE
+) PARTITION BY RANGE (observed_on);
+
+-- A serial id's sequence now belongs to the new table (so it survives dropping the legacy
+-- one); an identity column got its own sequence above and is advanced after the copy.
+DO $$
+DECLARE seq text := pg_get_serial_sequence('rateshop.hotel_price_observations_legacy', 'id');
+BEGIN
+    IF seq IS NOT NULL AND (
+        SELECT attidentity FROM pg_attribute
+        WHERE attrelid = 'rateshop.hotel_price_observations_legacy'::regclass AND attname = 'id'
+    ) = '' THEN
+        EXECUTE format('ALTER SEQUENCE %s OWNED BY rateshop.hotel_price_observations.id', seq);
+    END IF;
+END $$;
+
+-- Raw payloads may be dropped by retention once they age out.
+ALTER TABLE rateshop.hotel_price_observations ALTER COLUMN raw_payload DROP NOT NULL;
+ALTER TABLE rateshop.hotel_price_observations ADD PRIMARY KEY (id, observed_on);
+
+CREATE UNIQUE INDEX uq_obs_dedup ON rateshop.hotel_price_observations
+    (hotel_name, check_in, nights, guests_adults, (COALESCE(room_type, '')), source, observed_on);
+-- Latest observation per (check_in, hotel): get_price_matrix / rollup snapshots.
+CREATE INDEX ix_obs_latest ON rateshop.hotel_price_observations
+    (check_in, hotel_name, observed_on DESC, scraped_at DESC);
+CREATE INDEX ix_obs_stay ON rateshop.hotel_price_observations
+    (check_in, nights, guests_adults, observed_on);
+
+-- Copy the remaining (non-unique, non-primary) indexes and all foreign keys.
+DO $$
+DECLARE r record;
+BEGIN
+    FOR r IN
+        SELECT replace(pg_get_indexdef(x.indexrelid), '_legacy', '') AS def
+        FROM pg_index x
+        WHERE x.indrelid = 'rateshop.hotel_price_observations_legacy'::regclass
+          AND NOT x.indisunique AND NOT x.indisprimary
+    LOOP
+        BEGIN
+            EXECUTE replace(r.def, 'CREATE INDEX ', 'CREATE INDEX IF NOT EXISTS ');
+        EXCEPTION WHEN others THEN
+            RAISE NOTICE 'skipped index: % (%)', r.def, SQLERRM;
+        END;
+    END LOOP;
+    FOR r IN
+        SELECT conname, pg_get_constraintdef(oid) AS def FROM pg_constraint
+        WHERE conrelid = 'rateshop.hotel_price_observations_legacy'::regclass AND contype IN ('f', 'c')
+    LOOP
+        EXECUTE format('ALTER TABLE rateshop.hotel_price_observations ADD CONSTRAINT %I %s', r.conname, r.def);
+    END LOOP;
+END $$;
+
+ALTER TABLE rateshop.hotel_price_observations ENABLE ROW LEVEL SECURITY;
+
+-- Create the monthly partitions covering [p_from, p_from + p_months months) if missing.
+CREATE OR REPLACE FUNCTION rateshop.ensure_observation_partitions(p_from date, p_months int)
+RETURNS int
+LANGUAGE plpgsql AS $$
+DECLARE
+    m date := date_trunc('month', p_from)::date;
+    created int := 0;
+    name text;
+BEGIN
+    FOR i IN 0 .. p_months - 1 LOOP
+        name := format('hotel_price_observations_%s', to_char(m, 'YYYY_MM'));
+        IF to_regclass('rateshop.' || name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE rateshop.%I PARTITION OF rateshop.hotel_price_observations '
+                'FOR VALUES FROM (%L) TO (%L)', name, m, (m + interval '1 month')::date
+            );
+            EXECUTE format('ALTER TABLE rateshop.%I ENABLE ROW LEVEL SECURITY', name);
+            created := created + 1;
+        END IF;
+        m := (m + interval '1 month')::date;
+    END LOOP;
+    RETURN created;
+END $$;
+
+-- Partitions from the oldest observation through three months ahead, plus a default
+-- partition so an insert never fails for lack of one.
+SELECT rateshop.ensure_observation_partitions(
+    d, ((extract(year FROM age(current_date, d)) * 12 + extract(month FROM age(current_date, d)))::int + 4)
+)
+FROM (SELECT date_trunc('month', COALESCE(min(observed_on), current_date))::date AS d
+      FROM rateshop.hotel_price_observations_legacy) s;
+CREATE TABLE rateshop.hotel_price_observations_default
+    PARTITION OF rateshop.hotel_price_observations DEFAULT;
+ALTER TABLE rateshop.hotel_price_observations_default ENABLE ROW LEVEL SECURITY;
+
+INSERT INTO rateshop.hotel_price_observations OVERRIDING SYSTEM VALUE
+SELECT * FROM rateshop.hotel_price_observations_legacy;
+SELECT setval(pg_get_serial_sequence('rateshop.hotel_price_observations', 'id'), max(id))
+FROM rateshop.hotel_price_observations HAVING max(id) IS NOT NULL;
+
+-- Repoint views that read the old table (their definitions are kept as-is).
+DO $$
+DECLARE v record;
+BEGIN
+    FOR v IN
+        SELECT DISTINCT c.oid::regclass AS view, pg_get_viewdef(c.oid) AS def
+        FROM pg_depend d
+        JOIN pg_rewrite rw ON rw.oid = d.objid
+        JOIN pg_class c ON c.oid = rw.ev_class
+        WHERE d.refobjid = 'rateshop.hotel_price_observations_legacy'::regclass AND c.relkind = 'v'
+    LOOP
+        EXECUTE format('CREATE OR REPLACE VIEW %s AS %s', v.view,
+                       replace(v.def, 'hotel_price_observations_legacy', 'hotel_price_observations'));
+    END LOOP;
+END $$;
+
+DROP TABLE rateshop.hotel_price_observations_legacy;
+
+ANALYZE rateshop.hotel_price_observations;
+
+COMMIT;
@@ -0,0 +1,25 @@
+-- Raw Apify items stored once per distinct content instead of inline on every observation.
+-- `hash` is the SHA-256 of the item's canonical JSON (sorted keys, no whitespace); `body`
+-- is that JSON compressed with `encoding` ('none' when compressing would not shrink it).
+-- Observations reference it by raw_payload_hash.
+-- No foreign key: retention removes old payloads without touching old observations.
+
+CREATE TABLE IF NOT EXISTS rateshop.raw_payloads (
+    hash          bytea PRIMARY KEY CHECK (octet_length(hash) = 32),
+    encoding      text  NOT NULL CHECK (encoding IN ('zstd', 'zlib', 'none')),
+    body          bytea NOT NULL,
+    raw_bytes     int   NOT NULL,
+    first_seen_on date  NOT NULL DEFAULT current_date,
+    last_seen_on  date  NOT NULL DEFAULT current_date
+);
+-- Already compressed: keep it out of line but skip TOAST's own compression pass.
+ALTER TABLE rateshop.raw_payloads ALTER COLUMN body SET STORAGE EXTERNAL;
+ALTER TABLE rateshop.raw_payloads ENABLE ROW LEVEL SECURITY;
+
+CREATE INDEX IF NOT EXISTS ix_raw_payloads_last_seen ON rateshop.raw_payloads (last_seen_on);
+
+ALTER TABLE rateshop.hotel_price_observations ADD COLUMN IF NOT EXISTS raw_payload_hash bytea;
+
+-- Existing inline raw_payload values are moved over by `sync_apify.py maintain`
+-- (payload_store.migrate_inline_payloads), in batches, since hashing and compression
+-- happen in Python.
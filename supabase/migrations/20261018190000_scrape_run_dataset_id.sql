@@ -0,0 +1,14 @@
+-- Apify dataset id of each synced run, so a locally cached dataset can be traced back to
+-- the stay rows (and search params) it was scraped for when re-normalising history.
+-- Runs synced before this migration have no dataset_id and can only be re-normalised from
+-- their stored raw payloads.
+
+ALTER TABLE rateshop.pricing_scrape_runs ADD COLUMN IF NOT EXISTS dataset_id text;
+
+CREATE INDEX IF NOT EXISTS ix_scrape_runs_dataset
+    ON rateshop.pricing_scrape_runs (dataset_id)
+    WHERE dataset_id IS NOT NULL;
+
+-- Re-normalising replaces one run's observations at a time.
+CREATE INDEX IF NOT EXISTS ix_obs_scrape_run
+    ON rateshop.hotel_price_observations (scrape_run_id, observed_on);
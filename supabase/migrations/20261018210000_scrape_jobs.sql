@@ -0,0 +1,47 @@
+-- Durable scrape job queue drained by backend/app/services/scheduler.py workers.
+--
+-- kind = 'stay': a planned stay to start an Apify run for (payload: check_in, nights,
+--                adults, children, hotel_ids).
+--        'run':  a started Apify run to poll (payload: apify_run_id, db_run_ids).
+--        'sync': a finished run to fetch, normalise and upsert (payload: db_run_id, run).
+--
+-- Workers claim due jobs with SELECT ... FOR UPDATE SKIP LOCKED and hold them under a
+-- lease; a job whose worker died is claimable again once locked_until passes. dedup_key
+-- keeps re-planning the same horizon from queueing a stay twice while it is still open.
+
+CREATE TABLE IF NOT EXISTS rateshop.scrape_jobs (
+    id            bigserial   PRIMARY KEY,
+    kind          text        NOT NULL CHECK (kind IN ('stay', 'run', 'sync')),
+    status        text        NOT NULL DEFAULT 'queued'
+                              CHECK (status IN ('queued', 'running', 'done', 'failed')),
+    dedup_key     text        NOT NULL,
+    payload       jsonb       NOT NULL DEFAULT '{}'::jsonb,
+    run_at        timestamptz NOT NULL DEFAULT now(),
+    attempts      int         NOT NULL DEFAULT 0,
+    locked_by     text,
+    locked_until  timestamptz,
+    last_error    text,
+    parent_id     bigint      REFERENCES rateshop.scrape_jobs (id) ON DELETE SET NULL,
+    created_at    timestamptz NOT NULL DEFAULT now(),
+    updated_at    timestamptz NOT NULL DEFAULT now()
+);
+
+ALTER TABLE rateshop.scrape_jobs ENABLE ROW LEVEL SECURITY;
+
+-- At most one open job per stay / Apify run / sync.
+CREATE UNIQUE INDEX IF NOT EXISTS uq_scrape_jobs_open
+    ON rateshop.scrape_jobs (kind, dedup_key)
+    WHERE status IN ('queued', 'running');
+
+-- Claim scans: due queued jobs and expired leases, per kind.
+CREATE INDEX IF NOT EXISTS ix_scrape_jobs_due
+    ON rateshop.scrape_jobs (kind, run_at)
+    WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS ix_scrape_jobs_lease
+    ON rateshop.scrape_jobs (kind, locked_until)
+    WHERE status = 'running';
+
+-- Finished jobs are pruned by `sync_apify.py maintain`.
+CREATE INDEX IF NOT EXISTS ix_scrape_jobs_finished
+    ON rateshop.scrape_jobs (updated_at)
+    WHERE status IN ('done', 'failed');
@@ -0,0 +1,15 @@
+-- Counter bumped by every job that rewrites stored prices outside a run sync
+-- (re-normalising history, weekly downsampling, rollup refreshes), in the same
+-- transaction as the rewrite. rate_shopping_service.data_version() folds it into the
+-- cache token next to the run ids and finish times, so UI caches keyed on the token
+-- never keep serving prices that maintenance has since replaced.
+
+CREATE TABLE IF NOT EXISTS rateshop.data_version (
+    id          boolean     PRIMARY KEY DEFAULT true CHECK (id),
+    version     bigint      NOT NULL DEFAULT 0,
+    updated_at  timestamptz NOT NULL DEFAULT now()
+);
+
+ALTER TABLE rateshop.data_version ENABLE ROW LEVEL SECURITY;
+
+INSERT INTO rateshop.data_version (id) VALUES (true) ON CONFLICT (id) DO NOTHING;
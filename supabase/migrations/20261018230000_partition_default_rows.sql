@@ -0,0 +1,54 @@
+-- ensure_observation_partitions() without failing on rows already in the default partition.
+--
+-- Rows observed in a month that had no partition yet land in
+-- hotel_price_observations_default, and Postgres refuses CREATE TABLE ... PARTITION OF for
+-- that month while they are there. Such a month is now built as a standalone table, the
+-- rows are moved over from the default partition, and the table is attached; all in the
+-- caller's transaction, so readers never see the rows missing.
+
+CREATE OR REPLACE FUNCTION rateshop.ensure_observation_partitions(p_from date, p_months int)
+RETURNS int
+LANGUAGE plpgsql AS $$
+DECLARE
+    m date := date_trunc('month', p_from)::date;
+    m_end date;
+    created int := 0;
+    moved bigint;
+    name text;
+BEGIN
+    FOR i IN 0 .. p_months - 1 LOOP
+        name := format('hotel_price_observations_%s', to_char(m, 'YYYY_MM'));
+        m_end := (m + interval '1 month')::date;
+        IF to_regclass('rateshop.' || name) IS NULL THEN
+            IF to_regclass('rateshop.hotel_price_observations_default') IS NOT NULL AND EXISTS (
+                SELECT 1 FROM rateshop.hotel_price_observations_default
+                WHERE observed_on >= m AND observed_on < m_end
+            ) THEN
+                EXECUTE format(
+                    'CREATE TABLE rateshop.%I (LIKE rateshop.hotel_price_observations '
+                    'INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE)', name
+                );
+                EXECUTE format(
+                    'WITH gone AS (DELETE FROM rateshop.hotel_price_observations_default '
+                    'WHERE observed_on >= %L AND observed_on < %L RETURNING *) '
+                    'INSERT INTO rateshop.%I SELECT * FROM gone', m, m_end, name
+                );
+                GET DIAGNOSTICS moved = ROW_COUNT;
+                EXECUTE format(
+                    'ALTER TABLE rateshop.hotel_price_observations ATTACH PARTITION rateshop.%I '
+                    'FOR VALUES FROM (%L) TO (%L)', name, m, m_end
+                );
+                RAISE NOTICE 'moved % row(s) from the default partition into %', moved, name;
+            ELSE
+                EXECUTE format(
+                    'CREATE TABLE rateshop.%I PARTITION OF rateshop.hotel_price_observations '
+                    'FOR VALUES FROM (%L) TO (%L)', name, m, m_end
+                );
+            END IF;
+            EXECUTE format('ALTER TABLE rateshop.%I ENABLE ROW LEVEL SECURITY', name);
+            created := created + 1;
+        END IF;
+        m := m_end;
+    END LOOP;
+    RETURN created;
+END $$;
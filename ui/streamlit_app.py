@@ -24,8 +24,8 @@ from backend.app.services.pricing_service import (  # noqa: E402
     save_recommendations,
     get_recommendations,
 )
-from backend.app.core.config import AppConfig  # noqa: E402
-from backend.app.services.report_export import build_excel_report  # noqa: E402
+from backend.app.core.config import get_config  # noqa: E402
+from backend.app.services.report_export import build_excel_report, price_grid  # noqa: E402
 
 # Initialize local DB (SQLite) once
 init_db()
@@ -123,8 +123,8 @@ with tab_comp:
     st.caption("The hotels tracked for rate shopping. Stored permanently in Supabase.")
 
     try:
-        from backend.app.core import db as _cm_db  # noqa: E402
-        from backend.app.services import rate_shopping_service as _cm_rss  # noqa: E402
+        from backend.app.core import db as _cm_db
+        from backend.app.services import rate_shopping_service as _cm_rss
         _cm_ok, _cm_err = True, None
     except Exception as _e:  # pragma: no cover
         _cm_ok, _cm_err = False, str(_e)
@@ -187,6 +187,45 @@ with tab_comp:
                         st.rerun()
 
 
+# --------------------
+# Cached rate-shopping reads
+# --------------------
+# Keyed on the filters plus rss.data_version(), so widget toggles (per night / total,
+# position slider) reuse the last query and pivot, while any newly synced run changes the
+# version and forces a reload. The version itself is re-checked at most every few seconds.
+@st.cache_data(ttl=5, show_spinner=False)
+def _rs_data_version() -> str:
+    from backend.app.services import rate_shopping_service as rss
+    return rss.data_version()
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _rs_insights(start, end, nights, adults, version):
+    from backend.app.services import rate_shopping_service as rss
+    return rss.get_insights(start_date=start, end_date=end, nights=nights, adults=adults)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _rs_price_grid(start, end, nights, adults, per_night, version):
+    """Per-hotel x check-in price grid (None when there are no observations)."""
+    from backend.app.services import rate_shopping_service as rss
+    matrix = rss.get_price_matrix(start_date=start, end_date=end, nights=nights, adults=adults)
+    if not matrix:
+        return None
+    return price_grid(matrix, per_night=per_night)
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _rs_recent_runs(limit, version):
+    from backend.app.services import rate_shopping_service as rss
+    return rss.list_recent_runs(limit=limit)
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _rs_excel(sheets):
+    return build_excel_report(sheets)
+
+
 # ==================== TAB: RATE SHOPPING & PRICING ====================
 with tab_rates:
     st.header("📈 Rate Shopping & Pricing")
@@ -194,8 +233,8 @@ with tab_rates:
 
     # Lazy imports so the other tabs still work if Supabase/psycopg2 isn't configured locally.
     try:
-        from backend.app.core import db as _rs_db  # noqa: E402
-        from backend.app.services import rate_shopping_service as rss  # noqa: E402
+        from backend.app.core import db as _rs_db
+        from backend.app.services import rate_shopping_service as rss
         _rs_import_ok = True
         _rs_import_err = None
     except Exception as _e:  # pragma: no cover
@@ -241,11 +280,11 @@ with tab_rates:
         )
         recommend_mode = mode.startswith("💶")
         position = 0
-        currency = AppConfig().currency
+        currency = get_config().currency
         min_rate, max_rate = 0.0, 1_000_000.0
         if recommend_mode:
             try:
-                _cfg = AppConfig()
+                _cfg = get_config()
                 min_rate = float(_cfg.cfg.min_rate)
                 max_rate = float(_cfg.cfg.max_rate)
             except Exception:
@@ -283,6 +322,7 @@ with tab_rates:
                                         adults=int(in_adults), children=int(in_children),
                                         wait=True, poll_timeout_secs=90,
                                     )
+                                _rs_data_version.clear()
                                 ok = sum(1 for r in results if r.get("status") == "succeeded")
                                 running = sum(1 for r in results if r.get("status") == "running")
                                 st.success(f"Loaded {ok}/{len(results)} date-runs.")
@@ -295,6 +335,7 @@ with tab_rates:
                     with st.spinner("Checking Apify for finished runs…"):
                         try:
                             synced = rss.sync_pending_runs()
+                            _rs_data_version.clear()
                             if synced:
                                 done = sum(1 for s in synced if s.get("status") == "succeeded")
                                 still = sum(1 for s in synced if s.get("status") == "running")
@@ -308,7 +349,9 @@ with tab_rates:
         st.markdown("**2. Your report** — review below and download as Excel")
         if st.button("📊 Show / refresh report", type="primary", use_container_width=True, key="rs_show_btn"):
             st.session_state["rs_show"] = True
+            _rs_data_version.clear()  # re-check for new data now, not in a few seconds
         _rs_show = bool(st.session_state.get("rs_show"))
+        _rs_nights = None if in_nights == "all" else int(in_nights)
         if not _rs_show:
             st.info("Choose your dates above, then click **📊 Show / refresh report** to load the data.")
 
@@ -316,13 +359,11 @@ with tab_rates:
         grid_export = None
 
         insights = []
+        _rs_version = None
         if _rs_show:
             try:
-                insights = rss.get_insights(
-                    start_date=in_start, end_date=in_end,
-                    nights=None if in_nights == "all" else int(in_nights),
-                    adults=int(in_adults),
-                )
+                _rs_version = _rs_data_version()
+                insights = _rs_insights(in_start, in_end, _rs_nights, int(in_adults), _rs_version)
             except Exception as e:
                 st.error(f"Could not load insights: {e}")
 
@@ -381,7 +422,7 @@ with tab_rates:
                     },
                 )
                 try:
-                    xlsx = build_excel_report({"Recommended rates": rec_df})
+                    xlsx = _rs_excel({"Recommended rates": rec_df})
                     st.download_button(
                         "⬇️ Download recommendations (Excel)", data=xlsx,
                         file_name=f"elbitat_recommendations_{in_start}_{in_end}_{position:+d}pct.xlsx",
@@ -443,27 +484,14 @@ with tab_rates:
                 "on each check-in date. Blank = sold out / no availability."
             )
             try:
-                matrix = rss.get_price_matrix(
-                    start_date=in_start, end_date=in_end,
-                    nights=None if in_nights == "all" else int(in_nights),
-                    adults=int(in_adults),
-                )
+                grid = _rs_price_grid(in_start, in_end, _rs_nights, int(in_adults), per_night, _rs_version)
             except Exception as e:
-                matrix = []
+                grid = None
                 st.error(f"Could not load price grid: {e}")
 
-            if not matrix:
+            if grid is None:
                 st.info("No per-hotel observations yet for this filter.")
             else:
-                mdf = pd.DataFrame(matrix)
-                if per_night and "nights" in mdf.columns:
-                    mdf["price_amount"] = (pd.to_numeric(mdf["price_amount"], errors="coerce") / mdf["nights"]).round(2)
-                order = (
-                    mdf[["hotel_name", "is_self"]].drop_duplicates()
-                    .sort_values(["is_self", "hotel_name"], ascending=[False, True])["hotel_name"].tolist()
-                )
-                grid = mdf.pivot_table(index="check_in", columns="hotel_name", values="price_amount", aggfunc="first")
-                grid = grid.reindex(columns=[c for c in order if c in grid.columns]).sort_index()
                 st.dataframe(grid, use_container_width=True)
                 grid_export = grid.copy()
 
@@ -471,7 +499,7 @@ with tab_rates:
             if idf_export is not None or grid_export is not None:
                 basis_label = "per night" if per_night else "total stay"
                 try:
-                    xlsx_bytes = build_excel_report({
+                    xlsx_bytes = _rs_excel({
                         "Elbitat vs competitors": idf_export,
                         "Price per hotel": grid_export,
                     })
@@ -491,7 +519,7 @@ with tab_rates:
         # ---------------- Recent runs ----------------
         with st.expander("🛰️ Recent scrape runs"):
             try:
-                runs = rss.list_recent_runs(limit=15) if _rs_show else []
+                runs = _rs_recent_runs(15, _rs_version or _rs_data_version()) if _rs_show else []
                 if runs:
                     rdf = pd.DataFrame(runs)[
                         [c for c in ["id", "status", "item_count", "cost_usd", "started_at", "finished_at", "error_message"]
@@ -508,7 +536,7 @@ with tab5:
     st.header("Configuration Settings")
     st.markdown("Configure your hotel pricing parameters and system settings.")
 
-    cfg_obj = AppConfig()
+    cfg_obj = get_config()
     st.divider()
 
     col_set1, col_set2 = st.columns(2)